@@ -1,30 +1,66 @@
 import os, logging, shutil, datetime, fire
-import sys, json
+import sys, json, atexit
 
-from basalt.core.config import get_configs, db_path
-from basalt.core.core_commands import (set as core_set, capture, review_flashcard, parse_argv, 
-                                            clear_cache, clear_configs, clear_db, )
-from basalt.core.database import FlashcardDB, ROOT_FOLDER_DEFAULTS
+from basalt.core.core_commands import (capture, parse_argv, clear_cache, clear_configs, clear_db,
+                                            daemon_stats, )
+from basalt.core.mock_provider import MockProviderServer
+from basalt.core.session import get_session
+from basalt.core.datetime_utils import epochs_to_sql_timestamps
+from basalt.core import profiling, sql_trace, rpc
 
 try:
     from basalt.core.daemon import start_daemon
 except Exception:  # fallback stub keeps CLI functional when daemon module is absent
     start_daemon = lambda *_, **__: print("start_daemon() not available in this environment")
 
+def _readable_cards(cards: list[dict]) -> list[dict]:
+    """Copies of `cards` with their epoch-second timestamps shown as 'YYYY-MM-DD HH:MM:SS' (UTC), for printing."""
+    cards = [dict(card) for card in cards]
+    slots, epochs = [], []  # (container, key) of every epoch, converted in one bulk call
+    for card in cards:
+        for field in ("next_due", "created_at"):
+            if isinstance(card.get(field), int):
+                slots.append((card, field))
+                epochs.append(card[field])
+        rep_data = card.get("rep_data")
+        if isinstance(rep_data, dict) and isinstance(rep_data.get("history"), list):
+            history = [list(entry) if isinstance(entry, (list, tuple)) else entry for entry in rep_data["history"]]
+            card["rep_data"] = {**rep_data, "history": history}
+            for entry in history:
+                if isinstance(entry, list) and len(entry) == 2 and isinstance(entry[1], int):
+                    slots.append((entry, 1))
+                    epochs.append(entry[1])
+    for (container, key), timestamp in zip(slots, epochs_to_sql_timestamps(epochs)):
+        container[key] = timestamp
+    return cards
+
+def _readable_card(card: dict) -> dict:
+    return _readable_cards([card])[0]
+
+def _readable_tree(tree: dict) -> dict:
+    return {**tree, "children": [_readable_tree(child) for child in tree["children"]],
+            "cards": _readable_cards(tree["cards"])}
+
 class CLI:
-    """Command-line interface for Basalt.  """
+    """
+    Command-line interface for Basalt.
+
+    set, list, make, review and inbox run inside the daemon when it is up
+    (see core/rpc.py), and in this process otherwise.
+    """
 
     # ---------- initialisation ----------
 
     def __init__(self):
-        # cache for quick access
-        self.configs = get_configs()
-        self.db_path = db_path()
+        # warm connection and configs, shared with the core commands
+        self.session = get_session()
+        self.configs = self.session.configs()
+        self.db_path = self.session.db_path()
 
     # ---------- high‑level editing ----------
 
     def set(self, target: str, identifier: str,
-            edit_path_or_new_value: str, new_value):
+            edit_path_or_new_value, new_value=None):
         """Edit a config, folder, or flashcard.
 
         Examples
@@ -34,19 +70,55 @@ class CLI:
         basalt set card   42    answer "new answer"
         """
         try:
-            core_set(target, identifier, edit_path_or_new_value, new_value)
+            rpc.call("set", target, identifier, edit_path_or_new_value, new_value)
             print("✔ updated.")
         except Exception as e:
             print(f"Error: {e}")
 
-    def capture(self, input=None, file_path_or_url=None, **flags):
-        """Send a capture job to the Basalt daemon."""
+    def capture(self, input=None, file_path_or_url=None, fresh: bool = False, **flags):
+        """Send a capture job to the Basalt daemon; `--fresh` skips the response cache."""
         try:
-            capture(input, file_path_or_url, **flags)
+            capture(input, file_path_or_url, fresh, **flags)
             print("✔ capture job enqueued.")
         except Exception as e:
             print(f"Error: {e}")
 
+    def stats(self, prometheus: str = ""):
+        """
+        Show metrics from the running daemon.
+
+        basalt stats [--prometheus <file>]   (also write Prometheus text format)
+        """
+        try:
+            snapshot = daemon_stats()
+            for section in ("gauges", "counters"):
+                print(f"{section}:")
+                for name, value in sorted(snapshot[section].items()):
+                    print(f"  {name:<50} {value:g}")
+            print("histograms:")
+            for name, hist in sorted(snapshot["histograms"].items()):
+                mean = hist["sum"] / hist["count"] if hist["count"] else 0
+                print(f"  {name:<50} n={hist['count']} mean={mean:.3f} "
+                      f"p50≤{hist['p50']} p95≤{hist['p95']} p99≤{hist['p99']}")
+            for name, cache in snapshot.get("caches", {}).items():
+                lookups = cache["hits"] + cache["misses"]
+                rate = cache["hits"] / lookups if lookups else 0
+                print(f"cache {name}: {cache['entries']} entries, {cache['bytes'] / 1e6:.1f}/"
+                      f"{cache['max_bytes'] / 1e6:.0f} MB, {cache['hits']} hits / "
+                      f"{cache['misses']} misses ({rate:.0%})")
+            if "profile" in snapshot:
+                print("daemon profile:")
+                print(profiling.report(snapshot["profile"]), end="")
+
+            if prometheus:
+                with open(prometheus, "w") as f:
+                    f.write(daemon_stats("prometheus"))
+                print(f"✔ metrics written to {prometheus}.")
+        except (FileNotFoundError, ConnectionRefusedError):
+            print("Error: the daemon is not running.")
+        except Exception as e:
+            print(f"Error: {e}")
+
     # ---------- maintenance ----------
 
     def reset(self, *targets, quiet: bool = False):
@@ -96,6 +168,24 @@ class CLI:
         except Exception as e:
             print(f"Error: {e}")
 
+    def mock(self, port: int = 8765, latency_ms: float = 0, distribution: str = "fixed",
+             rate_429: float = 0.0, rate_500: float = 0.0):
+        """
+        Run a local mock LLM provider for offline testing.
+
+        basalt mock [--port 8765] [--latency_ms 300] [--distribution lognormal] [--rate_429 0.05]
+        then: basalt set config provider mock
+        """
+        try:
+            server = MockProviderServer(port=port, latency_ms=latency_ms, distribution=distribution,
+                                        rate_429=rate_429, rate_500=rate_500)
+            print(f"mock provider listening on {server.url} (Ctrl-C to stop)")
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"Error: {e}")
+
     # ---------- creators ----------
 
     def make(self, target: str, *args, **kwargs):
@@ -117,43 +207,29 @@ class CLI:
         """
         try:
             target = target.lower()
-            with FlashcardDB(self.db_path) as db:
-
-                # ----- card -----
-                if target == "card":
-                    if "question" not in kwargs or "answer" not in kwargs:
-                        raise ValueError("Card requires --question and --answer")
-                    question = kwargs.pop("question")
-                    answer = kwargs.pop("answer")
-                    card_dict = {"question": question, "answer": answer, **kwargs}
-                    batch_id = db.create_batch("")  # trivial batch for singles
-                    card_id = db.create_flashcard(card_dict, batch_id)
-                    print(f"✔ card {card_id} created.")
-                    return
 
-                # ----- folder -----
-                if target == "folder":
-                    if not args:
-                        raise ValueError("Usage: basalt make folder <name> [parent]")
-                    folder_name = args[0]
-                    parent_arg = args[1] if len(args) > 1 else None
-                    new_id = db.create_folder(folder_name)
-
-                    if parent_arg is None:
-                        parent_id = ROOT_FOLDER_DEFAULTS["id"]
-                    else:
-                        if str(parent_arg).isdigit():
-                            parent_id = int(parent_arg)
-                            db.get_folder(parent_id)
-                        else:
-                            parent_id = db.get_folder_id_from_name(parent_arg)
-
-                    db.update_folder_fields(new_id, {"parent_id": parent_id})
-
-                    print(f"✔ folder '{folder_name}' (id {new_id}) created.")
-                    return
+            # ----- card -----
+            if target == "card":
+                if "question" not in kwargs or "answer" not in kwargs:
+                    raise ValueError("Card requires --question and --answer")
+                question = kwargs.pop("question")
+                answer = kwargs.pop("answer")
+                card_dict = {"question": question, "answer": answer, **kwargs}
+                card_id = rpc.call("make_card", card_dict)
+                print(f"✔ card {card_id} created.")
+                return
 
-                raise ValueError("Target must be 'card' or 'folder'.")
+            # ----- folder -----
+            if target == "folder":
+                if not args:
+                    raise ValueError("Usage: basalt make folder <name> [parent]")
+                folder_name = args[0]
+                parent_arg = args[1] if len(args) > 1 else None
+                new_id = rpc.call("make_folder", folder_name, parent_arg)
+                print(f"✔ folder '{folder_name}' (id {new_id}) created.")
+                return
+
+            raise ValueError("Target must be 'card' or 'folder'.")
 
         except Exception as e:
             print(f"Error: {e}")
@@ -182,42 +258,110 @@ class CLI:
                 return
             
             if what in ("cards", "card"):
-                with FlashcardDB(self.db_path) as db:
-                    if what == "cards":
-                        all_cards = db.get_all_cards()
-                        print(json.dumps(all_cards, indent=2))
-                        return
-
-                    if not target:
-                        raise ValueError("Please supply an ID: basalt list card <id>")
-                    if not str(target).isdigit():
-                        raise ValueError(f"Card ID must be an integer, got '{target}'")
-                    card = db.get_card(int(target))
-                    if not card:
-                        print(f"Card {target} not found.")
-                    else:
-                        print(json.dumps(card, indent=2))
+                if what == "cards":
+                    all_cards = rpc.call("list_cards")
+                    print(json.dumps(_readable_cards(all_cards), indent=2))
                     return
-                
+
+                if not target:
+                    raise ValueError("Please supply an ID: basalt list card <id>")
+                if not str(target).isdigit():
+                    raise ValueError(f"Card ID must be an integer, got '{target}'")
+                card = rpc.call("get_card", int(target))
+                if not card:
+                    print(f"Card {target} not found.")
+                else:
+                    print(json.dumps(_readable_card(card), indent=2))
+                return
+
 
             raise ValueError("Argument 'what' not recognised.")
         except Exception as e:
             print(f"Error: {e}")
 
+    def search(self, *query, folder=None, limit: int = 20, page: int = 1, sources: bool = True, json_out: bool = False):
+        """
+        Full-text search over cards (and the text they were captured from).
+
+        basalt search mitochondria atp [--folder Biology] [--limit 20] [--page 2] [--nosources] [--json_out]
+
+        Every word must match; end a word with * for a prefix match.
+        """
+        try:
+            text = " ".join(str(q) for q in query)
+            with self.session.database() as db:
+                folder_id = None
+                if folder is not None:
+                    folder_id = int(folder) if str(folder).isdigit() else db.get_folder_id_from_name(folder)
+                cards = db.search_cards(text, folder_id, limit, (page - 1) * limit, sources)
+
+            if json_out:
+                print(json.dumps(_readable_cards(cards), indent=2))
+                return
+            if not cards:
+                print("No matching cards.")
+                return
+            for card in cards:
+                print(f"[{card['id']}] {card['question']}")
+                print(f"      {card['answer']}")
+            if len(cards) == limit:
+                print(f"… more results: basalt search {text} --page {page + 1}")
+        except Exception as e:
+            print(f"Error: {e}")
+
+    def dupes(self, threshold: int = 70, json_out: bool = False):
+        """
+        Find clusters of near-duplicate cards in the collection.
+
+        basalt dupes [--threshold 70] [--json_out]     (threshold: percent similarity)
+        """
+        try:
+            with self.session.database() as db:
+                clusters = db.find_duplicate_clusters(threshold / 100)
+                if json_out:
+                    print(json.dumps(clusters))
+                    return
+                if not clusters:
+                    print("No near-duplicate cards found.")
+                    return
+                for cluster in clusters:
+                    print(f"{len(cluster)} similar cards:")
+                    for card_id in cluster:
+                        print(f"  [{card_id}] {db.get_card(card_id)['question']}")
+                print(f"{len(clusters)} clusters, {sum(len(c) - 1 for c in clusters)} redundant cards.")
+        except Exception as e:
+            print(f"Error: {e}")
+
+    def storage(self, json_out: bool = False):
+        """
+        Show how much space batch source texts take, and what deduplication and compression save.
+
+        basalt storage [--json_out]
+        """
+        try:
+            with self.session.database() as db:
+                s = db.storage_stats()
+            if json_out:
+                print(json.dumps(s))
+                return
+            mb = lambda n: f"{n / 1e6:.2f} MB"
+            print(f"batches:        {s['batches']} ({s['sources']} distinct sources)")
+            print(f"source text:    {mb(s['text_bytes'])}")
+            print(f"deduplicated:   {mb(s['unique_bytes'])}")
+            print(f"stored:         {mb(s['stored_bytes'])}")
+            if s["text_bytes"]:
+                print(f"saved:          {mb(s['saved_bytes'])} ({s['saved_bytes'] / s['text_bytes']:.0%})")
+        except Exception as e:
+            print(f"Error: {e}")
+
     # ---------- tree utilities ----------
 
     def display_tree(self, root=None):
         """Pretty‑print the folder tree starting at *root* (id or name)."""
         try:
-            with FlashcardDB(self.db_path) as db:
-                root_id = ROOT_FOLDER_DEFAULTS["id"]
-                if root:
-                    if isinstance(root, int) or (isinstance(root, str) and root.isdigit()):
-                        root_id = int(root)
-                    else:
-                        root_id = db.get_folder_id_from_name(root)
-                self.print_folder_tree(db.get_folder_tree(root_id))
-                print(db.get_folder_tree(root_id))
+            tree = rpc.call("folder_tree", root)
+            self.print_folder_tree(tree)
+            print(_readable_tree(tree))
         except Exception as e:
             print(f"Error: {e}")
 
@@ -229,56 +373,58 @@ class CLI:
         for card in tree["cards"]:
             print("    " * (indent + 1) + f"- card {card["id"]}")
 
-    # ---------- inbox ----------
+    # ---------- reviewing ----------
+
+    def review(self, card_id: int, score: int):
+        """Record a review of card `card_id` with score 1–5: basalt review 42 4"""
+        try:
+            if str(score) not in {"1", "2", "3", "4", "5"}:
+                raise ValueError(f"Score must be 1–5, got '{score}'")
+            rpc.call("review", int(card_id), int(score))
+            print(f"✔ card {card_id} reviewed.")
+        except Exception as e:
+            print(f"Error: {e}")
 
     def inbox(self):
         """Interactive review of all due flashcards."""
         try:
-            with FlashcardDB(self.db_path) as db:
+            while True:
+                due = rpc.call("next_due_card")
+                if not due:
+                    print("🎉  No due cards.")
+                    break
+
+                card = due["card"]
+                cid = card["id"]
+                print(f"folder: {due['folder']} | inbox: {due['remaining']} remaining")
+                print(f"QUESTION: {card['question']}")
+                print(f"ANSWER:   {card['answer']}")
+                if card["other_data"]:
+                    print(card["other_data"])
+
                 while True:
-                    due = db.get_due_cards()
-                    if not due:
-                        print("🎉  No due cards.")
-                        break
-
-                    card = due.pop(0)
-                    cid = card["id"]
-                    folder = db.get_folder(card["folder_id"])
-                    print(f"folder: {folder['name']} | inbox: {len(due)} remaining")
-                    print(f"QUESTION: {card['question']}")
-                    print(f"ANSWER:   {card['answer']}")
-                    if card["other_data"]:
-                        print(card["other_data"])
-
-                    while True:
-                        try:
-                            cmd = self.parse_inbox_cmd(input("> "))
-
-                            if cmd[0] == "quit":
-                                print("Exiting inbox.")
-                                return
-                            if cmd[0] == "rate":
-                                review_flashcard(cid, cmd[1])
-                                break
-                            if cmd[0] == "delete":
-                                db.delete_flashcard(cid)
-                                break
-                            if cmd[0] == "edit":
-                                field, value = cmd[1], cmd[2]
-                                if field in ("question", "answer"):
-                                    db.update_flashcard_fields(cid, {field: value})
-                                else:
-                                    data = card["other_data"] or {}
-                                    data[field] = value
-                                    db.update_flashcard_fields(cid, {"other_data": data})
-                                break
-                            if cmd[0] == "move":
-                                self.move_flashcard_to_folder_name(cid, cmd[1])
-                                print(f"Flashcard moved to {cmd[1]}.")
-                                break
-
-                        except ValueError as err:
-                            print(f"Error: {err}")
+                    try:
+                        cmd = self.parse_inbox_cmd(input("> "))
+
+                        if cmd[0] == "quit":
+                            print("Exiting inbox.")
+                            return
+                        if cmd[0] == "rate":
+                            rpc.call("review", cid, cmd[1])
+                            break
+                        if cmd[0] == "delete":
+                            rpc.call("delete_flashcard", cid)
+                            break
+                        if cmd[0] == "edit":
+                            rpc.call("edit_flashcard", cid, cmd[1], cmd[2])
+                            break
+                        if cmd[0] == "move":
+                            self.move_flashcard_to_folder_name(cid, cmd[1])
+                            print(f"Flashcard moved to {cmd[1]}.")
+                            break
+
+                    except ValueError as err:
+                        print(f"Error: {err}")
                             
         except Exception as e:
             print(f"Error: {e}")
@@ -286,9 +432,7 @@ class CLI:
     # ---------- helpers ----------
 
     def move_flashcard_to_folder_name(self, card_id: int, folder_name: str):
-        with FlashcardDB(self.db_path) as db:
-            folder_id = db.get_folder_id_from_name(folder_name)
-            db.update_flashcard_fields(card_id, {"folder_id": folder_id})
+        rpc.call("move_flashcard", card_id, folder_name)
 
     @staticmethod
     def parse_inbox_cmd(s: str):
@@ -314,4 +458,9 @@ class CLI:
         raise ValueError(f"Unrecognised command: '{s}'")
 
 if __name__ == "__main__":
+    if profiling.ENABLED:
+        atexit.register(profiling.print_report)
+    if sql_trace.ENABLED:
+        logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+        atexit.register(sql_trace.print_report)
     fire.Fire(CLI(), command=parse_argv(sys.argv[1:]))
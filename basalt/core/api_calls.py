@@ -1,28 +1,113 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from youtube_transcript_api import YouTubeTranscriptApi  # type: ignore
-import re, logging
+import re, logging, threading, json
+from http.client import RemoteDisconnected
 logger = logging.getLogger(__name__)
 
-def get_youtube_transcript(video_url):
-
-    # returns the 11-char YouTube video ID or None
-    def yt_id(url: str):
-        pattern = (
-            r"(?:youtu\.be/|"          # youtu.be/abc…
-            r"youtube\.com/(?:"
-            r"watch.*?[?&]v=|"         # youtube.com/watch?v=abc…
-            r"embed/|"                 # youtube.com/embed/abc…
-            r"shorts/))"               # youtube.com/shorts/abc…
-            r"([\w-]{11})"             # ← capture exactly 11-char ID
-        )
-        match = re.search(pattern, url)
-        return match.group(1) if match else None
-    
-    video_id = yt_id(video_url)
+API_BASES = {
+    "openai":    "https://api.openai.com",
+    "mistral":   "https://api.mistral.ai",
+    "deepseek":  "https://api.deepseek.com",
+    "anthropic": "https://api.anthropic.com",
+    "google":    "https://generativelanguage.googleapis.com",
+    "mock":      "http://127.0.0.1:8765",  # basalt.core.mock_provider (OpenAI-compatible)
+}
+
+CONNECT_TIMEOUT = 5   # seconds to establish TCP + TLS
+READ_TIMEOUT = 60     # seconds between bytes of the response
+
+# ---------- pooled provider sessions ----------
+# one keep-alive requests.Session per provider, so repeated calls reuse warm
+# TCP/TLS connections instead of paying the handshake on every capture.
+
+_pool_size = 10
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+def configure_sessions(pool_size: int):
+    """Size the per-provider connection pools (the daemon passes its worker count)."""
+    global _pool_size
+    with _sessions_lock:
+        _pool_size = pool_size
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+def get_session(provider: str) -> requests.Session:
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            # only connect failures are retried here: the request never reached the
+            # server, so retrying a POST cannot duplicate a (paid) completion.
+            # A kept-alive connection the server already closed is resent by _post.
+            retry = Retry(total=None, connect=2, read=0, redirect=0, status=0, other=0,
+                          backoff_factor=0.2)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return session
+
+def _dropped_keep_alive(exc: BaseException) -> bool:
+    """Whether `exc` (a requests ConnectionError) is a connection closed before any reply came back."""
+    seen = [exc]
+    while seen:
+        err = seen.pop()
+        if isinstance(err, (RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+            return True
+        seen.extend(arg for arg in err.args if isinstance(arg, BaseException))
+    return False
+
+def _post(provider: str, url: str, **kwargs) -> requests.Response:
+    """
+    POST through the provider's pooled session. A server may close an idle
+    keep-alive connection just as a request goes out on it; it never answered,
+    so the request is sent once more on a fresh connection.
+    """
+    session = get_session(provider)
+    try:
+        return session.post(url, **kwargs)
+    except requests.exceptions.ConnectionError as exc:
+        if not _dropped_keep_alive(exc):
+            raise
+        logger.debug("%s closed a pooled connection; resending", provider)
+        return session.post(url, **kwargs)
+
+def youtube_video_id(url: str):
+    """Return the 11-char YouTube video ID in `url`, or None."""
+    pattern = (
+        r"(?:youtu\.be/|"          # youtu.be/abc…
+        r"youtube\.com/(?:"
+        r"watch.*?[?&]v=|"         # youtube.com/watch?v=abc…
+        r"embed/|"                 # youtube.com/embed/abc…
+        r"shorts/))"               # youtube.com/shorts/abc…
+        r"([\w-]{11})"             # ← capture exactly 11-char ID
+    )
+    match = re.search(pattern, url)
+    return match.group(1) if match else None
+
+def get_youtube_transcript(video_url, cache=None):
+    """
+    Fetch the transcript of a YouTube video as plain text.
+
+    cache: DiskCache (optional) consulted and filled by video id, so repeated
+    captures of the same video skip the fetch.
+    """
+
+    video_id = youtube_video_id(video_url)
 
     if not video_id:
         raise ValueError(f"Unable to find id in YouTube url provided: {video_url}")
 
+    if cache is not None:
+        text = cache.get(video_id)
+        if text is not None:
+            logger.debug("youtube transcript cache hit: " + video_id)
+            return text
+
     logger.debug("getting youtube transcript w/ i.d.:" + video_id)
     
     try:
@@ -30,39 +115,49 @@ def get_youtube_transcript(video_url):
     except Exception as e:
         raise RuntimeError(f"Transcript could not be fetched: {e}")
     
-    return "\n".join(entry['text'] for entry in transcript)
+    text = "\n".join(entry['text'] for entry in transcript)
+    if cache is not None:
+        cache.set(video_id, text)
+    return text
     
 
-def call_model(prompt, content, configs, history=None, temperature=0.7, max_tokens=2048):
+def _build_request(prompt, content, configs, history, temperature, max_tokens, stream=False):
     """
-    Minimal, vanilla-requests wrapper for the big five providers.
+    Provider-specific request build shared by call_model and stream_model.
 
-    history: list of {"role": "...", "content": "..."} items (optional)
-    returns: assistant text (first candidate) or raises RuntimeError
+    returns: (provider, url, headers, body, extract, extract_usage, extract_delta)
+      extract(resp_json)       -> assistant text of a complete response
+      extract_usage(resp_json) -> (prompt_tokens, completion_tokens)
+      extract_delta(event)     -> (text or None, (prompt_tokens, completion_tokens) or None)
+                                  for one decoded SSE event of a streamed response
     """
 
     content = "Text: " + content
     api_key, model, provider = configs["api_key"], configs["model"], configs["provider"]
 
 
-    if not api_key:
-        raise ValueError("api_key is required; missing from configs in call_model ")
-    if not model:
-        raise ValueError("model is required; missing from configs in call_model ")
     if not provider:
         raise ValueError("provider is required; missing from configs in call_model")
 
     provider = provider.lower()
     history = history or []
 
+    if provider == "mock":
+        api_key = api_key or "mock"
+        model = model or "mock"
+    if not api_key:
+        raise ValueError("api_key is required; missing from configs in call_model ")
+    if not model:
+        raise ValueError("model is required; missing from configs in call_model ")
+    if provider not in API_BASES:
+        raise ValueError(f"Unsupported provider '{provider}'")
+
+    # api_base points any provider at another host, e.g. a local mock server
+    base = (configs.get("api_base") or API_BASES[provider]).rstrip("/")
 
-    # ---------- Provider-specific request build ----------
-    if provider in ("openai", "mistral", "deepseek"):
-        url = {
-            "openai":  "https://api.openai.com/v1/chat/completions",
-            "mistral": "https://api.mistral.ai/v1/chat/completions",
-            "deepseek":"https://api.deepseek.com/v1/chat/completions",
-        }[provider]
+
+    if provider in ("openai", "mistral", "deepseek", "mock"):
+        url = f"{base}/v1/chat/completions"
 
         headers = {"Authorization": f"Bearer {api_key}",
                    "Content-Type": "application/json"}
@@ -79,11 +174,20 @@ def call_model(prompt, content, configs, history=None, temperature=0.7, max_toke
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
+        if stream:
+            body["stream"] = True
+            if provider in ("openai", "mock"):
+                body["stream_options"] = {"include_usage": True}
 
         extract = lambda r: r["choices"][0]["message"]["content"]
+        extract_usage = lambda r: (r["usage"]["prompt_tokens"], r["usage"]["completion_tokens"])
+
+        def extract_delta(event):
+            text = event["choices"][0]["delta"].get("content") if event.get("choices") else None
+            return text, extract_usage(event) if event.get("usage") else None
 
     elif provider == "anthropic":          # Claude 3
-        url = "https://api.anthropic.com/v1/messages"
+        url = f"{base}/v1/messages"
         headers = {
             "x-api-key": api_key,
             "anthropic-version": "2023-06-01",
@@ -98,12 +202,29 @@ def call_model(prompt, content, configs, history=None, temperature=0.7, max_toke
         }
         if prompt:
             body["system"] = prompt
+        if stream:
+            body["stream"] = True
 
         extract = lambda r: r["content"][0]["text"]
+        extract_usage = lambda r: (r["usage"]["input_tokens"], r["usage"]["output_tokens"])
+
+        prompt_tokens = 0
+        def extract_delta(event):
+            nonlocal prompt_tokens
+            kind = event.get("type")
+            if kind == "content_block_delta":
+                return event["delta"].get("text"), None
+            if kind == "message_start":
+                prompt_tokens = event["message"]["usage"]["input_tokens"]
+            elif kind == "message_delta" and "usage" in event:
+                return None, (prompt_tokens, event["usage"]["output_tokens"])
+            elif kind == "error":
+                raise RuntimeError(f"anthropic stream error: {event.get('error')}")
+            return None, None
 
     elif provider == "google":             # Gemini 1.5
-        url = (f"https://generativelanguage.googleapis.com/v1beta/"
-               f"models/{model}:generateContent?key={api_key}")
+        method = "streamGenerateContent?alt=sse&" if stream else "generateContent?"
+        url = f"{base}/v1beta/models/{model}:{method}key={api_key}"
         headers = {"Content-Type": "application/json"}
 
         contents = [{"role": m["role"],
@@ -121,16 +242,39 @@ def call_model(prompt, content, configs, history=None, temperature=0.7, max_toke
             body["systemInstruction"] = {"parts": [{"text": prompt}]}
 
         extract = lambda r: r["candidates"][0]["content"]["parts"][0]["text"]
+        extract_usage = lambda r: (r["usageMetadata"]["promptTokenCount"],
+                                   r["usageMetadata"]["candidatesTokenCount"])
+
+        def extract_delta(event):
+            parts = event["candidates"][0].get("content", {}).get("parts", []) if event.get("candidates") else []
+            text = "".join(p.get("text", "") for p in parts) or None
+            return text, extract_usage(event) if "candidatesTokenCount" in event.get("usageMetadata", {}) else None
 
     else:
         raise ValueError(f"Unsupported provider '{provider}'")
 
+    return provider, url, headers, body, extract, extract_usage, extract_delta
+
+
+def call_model(prompt, content, configs, history=None, temperature=0.7, max_tokens=2048, usage=None):
+    """
+    Minimal, vanilla-requests wrapper for the big five providers.
+
+    history: list of {"role": "...", "content": "..."} items (optional)
+    usage: dict (optional) filled with prompt_tokens / completion_tokens
+    returns: assistant text (first candidate) or raises RuntimeError
+    """
+
+    provider, url, headers, body, extract, extract_usage, _ = _build_request(
+        prompt, content, configs, history, temperature, max_tokens)
+
 
     # ---------- Network call ----------
     logger.debug("model called")
 
     try:
-        resp = requests.post(url, headers=headers, json=body, timeout=30)
+        resp = _post(provider, url, headers=headers, json=body,
+                     timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
         resp.raise_for_status()
     except requests.exceptions.RequestException as exc:
         raise RuntimeError(f"{provider} request failed: {exc}")
@@ -144,8 +288,60 @@ def call_model(prompt, content, configs, history=None, temperature=0.7, max_toke
         raise RuntimeError(f"{provider} returned non-JSON: {exc}")
 
 
+    if usage is not None:
+        try:
+            usage["prompt_tokens"], usage["completion_tokens"] = extract_usage(data)
+        except (KeyError, IndexError, TypeError):
+            logger.debug("%s response carried no usage data", provider)
+
     # ---------- Extract assistant text ----------
     try:
         return extract(data)
     except (KeyError, IndexError, TypeError) as exc:
         raise RuntimeError(f"{provider} response format changed: {exc}")
+
+
+def stream_model(prompt, content, configs, history=None, temperature=0.7, max_tokens=2048, usage=None):
+    """
+    Streaming (server-sent events) counterpart of call_model.
+
+    yields: pieces of assistant text as they arrive
+    usage: dict (optional) filled with prompt_tokens / completion_tokens once reported
+    raises RuntimeError on network or format errors (possibly mid-stream)
+    """
+
+    provider, url, headers, body, _, _, extract_delta = _build_request(
+        prompt, content, configs, history, temperature, max_tokens, stream=True)
+
+    logger.debug("model called (streaming)")
+
+    try:
+        resp = _post(provider, url, headers=headers, json=body, stream=True,
+                     timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        resp.raise_for_status()
+    except requests.exceptions.RequestException as exc:
+        raise RuntimeError(f"{provider} request failed: {exc}")
+
+    resp.encoding = "utf-8"  # SSE is always UTF-8; requests would guess ISO-8859-1 for text/*
+    with resp:
+        try:
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue  # blank separators, "event:" lines, keep-alive comments
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+
+                try:
+                    text, tokens = extract_delta(json.loads(payload))
+                except (ValueError, KeyError, IndexError, TypeError) as exc:
+                    raise RuntimeError(f"{provider} stream format changed: {exc}")
+
+                if tokens and usage is not None:
+                    usage["prompt_tokens"], usage["completion_tokens"] = tokens
+                if text:
+                    yield text
+        except requests.exceptions.RequestException as exc:
+            raise RuntimeError(f"{provider} stream interrupted: {exc}")
+
+    logger.debug("stream finished")
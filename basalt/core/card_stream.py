@@ -0,0 +1,85 @@
+"""Incremental parsing of a streamed JSON array of flashcards.
+
+The model answers with a single JSON array of card objects. `CardStreamParser`
+is fed text as it streams in and returns each card object as soon as its
+closing brace arrives, so cards can be stored while generation continues and a
+truncated response still yields every card that was completed.
+"""
+import json, logging
+
+logger = logging.getLogger(__name__)
+
+
+class CardStreamParser:
+
+    def __init__(self):
+        self.started = False   # seen the opening '[' of the array
+        self._opening = False  # just seen a '[' that may open it
+        self.done = False      # seen the closing ']' of the array
+        self._depth = 0        # nesting depth inside the current card object
+        self._in_string = False
+        self._escape = False
+        self._buf = []         # characters of the current card object
+
+    @property
+    def truncated(self) -> bool:
+        """True if the text fed so far stopped before the array was closed."""
+        return not self.done
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume the next piece of text; return the card objects it completed."""
+        cards = []
+        for ch in chunk:
+            if self.done:
+                break
+
+            if not self.started:
+                # skip any preamble (a ```json fence, "see [1]:") before the array;
+                # a '[' opens it only if the next non-space character is '{' or ']'
+                if ch == "[":
+                    self._opening = True
+                    continue
+                if not self._opening or ch.isspace():
+                    continue
+                self._opening = False
+                if ch not in "{]":
+                    continue
+                self.started = True
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth, self._buf = 1, [ch]
+                elif ch == "]":
+                    self.done = True
+                continue
+
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    card = self._complete()
+                    if card is not None:
+                        cards.append(card)
+        return cards
+
+    def _complete(self):
+        text = "".join(self._buf)
+        self._buf = []
+        try:
+            card = json.loads(text)
+        except json.JSONDecodeError as exc:
+            logger.warning("skipping malformed card in stream: %s", exc)
+            return None
+        return card if isinstance(card, dict) else None
+
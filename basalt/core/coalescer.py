@@ -0,0 +1,93 @@
+"""Coalescing of small captures into batched model requests.
+
+Small captures that arrive within `coalesce_window_ms` of each other (and share
+the same prompt settings) are buffered and handed to a single flush callback,
+so the daemon makes one model call for all of them instead of one per capture.
+"""
+import threading, json, logging
+
+from basalt.core.config import get_config
+
+logger = logging.getLogger(__name__)
+
+MAX_DOCUMENTS = 10  # per coalesced request; keeps the combined answer within max_tokens
+
+
+def _group_key(user_inputs, configs):
+    # captures can only share a request if they would produce the same prompt
+    return json.dumps(
+        [user_inputs, configs.get("provider"), configs.get("model"),
+         configs.get("custom_prompt"), configs.get("custom_commands")],
+        sort_keys=True,
+    )
+
+
+class CaptureCoalescer:
+    """
+    Buffers small captures per prompt group until the window elapses or the
+    group reaches `coalesce_max_chars`, then calls
+    `flush(contents, user_inputs, configs)` with everything collected.
+    """
+
+    def __init__(self, flush):
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._pending = {}  # group key -> {"contents", "chars", "user_inputs", "configs", "timer"}
+
+    @staticmethod
+    def accepts(content, configs) -> bool:
+        """Whether a capture is small enough to be coalesced under `configs`."""
+        window = get_config(configs, "coalesce_window_ms")
+        return window > 0 and len(content) < get_config(configs, "coalesce_max_chars")
+
+    def add(self, content, user_inputs, configs):
+        key = _group_key(user_inputs, configs)
+        ready = None
+
+        with self._lock:
+            group = self._pending.get(key)
+            if group is None:
+                timer = threading.Timer(
+                    get_config(configs, "coalesce_window_ms") / 1000,
+                    self._flush_group, args=(key,),
+                )
+                timer.daemon = True
+                group = {
+                    "contents": [], "chars": 0, "timer": timer,
+                    "user_inputs": user_inputs, "configs": configs,
+                }
+                self._pending[key] = group
+                timer.start()
+
+            group["contents"].append(content)
+            group["chars"] += len(content)
+
+            if (group["chars"] >= get_config(configs, "coalesce_max_chars")
+                    or len(group["contents"]) >= MAX_DOCUMENTS):
+                ready = self._pending.pop(key)
+                ready["timer"].cancel()
+
+        if ready:
+            self._dispatch(ready)
+
+    def flush_all(self):
+        """Flush every buffered group immediately (used on shutdown)."""
+        with self._lock:
+            groups = list(self._pending.values())
+            self._pending.clear()
+        for group in groups:
+            group["timer"].cancel()
+            self._dispatch(group)
+
+    def _flush_group(self, key):
+        with self._lock:
+            group = self._pending.pop(key, None)
+        if group:
+            self._dispatch(group)
+
+    def _dispatch(self, group):
+        logger.info("flushing %d coalesced captures", len(group["contents"]))
+        try:
+            self._flush(group["contents"], group["user_inputs"], group["configs"])
+        except Exception:
+            logger.exception("could not dispatch coalesced captures")
@@ -1,6 +1,6 @@
 
 from appdirs import user_config_dir, user_data_dir, user_cache_dir
-import os, json, sys
+import os, json
 from typing import Mapping, Any
 
 
@@ -27,9 +27,35 @@ def default_configs():
         },
         "provider" : None, 
         "model" : None,
-        "api_key" : None
+        "api_key" : None,
+        "api_base" : None, #overrides the provider's url, e.g. http://127.0.0.1:8765 for the mock server
+        "coalesce_window_ms" : 0, #0 disables coalescing of small captures
+        "coalesce_max_chars" : 4000,
+        "stream" : False, #store cards as the model streams them
+        "response_cache" : True, #reuse model responses for identical captures
+        "response_cache_max_mb" : 64,
+        "response_cache_ttl_hours" : 720, #0 = never expire
+        "dedupe" : None, #"flag" or "drop" new cards that nearly duplicate existing ones
+        "dedupe_threshold" : 70, #percent similarity counted as a duplicate
+        "folder_routing" : "llm", #"local" files cards with the on-device classifier instead of the model
         }
 
+# configs that take one of a fixed set of values (None: unset); provider is matched lowercased
+CONFIG_CHOICES = {
+    "provider" : (None, "openai", "mistral", "deepseek", "anthropic", "google", "mock"),
+    "dedupe" : (None, "flag", "drop"),
+    "folder_routing" : ("llm", "local"),
+}
+
+# configs that default to None and take a string once set
+NULLABLE_STRINGS = ("provider", "model", "api_key", "api_base", "dedupe")
+
+def get_config(configs, config_name):
+    """Look up `config_name`, falling back to its default for older config files."""
+    if config_name in configs:
+        return configs[config_name]
+    return default_configs()[config_name]
+
 def get_configs():
 
     if os.path.exists(config_file_path):
@@ -56,14 +82,12 @@ def set_config(config_name, new_value):
     config_names = [c for c in default_configs()]
 
     if config_name not in config_names:
-        print(f"Error: '{config_name}' is not a valid configuration option.")
-        sys.exit(1)
+        raise ValueError(f"'{config_name}' is not a valid configuration option.")
     elif config_name == "data_dir":
-        if os.path.exists(new_value):
+        if isinstance(new_value, str) and os.path.exists(new_value):
             configs["data_dir"] = os.path.abspath(new_value)
         else:
-            print(f"Error: '{new_value}' is not a valid path")
-            sys.exit(1)
+            raise ValueError(f"'{new_value}' is not a valid path")
     else:
         configs[config_name] = new_value #NEED TO ADD ERROR CHECKING LIKE DATA_DIR
     
@@ -100,7 +124,22 @@ def assert_valid_configs(configs):
                    f"`{field}` keys/values must be strings")
 
     # optional strings
-    for field in ("provider", "model", "api_key"):
+    for field in NULLABLE_STRINGS:
         val = configs[field]
         _check(val is None or isinstance(val, str),
-               f"`{field}` must be None or a string")
\ No newline at end of file
+               f"`{field}` must be None or a string")
+    for field, choices in CONFIG_CHOICES.items():
+        val = configs[field].lower() if field == "provider" and configs[field] else configs[field]
+        _check(val in choices, f"`{field}` must be one of {choices}")
+
+    # bools
+    for field in ("stream", "response_cache"):
+        _check(isinstance(configs[field], bool), f"`{field}` must be a boolean")
+
+    # non-negative ints
+    for field in ("coalesce_window_ms", "coalesce_max_chars",
+                  "response_cache_max_mb", "response_cache_ttl_hours", "dedupe_threshold"):
+        val = configs[field]
+        _check(isinstance(val, int) and not isinstance(val, bool) and val >= 0,
+               f"`{field}` must be a non-negative integer")
+    _check(configs["dedupe_threshold"] <= 100, "`dedupe_threshold` is a percentage (0-100)")
@@ -0,0 +1,124 @@
+"""Notice changes to config.json without waking up on a timer.
+
+On Linux the config directory is watched with inotify (through ctypes), so
+the watcher thread sleeps until config.json is written, replaced or removed.
+Elsewhere, or if inotify is unavailable, the file's mtime/size is polled
+every `poll_interval` seconds. Either way `on_change()` is called on the
+watcher thread once per change; deciding whether anything that matters
+changed is up to the caller.
+"""
+import ctypes, ctypes.util, logging, os, select, struct, sys, threading
+
+from basalt.core import config
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 1.0
+
+# <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then len bytes of name
+
+
+def _inotify_watch(directory: str):
+    """A non-blocking inotify fd watching `directory`, or None if inotify isn't available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_DELETE) < 0:
+        logger.warning("inotify_add_watch failed: %s", os.strerror(ctypes.get_errno()))
+        os.close(fd)
+        return None
+    return fd
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ConfigWatcher:
+    """Calls `on_change()` when the config file at `path` changes, between start() and stop()."""
+
+    def __init__(self, on_change, path: str | None = None, poll_interval: float = POLL_SECONDS):
+        self.on_change = on_change
+        self.path = path or config.config_file_path
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._stamp = None
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = _inotify_watch(os.path.dirname(self.path))
+        self.mode = "inotify" if self._fd is not None else "poll"
+
+    def start(self):
+        # taken here, not on the thread, so a change made right after start() isn't missed
+        self._stamp = _stamp(self.path)
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._fd = None
+
+    def _changed(self):
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception("config change handler failed")
+
+    def _run(self):
+        if self._fd is None:
+            self._poll()
+            return
+        name = os.fsencode(os.path.basename(self.path))
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._stop.is_set():
+                return
+            if self._fd in ready and name in self._read_names():
+                self._changed()
+
+    def _read_names(self) -> set[bytes]:
+        """Names of the files in every pending inotify event."""
+        names = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(buf):
+                _, _, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                names.add(buf[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            current = _stamp(self.path)
+            if current != self._stamp:
+                self._stamp = current
+                self._changed()
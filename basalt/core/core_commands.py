@@ -1,8 +1,10 @@
-from basalt.core.config import get_configs, set_config as base_set_config, db_path, default_configs
+from basalt.core.config import set_config as base_set_config, default_configs, CONFIG_CHOICES, NULLABLE_STRINGS
 from basalt.core.config import socket_path
-from basalt.core.database import FlashcardDB, ROOT_FOLDER_DEFAULTS, DEFAULT_FOLDER_SETTINGS
+from basalt.core.database import ROOT_FOLDER_DEFAULTS, DEFAULT_FOLDER_SETTINGS
+from basalt.core.session import get_session
 from basalt.core.spaced_repetition import get_interval_sm2
-from basalt.core.datetime_utils import now_dt, dt_to_sql_timestamp, sql_timestamp_to_dt
+from basalt.core.datetime_utils import now_dt, now_epoch, dt_to_epoch
+from basalt.core.profiling import profiled
 
 from multiprocessing.connection import Client
 from appdirs import user_cache_dir, user_config_dir
@@ -46,29 +48,30 @@ def assert_valid_config_edit(path: str, value) -> None:
     if len(parts) != 1:
         raise ValueError(f"Invalid config edit path: {path}")
 
+    if key in CONFIG_CHOICES:
+        choice = value.lower() if key == "provider" and isinstance(value, str) else value
+        if choice not in CONFIG_CHOICES[key]:
+            raise ValueError(f"Invalid value for {key}: {value!r} (expected one of {CONFIG_CHOICES[key]})")
+    elif key in NULLABLE_STRINGS:
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"Invalid config value type for {key}: {value, type(value)}")
     elif not isinstance(value, type(default[key])):
         raise ValueError(f"Invalid config value type for {key}: {value, type(value)}")
 
 def assert_valid_folder_edit(folder_id: int, edit_path: str, new_value) -> None:
-    with FlashcardDB(db_path()) as db:
+    with get_session().database() as db:
         db.get_folder(folder_id)
     parts = edit_path.split(".")
     if parts[0] == "parent_id" and len(parts) == 1:
         if not isinstance(new_value, int):
             raise ValueError("parent_id must be an integer")
-        with FlashcardDB(db_path()) as db:
+        with get_session().database() as db:
             try:
                 db.get_folder(new_value)
             except Exception:
                 raise ValueError(f"Parent folder not found: {new_value}")
             # ensure no cycles
-            tree = db.get_folder_tree(folder_id)
-            def collect_ids(t):
-                ids = [t["id"]]
-                for c in t["children"]:
-                    ids.extend(collect_ids(c))
-                return ids
-            if new_value in collect_ids(tree):
+            if new_value in db.get_subtree_ids(folder_id):
                 raise ValueError("Cannot set parent_id to a descendant (cycle)")
         return
     if parts[0] == "name" and len(parts) == 1:
@@ -94,17 +97,19 @@ def assert_valid_flashcard_edit(card_id: int, edit_path: str, new_value) -> None
 
 #==== USABLE INSIDE OF CUSTOM HOTKEY COMMANDS ======
 
+@profiled
 def set_config(path: str, value):
     assert_valid_config_edit(path, value)
     base_set_config(path, value)
 
+@profiled
 def set_folder(folder_id: int, edit_path: str, new_value):
     assert_valid_folder_edit(folder_id, edit_path, new_value)
-    with FlashcardDB(db_path()) as db:
+    with get_session().database() as db:
         if edit_path == "name":
             db.update_folder_fields(folder_id, {"name": new_value})
         elif edit_path == "parent_id":
-            db.update_folder_fields(folder_id, {"parent_id": new_value})
+            db.move_folder(folder_id, new_value)
         else:
             folder = db.get_folder(folder_id)
             settings = folder["folder_settings"]
@@ -115,9 +120,10 @@ def set_folder(folder_id: int, edit_path: str, new_value):
             node[parts[-1]] = new_value
             db.update_folder_fields(folder_id, {"folder_settings": settings})
 
+@profiled
 def set_flashcard(flashcard_id: int, edit_path: str, new_value):
     assert_valid_flashcard_edit(flashcard_id, edit_path, new_value)
-    with FlashcardDB(db_path()) as db:
+    with get_session().database() as db:
         if edit_path in ("question", "answer", "folder_id"):
             db.update_flashcard_fields(flashcard_id, {edit_path: new_value})
         else:
@@ -127,19 +133,20 @@ def set_flashcard(flashcard_id: int, edit_path: str, new_value):
             other[key] = new_value
             db.update_flashcard_fields(flashcard_id, {"other_data": other})
 
-def set(target: str, identifier: str, edit_path_or_new_value: str, new_value):
+@profiled
+def set(target: str, identifier: str, edit_path_or_new_value, new_value=None):
     """
     Generic setter for 'config', 'folder', or 'card'.
-    - For 'config': identifier is the config path, e.g. "custom_commands.d".
+    - For 'config': identifier is the config path, e.g. "custom_commands.d", and the next argument the value.
     - For 'folder': identifier is the folder name; for parent_id edits, new_value is the parent folder name.
     - For 'card': identifier is the card ID (string or int).
     """
     target = target.lower()
     if target == "config":
-        set_config(identifier, new_value)
+        set_config(identifier, edit_path_or_new_value if new_value is None else new_value)
 
     elif target == "folder":
-        with FlashcardDB(db_path()) as db:
+        with get_session().database() as db:
             if edit_path_or_new_value == "parent":
                 new_value = db.get_folder_id_from_name(new_value)
                 edit_path_or_new_value = "parent_id"
@@ -153,15 +160,16 @@ def set(target: str, identifier: str, edit_path_or_new_value: str, new_value):
     else:
         raise ValueError(f"Unknown target: {target}")
 
+@profiled
 def review_flashcard(flashcard_id, score:int): #to avoid double-reviewing at start, call after every flashcard init with score=5. 
-    with FlashcardDB(db_path()) as database:
+    with get_session().database() as database:
         flashcard = database.get_card(flashcard_id)
         if flashcard: 
 
             rep_settings = database.get_folder_settings(flashcard["folder_id"])
             history = flashcard["rep_data"]["history"]
             now = now_dt()
-            history.append((score, dt_to_sql_timestamp(now)))
+            history.append((score, dt_to_epoch(now)))
             database.update_flashcard_fields(flashcard_id, {"rep_data": flashcard["rep_data"]})
             #rep_data has been mutated
             
@@ -169,15 +177,88 @@ def review_flashcard(flashcard_id, score:int): #to avoid double-reviewing at sta
                 sm2_settings = rep_settings["sm2_settings"]
                 interval = get_interval_sm2(history, sm2_settings) #in hours
                 next_due = now + datetime.timedelta(hours=interval)
-                sql_next_due = dt_to_sql_timestamp(next_due)
-                database.update_flashcard_fields(flashcard_id, {"next_due": sql_next_due})
+                database.update_flashcard_fields(flashcard_id, {"next_due": dt_to_epoch(next_due)})
             else:
                 raise NotImplementedError(f"Other spaced repetition algorithm {rep_settings["algorithm"]} not supported yet!")
 
         else:
             raise ValueError(f"Missing flashcard requested to update: id {flashcard_id}")
 
-def capture(input=None, file_path_or_url=None, **user_inputs): #user_inputs is where custom LLM prompts get put
+#==== LISTING, CREATING AND THE INBOX (called by the CLI through rpc) ======
+
+@profiled
+def list_cards():
+    with get_session().database() as db:
+        return db.get_all_cards()
+
+@profiled
+def get_card(card_id: int):
+    with get_session().database() as db:
+        return db.get_card(int(card_id))
+
+@profiled
+def folder_tree(root=None):
+    """Folder tree from `root` (id or name; default the root folder)."""
+    with get_session().database() as db:
+        root_id = ROOT_FOLDER_DEFAULTS["id"]
+        if root:
+            if isinstance(root, int) or (isinstance(root, str) and root.isdigit()):
+                root_id = int(root)
+            else:
+                root_id = db.get_folder_id_from_name(root)
+        return db.get_folder_tree(root_id)
+
+@profiled
+def make_card(card: dict) -> int:
+    with get_session().database() as db:
+        batch_id = db.create_batch("")  # trivial batch for singles
+        return db.create_flashcard(card, batch_id)
+
+@profiled
+def make_folder(name: str, parent=None) -> int:
+    """New folder under `parent` (id or name; default the root folder)."""
+    with get_session().database() as db:
+        if parent is None:
+            parent_id = ROOT_FOLDER_DEFAULTS["id"]
+        elif str(parent).isdigit():
+            parent_id = int(parent)
+            db.get_folder(parent_id)
+        else:
+            parent_id = db.get_folder_id_from_name(parent)
+        folder_id = db.create_folder(name)
+        db.update_folder_fields(folder_id, {"parent_id": parent_id})
+        return folder_id
+
+@profiled
+def next_due_card():
+    """{"card", "folder" (name), "remaining"} for the most overdue card, or None when nothing is due."""
+    with get_session().database() as db:
+        now = now_epoch()
+        card = db.get_most_overdue_card(now)
+        if card is None:
+            return None
+        return {"card": card, "folder": db.get_folder(card["folder_id"])["name"],
+                "remaining": db.get_due_count(now) - 1}
+
+@profiled
+def delete_flashcard(flashcard_id: int):
+    with get_session().database() as db:
+        db.delete_flashcard(flashcard_id)
+
+@profiled
+def edit_flashcard(flashcard_id: int, field: str, value):
+    """Set question/answer, or any other field as an entry in other_data."""
+    set_flashcard(flashcard_id, field if field in ("question", "answer") else f"other_data.{field}", value)
+
+@profiled
+def move_flashcard(flashcard_id: int, folder_name: str):
+    with get_session().database() as db:
+        folder_id = db.get_folder_id_from_name(folder_name)
+        db.update_flashcard_fields(flashcard_id, {"folder_id": folder_id})
+
+@profiled
+def capture(input=None, file_path_or_url=None, fresh=False, **user_inputs): #user_inputs is where custom LLM prompts get put
+    #fresh=True bypasses the daemon's model response cache
 
     if input == "file":
         kind = "file"
@@ -202,13 +283,18 @@ def capture(input=None, file_path_or_url=None, **user_inputs): #user_inputs is w
     elif input == "url":
         kind = "url"
         if not file_path_or_url: 
-            raise ValueError("no file path provided")
-        else:
+            raise ValueError("no url or file of urls provided")
+        elif os.path.isfile(file_path_or_url):
+            # a file of urls, one per line; their transcripts are fetched concurrently
             try:
                 with open(file_path_or_url, "r", encoding="utf-8") as file:
-                    content = file.read()
+                    urls = [line.strip() for line in file
+                            if line.strip() and not line.lstrip().startswith("#")]
             except:
                 raise FileNotFoundError("file does not exist or cannot be read")
+        else:
+            urls = [file_path_or_url]
+        content = None
 
     else:
         content = input
@@ -220,7 +306,7 @@ def capture(input=None, file_path_or_url=None, **user_inputs): #user_inputs is w
         with Client(str(socket_path()), authkey=b"basalt") as c:
             c.send(job_dict)
 
-    configs = get_configs()
+    configs = get_session().configs()
     custom_commands = configs["custom_commands"]
 
     valid_inputs = {key: value for key, value in user_inputs.items() if key in custom_commands}
@@ -233,20 +319,40 @@ def capture(input=None, file_path_or_url=None, **user_inputs): #user_inputs is w
         {
          "kind" : kind,
          "content" : content,
+         "urls" : urls if kind == "url" else None,
          "user_inputs" : user_inputs, 
-         "configs": configs
+         "configs": configs,
+         "fresh" : fresh,
         }
     )
 
+@profiled
+def daemon_stats(fmt: str = "json"):
+    """Ask the running daemon for its metrics: a snapshot dict, or Prometheus text if fmt == "prometheus"."""
+    with Client(str(socket_path()), authkey=b"basalt") as c:
+        c.send({"kind": "stats", "format": fmt})
+        return c.recv()
+
+def send_metrics(records: list):
+    """
+    Add metrics recorded in another process to the running daemon's, so `basalt stats` shows them.
+    Each record is ("inc" | "observe", name, value, labels, buckets or None).
+    """
+    with Client(str(socket_path()), authkey=b"basalt") as c:
+        c.send({"kind": "metrics", "records": records})
+
 #all return whether or not something was removed
+@profiled
 def clear_db():
-    configs = get_configs()
-    db_path = os.path.join(configs["data_dir"], "flashcard_data.db")
+    session = get_session()
+    db_path = session.db_path()
+    session.reset()
     if os.path.exists(db_path):
         os.remove(db_path)
         return True
     return False
 
+@profiled
 def clear_cache():
     cache_path = user_cache_dir("basalt")
     if os.path.exists(cache_path):
@@ -254,6 +360,7 @@ def clear_cache():
         return True
     return False
 
+@profiled
 def clear_configs():
     config_dir = user_config_dir("basalt")
     if os.path.exists(config_dir):
@@ -3,14 +3,19 @@
 Listens on a UNIX-domain socket for flash‑card creation requests and hands the
 work off to a thread‑pool.  Terminates cleanly on SIGINT/SIGTERM.
 """
-import logging, os, signal, json
+import logging, os, signal, json, threading, time, hashlib
 from concurrent.futures import ThreadPoolExecutor
 from multiprocessing.connection import Listener
 from appdirs import user_cache_dir
 
-from basalt.core.api_calls import call_model, get_youtube_transcript
+from basalt.core.api_calls import call_model, stream_model, get_youtube_transcript, configure_sessions
 from basalt.core.database import FlashcardDB
-from basalt.core.config import db_path, socket_path
+from basalt.core.config import db_path, socket_path, get_config
+from basalt.core.card_stream import CardStreamParser
+from basalt.core.coalescer import CaptureCoalescer
+from basalt.core.metrics import Metrics, COUNT_BUCKETS, LATENCY_BUCKETS
+from basalt.core.disk_cache import DiskCache
+from basalt.core import profiling, rpc
 
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,7 @@ logging.basicConfig(
 )
 logger.setLevel(logging.INFO)
 
+metrics = Metrics()
 
 
 # ==== THREAD JOBS =======
@@ -34,14 +40,17 @@ def create_prompt(custom_prompt, custom_commands, user_inputs, **kwargs):
 
         Use clear, concise phrasing. Each fact should form its own flashcard. 
         Only output valid JSON; no other text. 
+        
+    """
 
+    if kwargs.get("folder_digest"):
+        system_prompt += f"""
+        Add an extra field called folder_id for each of the cards based on what folder you think is most relevant to the flashcard at hand. Here are the folders as "id: path (keywords)":
 
-        If and only if the user requests, add an extra field called folder_id for each of the cards based on what folder you think is most relevant to the flashcard at hand. Here are the folders and their respective IDs:
+        {format_folder_digest(kwargs["folder_digest"])}
 
-        {json.dumps(kwargs["folder_structure"], indent=2)}
+        If flashcard content does not fit exactly into any folder, put it in the ID of the root folder. 
 
-        If flashcard content does not fit exactly into any folder, put it in the ID of the root folder. Again, only add folder_id fields if the user specifically asks. 
-        
     """
 
     user_prompt = ""
@@ -53,48 +62,363 @@ def create_prompt(custom_prompt, custom_commands, user_inputs, **kwargs):
 
     for flag, input in user_inputs.items():
         user_prompt += " "
-        assert type(input) == str
-        if input == True:
+        if input is True:
             user_prompt += custom_commands[flag]
         else:
-            user_prompt += custom_commands[input].replace("{}", str(input))
+            user_prompt += custom_commands[flag].replace("{}", str(input))
 
     prompt = system_prompt + user_prompt
 
     return prompt
 
-
-def make_flashcard(content, user_inputs, configs):
+def format_folder_digest(digest):
+    lines = []
+    for folder in digest:
+        line = f"{folder['id']}: {folder['path']}"
+        if folder["keywords"]:
+            line += f" ({', '.join(folder['keywords'])})"
+        lines.append(line)
+    return "\n        ".join(lines)
+
+def wants_folder_ids(user_inputs, custom_commands):
+    """True if any of the user's flags asks the model to assign folder_ids."""
+    return any(
+        flag == "f" or "folder_id" in custom_commands.get(flag, "")
+        for flag in user_inputs
+    )
+
+_folder_digest_cache = {"signature": None, "digest": None}
+_folder_digest_lock = threading.Lock()
+
+def get_folder_digest(database):
+    """Folder digest for prompts, rebuilt only when the folders table changes."""
+    signature = database.get_folders_signature()
+    with _folder_digest_lock:
+        if _folder_digest_cache["signature"] != signature:
+            _folder_digest_cache["digest"] = database.get_folder_digest()
+            _folder_digest_cache["signature"] = signature
+        return _folder_digest_cache["digest"]
+
+def routes_locally(user_inputs, configs):
+    """True if folder_ids were asked for and the on-device classifier should assign them."""
+    return (wants_folder_ids(user_inputs, configs["custom_commands"])
+            and get_config(configs, "folder_routing") == "local")
+
+def _prompt_inputs(user_inputs, configs):
+    """The user's flags as sent to the model; folder flags are left out when folders are assigned locally."""
+    if not routes_locally(user_inputs, configs):
+        return user_inputs
+    return {flag: value for flag, value in user_inputs.items()
+            if not wants_folder_ids({flag: value}, configs["custom_commands"])}
+
+def _route_card(database, card):
+    card["folder_id"], _ = database.classify_folder(str(card.get("question", "")), str(card.get("answer", "")))
+    return card
+
+def _folder_digest_for(user_inputs, configs):
+    if not wants_folder_ids(user_inputs, configs["custom_commands"]) or routes_locally(user_inputs, configs):
+        return None
+    with FlashcardDB(db_path()) as database:
+        return get_folder_digest(database)
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache(configs):
+    """The on-disk model response cache, with limits taken from `configs` (None if disabled)."""
+    global _response_cache
+    if not get_config(configs, "response_cache"):
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = DiskCache(os.path.join(user_cache_dir("basalt"), "responses.db"), max_bytes=0)
+        _response_cache.max_bytes = get_config(configs, "response_cache_max_mb") * 1024 * 1024
+        _response_cache.ttl = get_config(configs, "response_cache_ttl_hours") * 3600
+    return _response_cache
+
+COALESCED_MAX_TOKENS = 8192 # 2048 per document up to this; most providers' output limit
+TRANSCRIPT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+TRANSCRIPT_PREFETCH_WORKERS = 4
+
+_transcript_cache = None
+
+def get_transcript_cache():
+    """Compressed on-disk cache of YouTube transcripts, keyed by video id."""
+    global _transcript_cache
+    with _response_cache_lock:
+        if _transcript_cache is None:
+            _transcript_cache = DiskCache(os.path.join(user_cache_dir("basalt"), "transcripts.db"),
+                                          max_bytes=TRANSCRIPT_CACHE_MAX_BYTES, compress=True)
+    return _transcript_cache
+
+def response_cache_key(prompt, content, configs, temperature=0.7):
+    raw = json.dumps([str(configs.get("provider")).lower(), configs.get("model"), prompt, content, temperature])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _capture_prompt(user_inputs, configs):
+    """(prompt for a single capture, whether its cards are routed locally)."""
+    folder_digest = _folder_digest_for(user_inputs, configs)
+    prompt = create_prompt(configs["custom_prompt"], configs["custom_commands"], _prompt_inputs(user_inputs, configs),
+                           folder_digest=folder_digest)
+    return prompt, routes_locally(user_inputs, configs)
+
+def cached_response(content, user_inputs, configs):
+    """The cached model response for `content` captured on its own, or None."""
+    cache = get_response_cache(configs)
+    if not cache:
+        return None
+    prompt, _ = _capture_prompt(user_inputs, configs)
+    return cache.get(response_cache_key(prompt, content, configs))
+
+def make_flashcard(content, user_inputs, configs, fresh=False, text_resp=None):
+    """`text_resp`: a cached response the caller already looked up."""
 
     logger.debug("make_flashcard called")
 
     if not content or not configs:
         raise ValueError(f"No {"configs" if not configs else "content"} passed to make_flashcard! (this should never happen)")
 
-    with FlashcardDB(db_path()) as database:
-        folder_structure = database.get_folder_tree()
+    prompt, route = _capture_prompt(user_inputs, configs)
 
-    prompt = create_prompt(configs["custom_prompt"], configs["custom_commands"], user_inputs, folder_structure=folder_structure)
+    cache = get_response_cache(configs)
+    cache_key = response_cache_key(prompt, content, configs)
+    if text_resp is None and cache and not fresh:
+        text_resp = cache.get(cache_key)
 
-    text_resp = call_model(prompt, content, configs)
+    if text_resp is None and get_config(configs, "stream"):
+        return _stream_flashcards(prompt, content, configs, cache, cache_key, route)
 
+    cached = text_resp is not None
+    if cached:
+        logger.info("reusing cached model response")
+    else:
+        text_resp = _call_model(prompt, content, configs)
 
-    start, end = text_resp.find('['), text_resp.rfind(']')
-    if start == -1 or end == -1:
-        raise ValueError("Not wrapped correctly in square brackets")
-    
-    flashcards = json.loads(text_resp[start : end + 1])
-
+    flashcards, complete = _parse_flashcards(text_resp)
+    if cache and complete and not cached:
+        cache.set(cache_key, text_resp)
 
     with FlashcardDB(db_path()) as database:
-        logger.debug("storing batch from core")
-        database.store_batch(flashcards, content)
+        if route:
+            with metrics.timer("stage_seconds", stage="folder_routing"):
+                flashcards = [_route_card(database, card) for card in flashcards]
+        with metrics.timer("stage_seconds", stage="db_store"):
+            logger.debug("storing batch from core")
+            database.store_batch(flashcards, content, *_dedupe_args(configs))
+    metrics.observe("cards_per_job", len(flashcards), buckets=COUNT_BUCKETS)
     
     logger.debug("make_flashcard finished from core")
 
-def _transcribe_then_flashcard(url, user_inputs, configs):
-    text = get_youtube_transcript(url)
-    make_flashcard(text, user_inputs, configs)
+def make_flashcards_coalesced(contents, user_inputs, configs):
+    """
+    One model call for several small captures. Each document is numbered in
+    the request, the model tags every card with its "source" number, and the
+    cards are split back into one batch per capture.
+    """
+
+    if len(contents) == 1:
+        return make_flashcard(contents[0], user_inputs, configs)
+
+    logger.debug("make_flashcards_coalesced called with %d documents", len(contents))
+
+    single_prompt, route = _capture_prompt(user_inputs, configs)
+    prompt = single_prompt + f"""
+
+        The text contains {len(contents)} separate documents, each introduced by a line of the form "=== DOCUMENT k ===". Generate flashcards for each document independently, following the instructions above, and add an integer "source" field to every flashcard holding the number k of the document it came from.
+    """
+
+    combined = "\n\n".join(f"=== DOCUMENT {i} ===\n{c}" for i, c in enumerate(contents, start=1))
+    text_resp = _call_model(prompt, combined, configs,
+                            max_tokens=min(2048 * len(contents), COALESCED_MAX_TOKENS))
+
+    flashcards, complete = _parse_flashcards(text_resp)
+    per_source = [[] for _ in contents]
+    for card in flashcards:
+        source = card.pop("source", None)
+        if not isinstance(source, int) or not 1 <= source <= len(contents):
+            logger.warning("dropping coalesced card with invalid source: %r", source)
+            continue
+        per_source[source - 1].append(card)
+
+    # each capture's cards are its answer on its own too: cache them under that request,
+    # so capturing the same text again is a cache hit whether or not it gets coalesced
+    cache = get_response_cache(configs)
+    if cache and complete:
+        for content, flashcards in zip(contents, per_source):
+            if flashcards:
+                cache.set(response_cache_key(single_prompt, content, configs), json.dumps(flashcards))
+
+    with FlashcardDB(db_path()) as database:
+        if route:
+            with metrics.timer("stage_seconds", stage="folder_routing"):
+                per_source = [[_route_card(database, card) for card in cards] for cards in per_source]
+        with metrics.timer("stage_seconds", stage="db_store"):
+            for content, flashcards in zip(contents, per_source):
+                database.store_batch(flashcards, content, *_dedupe_args(configs))
+    for flashcards in per_source:
+        metrics.observe("cards_per_job", len(flashcards), buckets=COUNT_BUCKETS)
+
+    logger.debug("make_flashcards_coalesced finished")
+
+def _call_model(prompt, content, configs, **kwargs):
+    """call_model plus latency, error-rate and token accounting."""
+    provider = str(configs.get("provider")).lower()
+    usage = {}
+    metrics.inc("provider_requests_total", provider=provider)
+    try:
+        with metrics.timer("stage_seconds", stage="model_call"):
+            text_resp = call_model(prompt, content, configs, usage=usage, **kwargs)
+    except Exception:
+        metrics.inc("provider_errors_total", provider=provider)
+        raise
+    metrics.inc("prompt_tokens_total", usage.get("prompt_tokens", 0), provider=provider)
+    metrics.inc("completion_tokens_total", usage.get("completion_tokens", 0), provider=provider)
+    return text_resp
+
+def _stream_flashcards(prompt, content, configs, cache=None, cache_key=None, route=False):
+    """
+    Streaming variant of the model call + parse + store steps of make_flashcard:
+    each card is stored as soon as its JSON object is complete. If the provider's
+    stream breaks off (RuntimeError from stream_model) after some cards were
+    stored, those cards are kept and the rest is dropped. Any other failure, a
+    failure before the first card, or a reply without a JSON array deletes the
+    batch and raises. Only a complete response is written to `cache`. `route`
+    files cards locally.
+    """
+    provider = str(configs.get("provider")).lower()
+    usage = {}
+    pieces = []
+    parser = CardStreamParser()
+    stored = 0
+    start = time.perf_counter()
+    metrics.inc("provider_requests_total", provider=provider)
+
+    dedupe, threshold = _dedupe_args(configs)
+
+    with FlashcardDB(db_path()) as database:
+        batch_id = database.create_batch(content)
+        waiting = 0.0  # time spent waiting on the provider, without the per-card db work
+        broken_off = False
+        try:
+            stream = iter(stream_model(prompt, content, configs, usage=usage))
+            while True:
+                wait_start = time.perf_counter()
+                try:
+                    text = next(stream, None)
+                except Exception as exc:
+                    metrics.inc("provider_errors_total", provider=provider)
+                    broken_off = isinstance(exc, RuntimeError)
+                    raise
+                finally:
+                    waiting += time.perf_counter() - wait_start
+                if text is None:
+                    break
+                pieces.append(text)
+                for card in parser.feed(text):
+                    if route:
+                        with metrics.timer("stage_seconds", stage="folder_routing"):
+                            _route_card(database, card)
+                    with metrics.timer("stage_seconds", stage="db_store"):
+                        card = database.dedupe_card(card, dedupe, threshold)
+                        if card is None:
+                            continue
+                        database.create_flashcard(card, batch_id)
+                    if not stored:
+                        metrics.observe("first_card_seconds", time.perf_counter() - start)
+                    stored += 1
+        except Exception:
+            if not (stored and broken_off):
+                database.delete_batch(batch_id)
+                raise
+            logger.exception("stream failed; kept %d complete cards", stored)
+        finally:
+            metrics.observe("stage_seconds", waiting, stage="model_call")
+
+        if not parser.started:
+            database.delete_batch(batch_id)
+            raise ValueError("Not wrapped correctly in square brackets")
+
+        if parser.truncated:
+            logger.warning("model response was truncated; kept %d complete cards", stored)
+        elif cache:
+            cache.set(cache_key, "".join(pieces))
+
+    metrics.inc("prompt_tokens_total", usage.get("prompt_tokens", 0), provider=provider)
+    metrics.inc("completion_tokens_total", usage.get("completion_tokens", 0), provider=provider)
+    metrics.observe("cards_per_job", stored, buckets=COUNT_BUCKETS)
+
+def _dedupe_args(configs):
+    """(mode, threshold) for FlashcardDB.store_batch / dedupe_card."""
+    return get_config(configs, "dedupe"), get_config(configs, "dedupe_threshold") / 100
+
+def _parse_flashcards(text_resp):
+    """
+    (cards, complete) from a model response. A response cut off at max_tokens
+    still yields every card object that was closed; `complete` is False then.
+    """
+    with metrics.timer("stage_seconds", stage="parse"):
+        parser = CardStreamParser()
+        flashcards = parser.feed(text_resp)
+        if not parser.started:
+            raise ValueError("Not wrapped correctly in square brackets")
+        if parser.truncated:
+            logger.warning("model response was cut off; keeping the %d complete cards", len(flashcards))
+        return flashcards, not parser.truncated
+
+def _fetch_transcript(url):
+    with metrics.timer("stage_seconds", stage="transcript_fetch"):
+        return get_youtube_transcript(url, cache=get_transcript_cache())
+
+def _run_job(fn, *args):
+    metrics.add_gauge("jobs_queued", -1)
+    metrics.add_gauge("jobs_in_flight", 1)
+    try:
+        with metrics.timer("job_seconds"):
+            return fn(*args)
+    finally:
+        metrics.add_gauge("jobs_in_flight", -1)
+
+def _serve_rpc(conn, request):
+    """Run a core command for a client (see rpc.py) and reply on its connection."""
+    command = request.get("command") if request.get("command") in rpc.COMMANDS else "unknown"
+    try:
+        with metrics.timer("rpc_seconds", command=command):
+            reply = rpc.execute(request)
+        if not reply["ok"]:
+            metrics.inc("rpc_errors_total", command=command)
+        conn.send(reply)
+    except Exception:
+        logger.exception("rpc reply failed")
+    finally:
+        conn.close()
+
+def apply_client_metrics(records):
+    """Record metrics sent by a client process (see core_commands.send_metrics)."""
+    for method, name, value, labels, buckets in records:
+        if method == "inc":
+            metrics.inc(name, value, **labels)
+        elif method == "observe":
+            metrics.observe(name, value, buckets=tuple(buckets) if buckets else LATENCY_BUCKETS, **labels)
+        else:
+            raise ValueError(f"unknown metric record: {method}")
+
+def stats_reply(fmt=None):
+    """What `basalt stats` gets back: a snapshot dict with cache stats, or Prometheus text if fmt == "prometheus"."""
+    if fmt == "prometheus":
+        text = metrics.to_prometheus()
+        if profiling.ENABLED:
+            text += profiling.profiler.to_prometheus(prefix="basalt_profile_")
+        return text
+    snapshot = metrics.snapshot()
+    snapshot["caches"] = {}
+    if _response_cache is not None:
+        snapshot["caches"]["responses"] = _response_cache.stats()
+    if _transcript_cache is not None:
+        snapshot["caches"]["transcripts"] = _transcript_cache.stats()
+    if profiling.ENABLED:
+        snapshot["profile"] = profiling.profiler.snapshot()
+    return snapshot
 
 # =========== (thread jobs ^) ======== 
 
@@ -109,11 +433,52 @@ def start_daemon(max_workers: int = 10) -> None:
         os.remove(path)
     
     executor = ThreadPoolExecutor(max_workers=max_workers)
+    # client commands run one at a time on one thread, which keeps its session's
+    # connection (and prepared statements) warm; they never wait behind model calls
+    rpc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rpc")
+    configure_sessions(max_workers)
     srv = Listener(str(path), authkey=b"basalt")
 
+    def _on_done(fut):
+        if fut.exception():
+            metrics.inc("jobs_total", status="failed")
+            logger.exception("job failed", exc_info=fut.exception())
+        else:
+            metrics.inc("jobs_total", status="ok")
+            logger.info("job finished")
+
+    def _submit(fn, *args):
+        metrics.add_gauge("jobs_queued", 1)
+        fut = executor.submit(_run_job, fn, *args)
+        fut.add_done_callback(_on_done)
+
+    coalescer = CaptureCoalescer(lambda *args: _submit(make_flashcards_coalesced, *args))
+
+    # transcripts for a list of urls are fetched concurrently on their own pool;
+    # each one is queued for the model as soon as it arrives
+    prefetcher = ThreadPoolExecutor(max_workers=TRANSCRIPT_PREFETCH_WORKERS)
+
+    def _on_transcript(fut, url, user_inputs, configs, fresh):
+        metrics.add_gauge("transcripts_pending", -1)
+        if fut.exception():
+            metrics.inc("jobs_total", status="failed")
+            logger.error("transcript fetch failed for %s: %s", url, fut.exception())
+        else:
+            _submit(make_flashcard, fut.result(), user_inputs, configs, fresh)
+
+    def _submit_urls(urls, user_inputs, configs, fresh):
+        for url in urls:
+            metrics.add_gauge("transcripts_pending", 1)
+            prefetcher.submit(_fetch_transcript, url).add_done_callback(
+                lambda f, url=url: _on_transcript(f, url, user_inputs, configs, fresh)
+            )
+
     def _stop(*_):
         logger.info("Force shutdown requested")
         srv.close()
+        coalescer.flush_all()
+        prefetcher.shutdown(wait=False)
+        rpc_executor.shutdown(wait=False)
         executor.shutdown(wait=False)
 
     signal.signal(signal.SIGINT, _stop)
@@ -133,32 +498,59 @@ def start_daemon(max_workers: int = 10) -> None:
             try:
                 data = conn.recv()
 
-                # === job submit handling === 
+                # === stats requests ===
                 kind = data.get("kind")
+                if kind == "stats":
+                    conn.send(stats_reply(data.get("format")))
+                    continue
+
+                # === metrics from other processes (the hotkey listener) ===
+                if kind == "metrics":
+                    apply_client_metrics(data["records"])
+                    continue
+
+                # === commands from the CLI / hotkeys ===
+                if kind == "rpc":
+                    rpc_executor.submit(_serve_rpc, conn, data)
+                    conn = None  # _serve_rpc replies and closes it
+                    continue
+
+                # === job submit handling === 
                 if kind == "url":
-                    fut = executor.submit(
-                        _transcribe_then_flashcard,
-                        data["url"],
+                    _submit_urls(
+                        data.get("urls") or [data["url"]],
                         data["user_inputs"],
                         data["configs"],
+                        data.get("fresh", False),
                     )
                 else:
-                    fut = executor.submit(
-                        make_flashcard,
-                        data["content"],
-                        data["user_inputs"],
-                        data["configs"],
-                    )
-
-                fut.add_done_callback(
-                    lambda f: logger.exception("job failed", exc_info=f.exception())
-                    if f.exception()
-                    else logger.info("job finished"),
-                )
+                    # a --fresh capture, or one already answered by the response cache, isn't coalesced
+                    cached = None
+                    coalesce = CaptureCoalescer.accepts(data["content"], data["configs"]) and not data.get("fresh")
+                    if coalesce:
+                        cached = cached_response(data["content"], data["user_inputs"], data["configs"])
+                    if coalesce and cached is None:
+                        coalescer.add(
+                            data["content"],
+                            data["user_inputs"],
+                            data["configs"],
+                        )
+                    else:
+                        _submit(
+                            make_flashcard,
+                            data["content"],
+                            data["user_inputs"],
+                            data["configs"],
+                            data.get("fresh", False),
+                            cached,
+                        )
                 # === job submit handling ^^^ === 
 
             except Exception:
                 logger.exception("invalid client payload")
+            finally:
+                if conn is not None:
+                    conn.close()
     finally:
         logger.info("daemon exiting")
         srv.close()
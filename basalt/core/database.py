@@ -1,4 +1,7 @@
-import sqlite3, json, os, threading
+import sqlite3, json, os, threading, re, hashlib, functools, time, zlib
+from collections import Counter
+from basalt.core import profiling, sql_trace, similarity, folder_classifier, rep_codec
+from basalt.core.datetime_utils import now_epoch
 db_lock = threading.RLock()
 
 def make_default_rep_data():
@@ -7,9 +10,24 @@ def make_default_rep_data():
     }
 
 def thread_safe(fn):
+    if not profiling.ENABLED:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with db_lock:
+                return fn(*args, **kwargs)
+        return wrapper
+
+    # profiling: split time waiting for db_lock from time holding it
+    name = fn.__qualname__
+    @functools.wraps(fn)
     def wrapper(*args, **kwargs):
+        start = time.perf_counter()
         with db_lock:
-            return fn(*args, **kwargs)
+            acquired = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiling.record_lock(name, acquired - start, time.perf_counter() - acquired)
     return wrapper
 
 DEFAULT_FOLDER_SETTINGS = {
@@ -46,6 +64,9 @@ def row_to_dict(row):
     d = dict(row)
     required_json_cols = {"other_data", "rep_data", "folder_settings"}
     for k, v in list(d.items()):
+        if k == "rep_data" and isinstance(v, bytes):
+            d[k] = rep_codec.decode(v)
+            continue
         if v is None or not isinstance(v, str):
             continue
         if v.startswith("{") or v.startswith("["):
@@ -80,7 +101,7 @@ def init_schema(conn: sqlite3.Connection):
         other_data      JSON,
 
         rep_data      JSON,
-        next_due      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        next_due      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,    -- integer epoch seconds from migration 5 on
         created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
         FOREIGN KEY (folder_id) REFERENCES folders(id) ON DELETE SET NULL
@@ -112,6 +133,296 @@ def init_schema(conn: sqlite3.Connection):
     END;
     """)
     conn.commit()
+    migrate(conn)
+
+
+# =========== Migrations ================
+# Schema changes after the original tables. Each entry upgrades PRAGMA
+# user_version by one; a fresh database runs all of them. Never edit a
+# released migration; append a new one.
+
+_FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+_MIGRATION_SEARCH_INDEX = f"""
+CREATE VIRTUAL TABLE cards_fts USING fts5(
+    question, answer, other_data,
+    content='flashcards', content_rowid='id', tokenize='{_FTS_TOKENIZER}'
+);
+CREATE VIRTUAL TABLE batches_fts USING fts5(
+    source_text,
+    content='batches', content_rowid='id', tokenize='{_FTS_TOKENIZER}'
+);
+
+CREATE TRIGGER cards_fts_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO cards_fts(rowid, question, answer, other_data)
+    VALUES (new.id, new.question, new.answer, new.other_data);
+END;
+CREATE TRIGGER cards_fts_delete AFTER DELETE ON flashcards BEGIN
+    INSERT INTO cards_fts(cards_fts, rowid, question, answer, other_data)
+    VALUES ('delete', old.id, old.question, old.answer, old.other_data);
+END;
+CREATE TRIGGER cards_fts_update AFTER UPDATE OF question, answer, other_data ON flashcards BEGIN
+    INSERT INTO cards_fts(cards_fts, rowid, question, answer, other_data)
+    VALUES ('delete', old.id, old.question, old.answer, old.other_data);
+    INSERT INTO cards_fts(rowid, question, answer, other_data)
+    VALUES (new.id, new.question, new.answer, new.other_data);
+END;
+
+CREATE TRIGGER batches_fts_insert AFTER INSERT ON batches BEGIN
+    INSERT INTO batches_fts(rowid, source_text) VALUES (new.id, new.source_text);
+END;
+CREATE TRIGGER batches_fts_delete AFTER DELETE ON batches BEGIN
+    INSERT INTO batches_fts(batches_fts, rowid, source_text) VALUES ('delete', old.id, old.source_text);
+END;
+CREATE TRIGGER batches_fts_update AFTER UPDATE OF source_text ON batches BEGIN
+    INSERT INTO batches_fts(batches_fts, rowid, source_text) VALUES ('delete', old.id, old.source_text);
+    INSERT INTO batches_fts(rowid, source_text) VALUES (new.id, new.source_text);
+END;
+
+-- source matches join back to cards by batch; subtree filters by folder
+CREATE INDEX IF NOT EXISTS flashcards_batch_id ON flashcards(batch_id);
+CREATE INDEX IF NOT EXISTS flashcards_folder_id ON flashcards(folder_id);
+
+-- question matches weigh most, then answer, then other_data
+INSERT INTO cards_fts(cards_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)');
+
+INSERT INTO cards_fts(cards_fts) VALUES ('rebuild');
+INSERT INTO batches_fts(batches_fts) VALUES ('rebuild');
+"""
+
+_MIGRATION_SIMILARITY_INDEX = """
+CREATE TABLE card_signatures (
+    card_id    INTEGER PRIMARY KEY,
+    signature  BLOB NOT NULL
+);
+CREATE TABLE card_minhash (
+    band     INTEGER NOT NULL,
+    bucket   INTEGER NOT NULL,
+    card_id  INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, card_id)
+) WITHOUT ROWID;
+CREATE INDEX card_minhash_card_id ON card_minhash(card_id);
+
+-- signatures are computed in Python; the triggers only drop stale ones
+CREATE TRIGGER card_signatures_delete AFTER DELETE ON flashcards BEGIN
+    DELETE FROM card_signatures WHERE card_id = old.id;
+    DELETE FROM card_minhash WHERE card_id = old.id;
+END;
+CREATE TRIGGER card_signatures_update AFTER UPDATE OF question, answer ON flashcards BEGIN
+    DELETE FROM card_signatures WHERE card_id = old.id;
+    DELETE FROM card_minhash WHERE card_id = old.id;
+END;
+"""
+
+def _run_statements(conn: sqlite3.Connection, script: str):
+    """Execute a multi-statement script inside the current transaction (unlike executescript)."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+def _migrate_similarity_index(conn: sqlite3.Connection):
+    _run_statements(conn, _MIGRATION_SIMILARITY_INDEX)
+    index_missing_signatures(conn)
+
+_MIGRATION_FOLDER_TERMS = """
+CREATE TABLE folder_terms (
+    term       TEXT NOT NULL,
+    folder_id  INTEGER NOT NULL,
+    n          INTEGER NOT NULL,
+    PRIMARY KEY (term, folder_id)
+) WITHOUT ROWID;
+CREATE INDEX folder_terms_folder_id ON folder_terms(folder_id);
+CREATE TABLE folder_term_totals (
+    folder_id  INTEGER PRIMARY KEY,
+    cards      INTEGER NOT NULL,
+    terms      INTEGER NOT NULL,
+    sumsq      INTEGER NOT NULL DEFAULT 0    -- squared norm of the folder's term counts
+);
+CREATE TRIGGER folder_terms_folder_delete AFTER DELETE ON folders BEGIN
+    DELETE FROM folder_terms WHERE folder_id = old.id;
+    DELETE FROM folder_term_totals WHERE folder_id = old.id;
+END;
+
+CREATE TRIGGER folder_terms_insert AFTER INSERT ON folder_terms BEGIN
+    UPDATE folder_term_totals SET sumsq = sumsq + new.n * new.n WHERE folder_id = new.folder_id;
+END;
+CREATE TRIGGER folder_terms_update AFTER UPDATE OF n ON folder_terms BEGIN
+    UPDATE folder_term_totals SET sumsq = sumsq + new.n * new.n - old.n * old.n WHERE folder_id = new.folder_id;
+END;
+CREATE TRIGGER folder_terms_delete AFTER DELETE ON folder_terms BEGIN
+    UPDATE folder_term_totals SET sumsq = sumsq - old.n * old.n WHERE folder_id = old.folder_id;
+END;
+"""
+
+def _migrate_folder_terms(conn: sqlite3.Connection):
+    _run_statements(conn, _MIGRATION_FOLDER_TERMS)
+    rebuild_folder_terms(conn)
+
+_MIGRATION_FOLDER_PARENT_INDEX = """
+-- subtree queries walk parent -> children; deleting a folder checks its children's foreign key
+CREATE INDEX IF NOT EXISTS folders_parent_id ON folders(parent_id);
+"""
+
+_EPOCH_FLASHCARDS = """
+CREATE TABLE flashcards_epoch (
+    id         INTEGER PRIMARY KEY,
+    folder_id    INTEGER NOT NULL,
+    batch_id   INTEGER,
+
+    question   TEXT NOT NULL DEFAULT '',
+    answer     TEXT NOT NULL DEFAULT '',
+    other_data      JSON,
+
+    rep_data      JSON,
+    next_due      INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),    -- unix seconds, UTC
+    created_at    INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+
+    FOREIGN KEY (folder_id) REFERENCES folders(id) ON DELETE SET NULL
+);
+"""
+
+def _migrate_epoch_timestamps(conn: sqlite3.Connection):
+    """
+    Rebuild flashcards with next_due/created_at as integer epoch seconds.
+    SQLite can't change a column's type or default in place, so this is the
+    create-copy-drop-rename procedure; the table's indexes and triggers are
+    read back from sqlite_master first and recreated on the new table.
+    """
+    dependents = [r[0] for r in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'flashcards' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )]
+    conn.execute("PRAGMA defer_foreign_keys = ON")  # foreign_keys can't be switched off inside a transaction
+    conn.execute(_EPOCH_FLASHCARDS)
+    conn.execute("""
+        INSERT INTO flashcards_epoch (id, folder_id, batch_id, question, answer, other_data, rep_data, next_due, created_at)
+        SELECT id, folder_id, batch_id, question, answer, other_data, rep_data,
+               CAST(strftime('%s', next_due) AS INTEGER), CAST(strftime('%s', created_at) AS INTEGER)
+        FROM flashcards
+    """)
+    conn.execute("DROP TABLE flashcards")
+    conn.execute("ALTER TABLE flashcards_epoch RENAME TO flashcards")
+    for sql in dependents:
+        conn.execute(sql)
+    conn.execute("CREATE INDEX flashcards_next_due ON flashcards(next_due)")
+
+def _migrate_compact_rep_data(conn: sqlite3.Connection):
+    """Re-encode JSON rep_data as rep_codec BLOBs (rows that don't fit stay JSON)."""
+    if not rep_codec.ENABLED:
+        return
+    last_id = -1
+    while True:
+        rows = conn.execute(
+            "SELECT id, rep_data FROM flashcards WHERE id > ? AND typeof(rep_data) = 'text' ORDER BY id LIMIT 1000",
+            (last_id,),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for card_id, rep_data in rows:
+            try:
+                updates.append((rep_codec.encode(json.loads(rep_data)), card_id))
+            except json.JSONDecodeError:
+                pass  # left as is; row_to_dict reports it when the card is read
+        conn.executemany("UPDATE flashcards SET rep_data = ? WHERE id = ?", updates)
+        last_id = rows[-1][0]
+
+_MIGRATION_SOURCES = f"""
+-- one row per distinct source text, compressed; batches point at it
+CREATE TABLE sources (
+    id     INTEGER PRIMARY KEY,
+    hash   BLOB NOT NULL UNIQUE,    -- sha256 of the text
+    codec  TEXT NOT NULL,           -- 'zlib', or 'raw' when compressing doesn't pay
+    size   INTEGER NOT NULL,        -- uncompressed bytes (utf-8)
+    data   BLOB NOT NULL
+);
+ALTER TABLE batches ADD COLUMN source_id INTEGER REFERENCES sources(id);
+CREATE INDEX batches_source_id ON batches(source_id);
+
+-- the stored text is compressed, so the index can't read it back from a content
+-- table: it is contentless, fed and pruned from Python (store_source / _release_source)
+DROP TRIGGER batches_fts_insert;
+DROP TRIGGER batches_fts_delete;
+DROP TRIGGER batches_fts_update;
+DROP TABLE batches_fts;
+CREATE VIRTUAL TABLE sources_fts USING fts5(source_text, content='', tokenize='{_FTS_TOKENIZER}');
+"""
+
+def _migrate_sources(conn: sqlite3.Connection):
+    _run_statements(conn, _MIGRATION_SOURCES)
+    last_id = -1
+    while True:
+        rows = conn.execute(
+            "SELECT id, source_text FROM batches WHERE id > ? ORDER BY id LIMIT 1000", (last_id,)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany("UPDATE batches SET source_id = ? WHERE id = ?",
+                         [(store_source(conn, text), batch_id) for batch_id, text in rows])
+        last_id = rows[-1][0]
+    conn.execute("ALTER TABLE batches DROP COLUMN source_text")
+
+CHANGE_TRACKED_TABLES = ("folders", "flashcards", "batches")
+
+_CHANGE_TRIGGER = """
+CREATE TRIGGER {table}_changed_{op} AFTER {op} ON {table} BEGIN
+    UPDATE change_counters SET version = version + 1 WHERE name = '{table}';
+END;"""
+
+_MIGRATION_CHANGE_COUNTERS = """
+-- bumped on every row change, so pollers can tell what kind of thing changed (see changes_since)
+CREATE TABLE change_counters (
+    name     TEXT PRIMARY KEY,
+    version  INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+INSERT INTO change_counters (name) VALUES ('folders'), ('flashcards'), ('batches');
+""" + "".join(_CHANGE_TRIGGER.format(table=table, op=op)
+              for table in CHANGE_TRACKED_TABLES for op in ("insert", "update", "delete"))
+
+# entries are SQL scripts, or functions of the connection for migrations that need
+# Python; either way they run inside the migration's transaction
+MIGRATIONS = [
+    _MIGRATION_SEARCH_INDEX,        # 1: full-text search over cards and batch sources
+    _migrate_similarity_index,      # 2: MinHash/LSH index for near-duplicate cards
+    _migrate_folder_terms,          # 3: per-folder term counts for local folder routing
+    _MIGRATION_FOLDER_PARENT_INDEX, # 4: index for set-based subtree deletes and moves
+    _migrate_epoch_timestamps,      # 5: integer epoch next_due/created_at, indexed next_due
+    _migrate_compact_rep_data,      # 6: binary review histories
+    _migrate_sources,               # 7: compressed, deduplicated batch source text
+    _MIGRATION_CHANGE_COUNTERS,     # 8: per-table change counters for cheap polling
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection):
+    """Apply pending migrations, each in its own transaction."""
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{version} is newer than this version of basalt (v{SCHEMA_VERSION})")
+    while version < SCHEMA_VERSION:
+        target = version + 1
+        migration = MIGRATIONS[version]
+        try:
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            # re-read under the write lock: another process may have applied it while we waited
+            if get_schema_version(conn) < target:
+                if callable(migration):
+                    migration(conn)
+                else:
+                    _run_statements(conn, migration)
+                conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            # another process may have applied it first
+            if get_schema_version(conn) < target:
+                raise
+        version = get_schema_version(conn)
 
 
 # =========== Creators ================
@@ -126,7 +437,7 @@ def create_folder(conn: sqlite3.Connection, folder_name: str) -> int:
 
 def create_batch(conn: sqlite3.Connection, content: str) -> int:
     cur = conn.cursor()
-    cur.execute("INSERT INTO batches (source_text) VALUES (?)", (content,))
+    cur.execute("INSERT INTO batches (source_id) VALUES (?)", (store_source(conn, content),))
     conn.commit()
 
     assert cur.lastrowid is not None
@@ -140,12 +451,14 @@ def create_flashcard(conn: sqlite3.Connection, card: dict, batch_id: int):
     answer = card["answer"]
     folder_id = card.get("folder_id", ROOT_FOLDER_DEFAULTS['id'])
     other_data = json.dumps({k: v for k, v in card.items() if k not in ("question", "answer", "folder_id")})
-    rep_data = json.dumps(make_default_rep_data())
+    rep_data = rep_codec.encode(make_default_rep_data())
 
     cur.execute(
         "INSERT INTO flashcards (question, answer, other_data, rep_data, batch_id, folder_id) VALUES (?, ?, ?, ?, ?, ?)",
         (question, answer, other_data, rep_data, batch_id, folder_id)
     )
+    index_card_signature(conn, cur.lastrowid, question, answer)
+    count_folder_terms(conn, folder_id, question, answer)
     conn.commit()
 
     assert cur.lastrowid is not None
@@ -158,16 +471,28 @@ def update_flashcard_fields(conn: sqlite3.Connection, card_id: int, fields: dict
     # Serialize any dict or list values for JSON columns
     serialized_fields = {}
     for key, value in fields.items():
-        if isinstance(value, (dict, list)):
+        if key == "rep_data":
+            serialized_fields[key] = rep_codec.encode(value)
+        elif isinstance(value, (dict, list)):
             serialized_fields[key] = json.dumps(value)
         else:
             serialized_fields[key] = value
     fields = serialized_fields
     keys = ", ".join([f"{k} = ?" for k in fields])
     values = list(fields.values()) + [card_id]
+    indexed = {"question", "answer", "folder_id"} & fields.keys()
+    if indexed:
+        old = cur.execute("SELECT folder_id, question, answer FROM flashcards WHERE id = ?", (card_id,)).fetchone()
     cur.execute(f"UPDATE flashcards SET {keys} WHERE id = ?", values)
     if cur.rowcount == 0:
         raise ValueError(f"No flashcard with id {card_id} found to update")
+    if indexed:
+        folder_id, question, answer = cur.execute(
+            "SELECT folder_id, question, answer FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+        count_folder_terms(conn, old[0], old[1], old[2], -1)
+        count_folder_terms(conn, folder_id, question, answer)
+        if "question" in fields or "answer" in fields:
+            index_card_signature(conn, card_id, question, answer)
     conn.commit()
 
 def update_folder_fields(conn: sqlite3.Connection, folder_id: int, fields: dict):
@@ -183,31 +508,86 @@ def update_folder_fields(conn: sqlite3.Connection, folder_id: int, fields: dict)
 
 def delete_flashcard(conn: sqlite3.Connection, card_id: int):
     cur = conn.cursor()
+    old = cur.execute("SELECT folder_id, question, answer FROM flashcards WHERE id = ?", (card_id,)).fetchone()
     cur.execute("DELETE FROM flashcards WHERE id = ?", (card_id,))
     if cur.rowcount == 0:
         raise ValueError(f"No flashcard with id {card_id} found to delete")
+    count_folder_terms(conn, old[0], old[1], old[2], -1)
     conn.commit()
 
-def delete_folder(conn: sqlite3.Connection, folder_id: int, recursive: bool = False):
+def get_subtree_ids(conn: sqlite3.Connection, folder_id: int) -> list[int]:
+    """Ids of `folder_id` and all its descendants (empty if the folder does not exist)."""
+    return [r[0] for r in conn.execute("""
+        WITH RECURSIVE subtree(id) AS (
+            SELECT id FROM folders WHERE id = ?
+            UNION ALL
+            SELECT f.id FROM folders f JOIN subtree s ON f.parent_id = s.id
+        )
+        SELECT id FROM subtree
+    """, (folder_id,))]
+
+def delete_folder(conn: sqlite3.Connection, folder_id: int, recursive: bool = False,
+                  dry_run: bool = False) -> dict:
+    """
+    Delete a folder; with `recursive`, also every descendant folder and all their cards,
+    in one transaction. Returns {"folders": n, "cards": n} removed (or that would be, with `dry_run`).
+    """
+    if not dry_run and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")  # the subtree can't change between reading and deleting it
     cur = conn.cursor()
-    if recursive: 
-        cur.execute("DELETE FROM flashcards WHERE folder_id = ?", (folder_id,))
-        cur.execute("SELECT id FROM folders WHERE parent_id = ?", (folder_id,))
-        rows = cur.fetchall()
-        for child_id in rows:
-            delete_folder(conn, child_id[0], recursive=True)
-
-    cur.execute("DELETE FROM folders WHERE id = ?", (folder_id,))
-    if cur.rowcount == 0:
-        raise ValueError(f"No folder with id {folder_id} found to delete")
+    try:
+        if recursive:
+            ids = get_subtree_ids(conn, folder_id)
+        else:
+            ids = [r[0] for r in cur.execute("SELECT id FROM folders WHERE id = ?", (folder_id,))]
+        if not ids:
+            raise ValueError(f"No folder with id {folder_id} found to delete")
+        subtree = json.dumps(ids)
+        in_subtree = "IN (SELECT value FROM json_each(?))"
+        counts = {"folders": len(ids), "cards": 0}
+        if recursive:
+            counts["cards"] = cur.execute(f"SELECT COUNT(*) FROM flashcards WHERE folder_id {in_subtree}",
+                                          (subtree,)).fetchone()[0]
+        if dry_run:
+            return counts
+
+        if recursive:
+            cur.execute(f"DELETE FROM flashcards WHERE folder_id {in_subtree}", (subtree,))
+            # hang the descendants off the root first, so ON DELETE SET NULL never leaves
+            # a parentless folder mid-statement (the CHECK on parent_id would reject it)
+            cur.execute(f"UPDATE folders SET parent_id = ? WHERE id {in_subtree} AND id != ?",
+                        (ROOT_FOLDER_DEFAULTS["id"], subtree, folder_id))
+        cur.execute(f"DELETE FROM folders WHERE id {in_subtree}", (subtree,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return counts
+
+def move_folder(conn: sqlite3.Connection, folder_id: int, new_parent_id: int) -> int:
+    """Move a folder, with its whole subtree, under `new_parent_id`. Returns the number of folders moved."""
+    ids = get_subtree_ids(conn, folder_id)
+    if not ids:
+        raise ValueError(f"No folder with id {folder_id} found to move")
+    if conn.execute("SELECT 1 FROM folders WHERE id = ?", (new_parent_id,)).fetchone() is None:
+        raise ValueError(f"Parent folder not found: {new_parent_id}")
+    if new_parent_id in ids:
+        raise ValueError("Cannot set parent_id to a descendant (cycle)")
+    conn.execute("UPDATE folders SET parent_id = ? WHERE id = ?", (new_parent_id, folder_id))
     conn.commit()
+    return len(ids)
 
 def delete_batch(conn: sqlite3.Connection, batch_id: int):
     cur = conn.cursor()
+    for folder_id, question, answer in cur.execute(
+            "SELECT folder_id, question, answer FROM flashcards WHERE batch_id = ?", (batch_id,)).fetchall():
+        count_folder_terms(conn, folder_id, question, answer, -1)
     cur.execute("DELETE FROM flashcards WHERE batch_id = ?", (batch_id,))
+    source = cur.execute("SELECT source_id FROM batches WHERE id = ?", (batch_id,)).fetchone()
     cur.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
     if cur.rowcount == 0:
         raise ValueError(f"No batch with id {batch_id} found to delete")
+    _release_source(conn, source[0])
     conn.commit()
 
 # =========== Getters ================
@@ -266,13 +646,16 @@ def get_folder_settings(conn: sqlite3.Connection, folder_id: int):
     raise ValueError(f"No parent folder with settings found!")
 
 def get_batch(conn: sqlite3.Connection, batch_id: int):
+    """A batch with its source text (decompressed)."""
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
     cur.execute("SELECT * FROM batches WHERE id = ?", (batch_id,))
     row = cur.fetchone()
     if row is None:
         raise ValueError(f"No batch with id {batch_id} found")
-    return row_to_dict(row)
+    batch = row_to_dict(row)
+    batch["source_text"] = load_source(conn, batch["source_id"])
+    return batch
 
 def get_all_folders(conn: sqlite3.Connection):
 
@@ -290,9 +673,14 @@ def get_all_cards(conn: sqlite3.Connection):
     return [row_to_dict(r) for r in rows]
 
 def get_all_batches(conn: sqlite3.Connection):
+    """Batch listing without the source texts (see get_batch / load_source), with their size in bytes."""
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
-    cur.execute("SELECT * FROM batches ORDER BY id ASC")
+    cur.execute("""
+        SELECT b.*, s.size AS source_size
+        FROM batches b LEFT JOIN sources s ON s.id = b.source_id
+        ORDER BY b.id ASC
+    """)
     rows = cur.fetchall()
     return [row_to_dict(r) for r in rows]
 
@@ -321,15 +709,55 @@ def get_folder_id_from_name(conn: sqlite3.Connection, folder_name: str):
         raise ValueError(f"No folder named '{folder_name}' found")
     return row["id"]
 
+def get_due_count(conn: sqlite3.Connection, now: int | None = None) -> int:
+    now = now_epoch() if now is None else now
+    return conn.execute("SELECT COUNT(*) FROM flashcards WHERE next_due <= ?", (now,)).fetchone()[0]
+
+def get_next_due(conn: sqlite3.Connection, now: int | None = None) -> int | None:
+    """Earliest next_due still in the future (epoch seconds), i.e. when the due count next grows."""
+    now = now_epoch() if now is None else now
+    return conn.execute("SELECT MIN(next_due) FROM flashcards WHERE next_due > ?", (now,)).fetchone()[0]
+
+def get_most_overdue_card(conn: sqlite3.Connection, now: int | None = None) -> dict | None:
+    """The due card with the earliest next_due, or None; one index probe rather than loading every due card."""
+    now = now_epoch() if now is None else now
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(
+        "SELECT * FROM flashcards WHERE next_due <= ? ORDER BY next_due ASC, id ASC LIMIT 1", (now,)
+    ).fetchone()
+    return row_to_dict(row) if row else None
+
 def get_due_cards(conn: sqlite3.Connection):
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
     cur.execute(
-        "SELECT * FROM flashcards WHERE next_due IS NOT NULL AND next_due <= CURRENT_TIMESTAMP ORDER BY next_due ASC"
+        "SELECT * FROM flashcards WHERE next_due IS NOT NULL AND next_due <= ? ORDER BY next_due ASC",
+        (now_epoch(),),
     )
     rows = cur.fetchall()
     return [row_to_dict(r) for r in rows]
 
+# =========== Change detection ================
+
+def changes_since(conn: sqlite3.Connection, token: tuple | None = None) -> tuple[tuple, set[str]]:
+    """
+    (new token, names of CHANGE_TRACKED_TABLES changed since `token`); every table when `token` is None.
+
+    PRAGMA data_version moves when another connection commits and total_changes
+    when this one writes, so the idle case costs one pragma and no table reads.
+    Tokens are only comparable on the connection that issued them.
+    """
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    total_changes = conn.total_changes
+    if token is not None and token[0] == data_version and token[1] == total_changes:
+        return token, set()
+    counters = {name: version for name, version in conn.execute("SELECT name, version FROM change_counters")}
+    if token is None:
+        changed = set(counters)
+    else:
+        changed = {name for name, version in counters.items() if token[2].get(name) != version}
+    return (data_version, total_changes, counters), changed
+
 # =========== Folder tree ================
 
 def _build_folder_node(conn: sqlite3.Connection, folder_row: sqlite3.Row):
@@ -369,8 +797,354 @@ def get_folder_tree(conn: sqlite3.Connection, root_id: int):
         raise ValueError(f"No folder with id {root_id} found")
     return _build_folder_node(conn, root_row)
 
+# =========== Search ================
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, as a literal
+    (quotes and operators in the input are not interpreted); a trailing `*`
+    on a word makes it a prefix match.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join(terms)
+
+def search_cards(conn: sqlite3.Connection, query: str, folder_id: int | None = None,
+                 limit: int = 20, offset: int = 0, sources: bool = True):
+    """
+    Cards matching `query`, best first. Matches in the question weigh most,
+    then answer, then other_data; with `sources`, cards whose batch source
+    text matches are included, ranked below equally good direct matches.
+    `folder_id` restricts results to that folder's subtree.
+    """
+    conn.row_factory = sqlite3.Row
+    params = {
+        "q": fts_query(query), "limit": limit, "offset": offset, "folder": folder_id, "k": limit + offset,
+    }
+    # without a folder filter only the best limit+offset hits of each index can make the
+    # page, which lets FTS5 rank with a bounded heap instead of materialising every match
+    top_k = "ORDER BY rank LIMIT :k" if folder_id is None else ""
+    source_matches = """
+            UNION ALL
+            SELECT f.id, s.score FROM source_hits s
+            JOIN batches b ON b.source_id = s.source_id
+            JOIN flashcards f ON f.batch_id = b.id""" if sources else ""
+    subtree = """
+        AND f.folder_id IN (
+            WITH RECURSIVE subtree(id) AS (
+                SELECT :folder
+                UNION ALL
+                SELECT folders.id FROM folders JOIN subtree ON folders.parent_id = subtree.id
+            )
+            SELECT id FROM subtree
+        )""" if folder_id is not None else ""
+
+    rows = conn.execute(f"""
+        WITH card_hits(card_id, score) AS MATERIALIZED (
+            SELECT rowid, rank FROM cards_fts WHERE cards_fts MATCH :q {top_k}
+        ),
+        source_hits(source_id, score) AS MATERIALIZED (
+            SELECT rowid, 0.5 * rank FROM sources_fts WHERE sources_fts MATCH :q {top_k}
+        ),
+        matches(card_id, score) AS (
+            SELECT card_id, score FROM card_hits
+            {source_matches}
+        )
+        SELECT f.*, min(m.score) AS rank
+        FROM matches m JOIN flashcards f ON f.id = m.card_id
+        WHERE 1 {subtree}
+        GROUP BY f.id
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """, params).fetchall()
+    return [row_to_dict(r) for r in rows]
+
+def rebuild_search_index(conn: sqlite3.Connection):
+    """Rebuild the full-text indexes from the tables (e.g. after editing the db by hand)."""
+    conn.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO sources_fts(sources_fts) VALUES ('delete-all')")
+    for source_id, codec, data in conn.execute("SELECT id, codec, data FROM sources").fetchall():
+        conn.execute("INSERT INTO sources_fts(rowid, source_text) VALUES (?, ?)", (source_id, _inflate(codec, data)))
+    conn.commit()
+
+# =========== Sources ================
+
+def _inflate(codec: str, data: bytes) -> str:
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec != "raw":
+        raise ValueError(f"Unknown source codec '{codec}'")
+    return data.decode("utf-8")
+
+def store_source(conn: sqlite3.Connection, text: str | None) -> int | None:
+    """Id of the stored copy of `text`, compressing and indexing it if it is new. The caller commits."""
+    if text is None:
+        return None
+    raw = text.encode("utf-8")
+    digest = hashlib.sha256(raw).digest()
+    row = conn.execute("SELECT id FROM sources WHERE hash = ?", (digest,)).fetchone()
+    if row is not None:
+        return row[0]
+    codec, data = "zlib", zlib.compress(raw)
+    if len(data) >= len(raw):
+        codec, data = "raw", raw
+    cur = conn.execute("INSERT INTO sources (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                       (digest, codec, len(raw), data))
+    conn.execute("INSERT INTO sources_fts(rowid, source_text) VALUES (?, ?)", (cur.lastrowid, text))
+    return cur.lastrowid
+
+def load_source(conn: sqlite3.Connection, source_id: int | None) -> str | None:
+    if source_id is None:
+        return None
+    row = conn.execute("SELECT codec, data FROM sources WHERE id = ?", (source_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"No source with id {source_id} found")
+    return _inflate(row[0], row[1])
+
+def _release_source(conn: sqlite3.Connection, source_id: int | None):
+    """Drop a source (and its index entry) once no batch refers to it."""
+    if source_id is None or conn.execute("SELECT 1 FROM batches WHERE source_id = ?", (source_id,)).fetchone():
+        return
+    text = load_source(conn, source_id)
+    # contentless index: deleting needs the original text
+    conn.execute("INSERT INTO sources_fts(sources_fts, rowid, source_text) VALUES ('delete', ?, ?)", (source_id, text))
+    conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+
+def storage_stats(conn: sqlite3.Connection) -> dict:
+    """Space used by batch sources: as captured, after deduplication, and as stored."""
+    batches, text_bytes = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(s.size), 0) FROM batches b LEFT JOIN sources s ON s.id = b.source_id
+    """).fetchone()
+    sources, unique_bytes, stored_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length(data)), 0) FROM sources").fetchone()
+    return {
+        "batches": batches,
+        "sources": sources,
+        "text_bytes": text_bytes,        # every batch's text, as inline storage would hold it
+        "unique_bytes": unique_bytes,    # after deduplication
+        "stored_bytes": stored_bytes,    # after compression
+        "saved_bytes": text_bytes - stored_bytes,
+    }
+
+# =========== Near-duplicates ================
+
+DEDUPE_MODES = ("flag", "drop")
+DEDUPE_THRESHOLD = 0.7
+
+def index_card_signature(conn: sqlite3.Connection, card_id: int, question: str, answer: str):
+    """(Re)compute a card's MinHash signature and LSH buckets; the caller commits."""
+    sig = similarity.signature(question, answer)
+    conn.execute("INSERT OR REPLACE INTO card_signatures (card_id, signature) VALUES (?, ?)",
+                 (card_id, similarity.pack(sig)))
+    conn.execute("DELETE FROM card_minhash WHERE card_id = ?", (card_id,))
+    conn.executemany("INSERT OR IGNORE INTO card_minhash (band, bucket, card_id) VALUES (?, ?, ?)",
+                     [(band, bucket, card_id) for band, bucket in similarity.band_keys(sig)])
+
+def index_missing_signatures(conn: sqlite3.Connection) -> int:
+    """Index cards written without going through create_flashcard (imports, raw SQL); the caller commits."""
+    rows = conn.execute("""
+        SELECT f.id, f.question, f.answer FROM flashcards f
+        WHERE NOT EXISTS (SELECT 1 FROM card_signatures s WHERE s.card_id = f.id)
+    """).fetchall()
+    signatures, buckets = [], []
+    for card_id, question, answer in rows:
+        sig = similarity.signature(question, answer)
+        signatures.append((card_id, similarity.pack(sig)))
+        buckets.extend((band, bucket, card_id) for band, bucket in similarity.band_keys(sig))
+    conn.executemany("INSERT OR REPLACE INTO card_signatures (card_id, signature) VALUES (?, ?)", signatures)
+    conn.executemany("INSERT OR IGNORE INTO card_minhash (band, bucket, card_id) VALUES (?, ?, ?)", buckets)
+    return len(rows)
+
+def find_similar_cards(conn: sqlite3.Connection, question: str, answer: str,
+                       threshold: float = DEDUPE_THRESHOLD) -> list[tuple[int, float]]:
+    """(card id, estimated similarity) of indexed cards at least `threshold` similar, most similar first."""
+    sig = similarity.signature(question, answer)
+    keys = similarity.band_keys(sig)
+    rows = conn.execute(f"""
+        SELECT s.card_id, s.signature FROM card_signatures s
+        WHERE s.card_id IN (
+            SELECT card_id FROM card_minhash
+            WHERE {" OR ".join("(band = ? AND bucket = ?)" for _ in keys)}
+        )
+    """, [v for key in keys for v in key]).fetchall()
+    matches = []
+    for card_id, blob in rows:
+        score = similarity.similarity(sig, similarity.unpack(blob))
+        if score >= threshold:
+            matches.append((card_id, score))
+    return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+def find_duplicate_clusters(conn: sqlite3.Connection, threshold: float = DEDUPE_THRESHOLD,
+                            max_bucket: int = 200) -> list[list[int]]:
+    """
+    Groups of card ids that are near-duplicates of each other (transitively),
+    largest first. Only cards sharing an LSH bucket are compared; buckets with
+    more than `max_bucket` cards are compared against their first card only.
+    """
+    if index_missing_signatures(conn):
+        conn.commit()
+
+    signatures = {}
+    def sig_of(card_id):
+        if card_id not in signatures:
+            (blob,) = conn.execute("SELECT signature FROM card_signatures WHERE card_id = ?", (card_id,)).fetchone()
+            signatures[card_id] = similarity.unpack(blob)
+        return signatures[card_id]
+
+    parent = {}
+    def find(x):
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    compared = set()
+    buckets = conn.execute("""
+        SELECT group_concat(card_id) FROM card_minhash
+        GROUP BY band, bucket HAVING count(*) > 1
+    """)
+    for (members,) in buckets:
+        ids = sorted(int(i) for i in members.split(","))
+        pairs = ((ids[0], b) for b in ids[1:]) if len(ids) > max_bucket else \
+                ((a, b) for i, a in enumerate(ids) for b in ids[i + 1:])
+        for a, b in pairs:
+            if (a, b) in compared:
+                continue
+            compared.add((a, b))
+            if similarity.similarity(sig_of(a), sig_of(b)) >= threshold:
+                parent.setdefault(a, a)
+                parent[find(b)] = find(a)
+
+    clusters = {}
+    for card_id in parent:
+        clusters.setdefault(find(card_id), []).append(card_id)
+    return sorted((sorted(c) for c in clusters.values()), key=lambda c: (-len(c), c[0]))
+
+# =========== Folder classifier ================
+
+def count_folder_terms(conn: sqlite3.Connection, folder_id: int, question: str, answer: str, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) a card's terms from its folder's counts; the caller commits."""
+    terms = folder_classifier.card_terms(question, answer)
+    # totals first: triggers on folder_terms keep its sumsq in step
+    conn.execute("""
+        INSERT INTO folder_term_totals (folder_id, cards, terms) VALUES (?, ?, ?)
+        ON CONFLICT (folder_id) DO UPDATE SET cards = cards + excluded.cards, terms = terms + excluded.terms
+    """, (folder_id, sign, sign * sum(terms.values())))
+    conn.executemany("""
+        INSERT INTO folder_terms (term, folder_id, n) VALUES (?, ?, ?)
+        ON CONFLICT (term, folder_id) DO UPDATE SET n = n + excluded.n
+    """, [(term, folder_id, sign * n) for term, n in terms.items()])
+    if sign < 0:
+        conn.executemany("DELETE FROM folder_terms WHERE term = ? AND folder_id = ? AND n <= 0",
+                         [(term, folder_id) for term in terms])
+
+def rebuild_folder_terms(conn: sqlite3.Connection):
+    """Recount every folder's terms from its cards (after imports or raw SQL edits); the caller commits."""
+    counts, totals = Counter(), {}
+    for folder_id, question, answer in conn.execute("SELECT folder_id, question, answer FROM flashcards"):
+        terms = folder_classifier.card_terms(question, answer)
+        counts.update({(term, folder_id): n for term, n in terms.items()})
+        cards, n_terms = totals.get(folder_id, (0, 0))
+        totals[folder_id] = (cards + 1, n_terms + sum(terms.values()))
+    sumsq = Counter()
+    for (_, folder_id), n in counts.items():
+        sumsq[folder_id] += n * n
+    # bulk load with the sumsq triggers' work done above instead of row by row
+    conn.execute("DELETE FROM folder_term_totals")
+    conn.execute("DELETE FROM folder_terms")
+    conn.executemany("INSERT INTO folder_term_totals (folder_id, cards, terms, sumsq) VALUES (?, ?, ?, 0)",
+                     ((folder_id, cards, n) for folder_id, (cards, n) in totals.items()))
+    conn.executemany("INSERT INTO folder_terms (term, folder_id, n) VALUES (?, ?, ?)",
+                     ((term, folder_id, n) for (term, folder_id), n in counts.items()))
+
+def classify_folder(conn: sqlite3.Connection, question: str, answer: str) -> tuple[int, float]:
+    """(folder_id, score) for a new card; the root folder when no folder fits clearly."""
+    root = ROOT_FOLDER_DEFAULTS["id"]
+    terms = folder_classifier.card_terms(question, answer)
+    if not terms:
+        return root, 0.0
+    postings = conn.execute(
+        f"SELECT term, folder_id, n FROM folder_terms WHERE term IN ({', '.join('?' * len(terms))})",
+        list(terms),
+    ).fetchall()
+    norms = dict(conn.execute("SELECT folder_id, sumsq FROM folder_term_totals WHERE cards > 0").fetchall())
+    folder_id, score = folder_classifier.best_folder(terms, postings, norms, exclude=(root,))
+    return (root if folder_id is None else folder_id), score
+
+# =========== Folder digest ================
+
+_DIGEST_STOPWORDS = {
+    "what", "which", "when", "where", "who", "whom", "whose", "why", "how",
+    "that", "this", "these", "those", "with", "from", "into", "does", "have",
+    "there", "their", "about", "between", "would", "could", "should", "name",
+}
+
+def get_folders_signature(conn: sqlite3.Connection) -> str:
+    """Cheap fingerprint of the folder table; changes whenever a folder is added, renamed, moved or deleted."""
+    cur = conn.cursor()
+    cur.execute("SELECT id, name, parent_id FROM folders ORDER BY id")
+    return hashlib.sha1(repr([tuple(row) for row in cur.fetchall()]).encode()).hexdigest()
+
+def get_folder_digest(conn: sqlite3.Connection, keywords_per_folder: int = 5, sample_per_folder: int = 50):
+    """
+    Return a compact listing of every folder for use in prompts:
+    [{"id": ..., "path": "/a/b", "keywords": [...]}, ...] ordered by path.
+
+    Keywords are the most frequent words in the questions of (up to)
+    `sample_per_folder` of the folder's most recent cards.
+    """
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    cur.execute("SELECT id, name, parent_id FROM folders")
+    folders = {row["id"]: row for row in cur.fetchall()}
+
+    paths = {}
+    def path_of(folder_id):
+        if folder_id not in paths:
+            row = folders[folder_id]
+            if row["parent_id"] is None or row["parent_id"] not in folders:
+                paths[folder_id] = row["name"]
+            else:
+                paths[folder_id] = path_of(row["parent_id"]).rstrip("/") + "/" + row["name"]
+        return paths[folder_id]
+
+    cur.execute(
+        """
+        SELECT folder_id, question FROM (
+            SELECT folder_id, question,
+                   ROW_NUMBER() OVER (PARTITION BY folder_id ORDER BY id DESC) AS n
+            FROM flashcards
+        ) WHERE n <= ?
+        """,
+        (sample_per_folder,),
+    )
+    words = {}
+    for row in cur.fetchall():
+        counter = words.setdefault(row["folder_id"], Counter())
+        counter.update(
+            w for w in re.findall(r"[a-z][a-z0-9-]{3,}", row["question"].lower())
+            if w not in _DIGEST_STOPWORDS
+        )
+
+    digest = [
+        {
+            "id": folder_id,
+            "path": path_of(folder_id),
+            "keywords": [w for w, _ in words.get(folder_id, Counter()).most_common(keywords_per_folder)],
+        }
+        for folder_id in folders
+    ]
+    return sorted(digest, key=lambda d: d["path"])
+
 # =========== Database class wrapper ================
 
+@profiling.profile_methods
 class FlashcardDB:
     """
     Minimal wrapper around the module-level helpers; the only state is the
@@ -378,10 +1152,13 @@ class FlashcardDB:
     """
 
     @thread_safe
-    def __init__(self, db_path: str):        
+    def __init__(self, db_path: str, trace: bool | None = None):
+        """`trace` turns on SQL statement timing/slow-query logging (default: BASALT_SQL_TRACE)."""
         db_path = os.path.expanduser(db_path)
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(db_path, timeout=2.0)
+        trace = sql_trace.ENABLED if trace is None else trace
+        factory = sql_trace.TracedConnection if trace else sqlite3.Connection
+        self.conn = sqlite3.connect(db_path, timeout=2.0, factory=factory)
         self.conn.row_factory = sqlite3.Row
         self.conn.execute("PRAGMA foreign_keys = ON")
         init_schema(self.conn)
@@ -400,13 +1177,31 @@ class FlashcardDB:
         return create_flashcard(self.conn, card, batch_id)
 
     @thread_safe
-    def store_batch(self, cards: list[dict], content: str) -> int:
-        """Insert a new batch and all associated cards, returning the batch id."""
+    def store_batch(self, cards: list[dict], content: str, dedupe: str | None = None,
+                    threshold: float = DEDUPE_THRESHOLD) -> int:
+        """Insert a new batch and all associated cards, returning the batch id. See `dedupe_card`."""
         batch_id = self.create_batch(content)
         for card in cards:
-            self.create_flashcard(card, batch_id)
+            card = self.dedupe_card(card, dedupe, threshold)
+            if card is not None:
+                self.create_flashcard(card, batch_id)
         return batch_id
 
+    def dedupe_card(self, card: dict, mode: str | None, threshold: float = DEDUPE_THRESHOLD) -> dict | None:
+        """
+        Check a new card against the collection. If it nearly duplicates an
+        existing card, mode "flag" returns it with other_data "duplicate_of"
+        set to that card's id and "drop" returns None; mode None skips the check.
+        """
+        if mode is None:
+            return card
+        if mode not in DEDUPE_MODES:
+            raise ValueError(f"Unknown dedupe mode '{mode}'")
+        matches = find_similar_cards(self.conn, card["question"], card["answer"], threshold)
+        if not matches:
+            return card
+        return None if mode == "drop" else dict(card, duplicate_of=matches[0][0])
+
     # ---------- updaters ----------
     @thread_safe
     def update_flashcard_fields(self, card_id: int, fields: dict):
@@ -422,8 +1217,12 @@ class FlashcardDB:
         delete_flashcard(self.conn, card_id)
 
     @thread_safe
-    def delete_folder(self, folder_id: int, recursive: bool = False):
-        delete_folder(self.conn, folder_id, recursive)
+    def delete_folder(self, folder_id: int, recursive: bool = False, dry_run: bool = False) -> dict:
+        return delete_folder(self.conn, folder_id, recursive, dry_run)
+
+    @thread_safe
+    def move_folder(self, folder_id: int, new_parent_id: int) -> int:
+        return move_folder(self.conn, folder_id, new_parent_id)
 
     @thread_safe
     def delete_batch(self, batch_id: int):
@@ -445,6 +1244,12 @@ class FlashcardDB:
     def get_batch(self, batch_id: int):
         return get_batch(self.conn, batch_id)
 
+    def load_source(self, source_id: int | None) -> str | None:
+        return load_source(self.conn, source_id)
+
+    def storage_stats(self) -> dict:
+        return storage_stats(self.conn)
+
     def get_all_folders(self):
         return get_all_folders(self.conn)
 
@@ -460,13 +1265,61 @@ class FlashcardDB:
     def get_due_cards(self):
         return get_due_cards(self.conn)
 
+    def get_due_count(self, now: int | None = None) -> int:
+        return get_due_count(self.conn, now)
+
+    def get_next_due(self, now: int | None = None) -> int | None:
+        return get_next_due(self.conn, now)
+
+    def get_most_overdue_card(self, now: int | None = None) -> dict | None:
+        return get_most_overdue_card(self.conn, now)
+
+    def changes_since(self, token: tuple | None = None) -> tuple[tuple, set[str]]:
+        return changes_since(self.conn, token)
+
     def get_folder_tree(self, root_id: int=ROOT_FOLDER_DEFAULTS["id"]):
         return get_folder_tree(self.conn, root_id)
 
+    def get_subtree_ids(self, folder_id: int) -> list[int]:
+        return get_subtree_ids(self.conn, folder_id)
+
     def get_folder_settings(self, folder_id: int):
         return get_folder_settings(self.conn, folder_id)
 
+    def search_cards(self, query: str, folder_id: int | None = None, limit: int = 20, offset: int = 0,
+                     sources: bool = True):
+        return search_cards(self.conn, query, folder_id, limit, offset, sources)
+
+    @thread_safe
+    def rebuild_search_index(self):
+        rebuild_search_index(self.conn)
+
+    def find_similar_cards(self, question: str, answer: str, threshold: float = DEDUPE_THRESHOLD):
+        return find_similar_cards(self.conn, question, answer, threshold)
+
+    @thread_safe
+    def find_duplicate_clusters(self, threshold: float = DEDUPE_THRESHOLD):
+        return find_duplicate_clusters(self.conn, threshold)
+
+    def classify_folder(self, question: str, answer: str) -> tuple[int, float]:
+        return classify_folder(self.conn, question, answer)
+
+    @thread_safe
+    def rebuild_folder_terms(self):
+        rebuild_folder_terms(self.conn)
+        self.conn.commit()
+
+    def get_folders_signature(self):
+        return get_folders_signature(self.conn)
+
+    def get_folder_digest(self, keywords_per_folder: int = 5):
+        return get_folder_digest(self.conn, keywords_per_folder)
+
     # ---------- misc ----------
+    def explain(self, sql: str, params=()) -> str | None:
+        """EXPLAIN QUERY PLAN for a statement against this database."""
+        return sql_trace.TracedConnection.explain_query_plan(self.conn, sql, params)
+
     def close(self):
         self.conn.close()
 
@@ -1,4 +1,4 @@
-import datetime
+import datetime, time
 
 _SQL_FORMAT = "%Y-%m-%d %H:%M:%S"
 _UTC = datetime.timezone.utc     # convenience alias
@@ -19,4 +19,73 @@ def sql_timestamp_to_dt(ts: str) -> datetime.datetime:
     """
     Parse 'YYYY-MM-DD HH:MM:SS' → timezone-aware UTC datetime.
     """
-    return datetime.datetime.strptime(ts, _SQL_FORMAT).replace(tzinfo=_UTC)
\ No newline at end of file
+    return datetime.datetime.strptime(ts, _SQL_FORMAT).replace(tzinfo=_UTC)
+
+# ---------- epoch seconds (flashcards.next_due / created_at) ----------
+
+def now_epoch() -> int:
+    return int(time.time())
+
+def dt_to_epoch(dt: datetime.datetime) -> int:
+    """Timezone-aware or naive UTC datetime → integer seconds since the epoch."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_UTC)        # assume already UTC
+    return int(dt.timestamp())
+
+def _days_from_civil(y: int, m: int, d: int) -> int:
+    # days since 1970-01-01 for a proleptic Gregorian date (H. Hinnant's algorithm)
+    y -= m <= 2
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def sql_timestamp_to_epoch(ts: str) -> int:
+    """
+    'YYYY-MM-DD HH:MM:SS' (UTC) → epoch seconds, by slicing the fixed-width
+    fields instead of going through strptime and a datetime.
+    """
+    return (_days_from_civil(int(ts[0:4]), int(ts[5:7]), int(ts[8:10])) * 86400
+            + int(ts[11:13]) * 3600 + int(ts[14:16]) * 60 + int(ts[17:19]))
+
+def epoch_to_sql_timestamp(epoch: int) -> str:
+    """Epoch seconds → 'YYYY-MM-DD HH:MM:SS' (UTC)."""
+    return time.strftime(_SQL_FORMAT, time.gmtime(epoch))
+
+# ---------- bulk conversions (whole result sets, migrations) ----------
+# Timestamps in a result set cluster on a few days, so each calendar day is
+# converted once and the time of day is integer arithmetic.
+
+_HOURS = tuple(f"{h:02d}:" for h in range(24))
+_MINUTES_SECONDS = tuple(f"{s // 60:02d}:{s % 60:02d}" for s in range(3600))
+
+def sql_timestamps_to_epochs(timestamps) -> list[int]:
+    """Bulk `sql_timestamp_to_epoch`; None entries stay None."""
+    days = {}
+    epochs = []
+    for ts in timestamps:
+        if ts is None:
+            epochs.append(None)
+            continue
+        base = days.get(ts[:10])
+        if base is None:
+            base = days[ts[:10]] = _days_from_civil(int(ts[0:4]), int(ts[5:7]), int(ts[8:10])) * 86400
+        epochs.append(base + int(ts[11:13]) * 3600 + int(ts[14:16]) * 60 + int(ts[17:19]))
+    return epochs
+
+def epochs_to_sql_timestamps(epochs) -> list[str]:
+    """Bulk `epoch_to_sql_timestamp`; None entries stay None."""
+    days = {}
+    timestamps = []
+    for epoch in epochs:
+        if epoch is None:
+            timestamps.append(None)
+            continue
+        day, seconds = divmod(epoch, 86400)
+        date = days.get(day)
+        if date is None:
+            date = days[day] = time.strftime("%Y-%m-%d ", time.gmtime(day * 86400))
+        hour, seconds = divmod(seconds, 3600)
+        timestamps.append(date + _HOURS[hour] + _MINUTES_SECONDS[seconds])
+    return timestamps
@@ -0,0 +1,95 @@
+"""Size-bounded LRU key/value cache stored in a single SQLite file.
+
+Used by the daemon for things that are expensive to recompute and safe to
+reuse (model responses, video transcripts). Entries can expire after `ttl`
+seconds and values can be stored zlib-compressed.
+"""
+import sqlite3, os, threading, time, zlib
+
+
+class DiskCache:
+
+    def __init__(self, path: str, max_bytes: int, ttl: float | None = None, compress: bool = False):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl              # seconds; None or 0 = never expire
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=2.0, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS entries (
+            key        TEXT PRIMARY KEY,
+            value      BLOB NOT NULL,
+            size       INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+        """)
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.conn.commit()
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        value = row[0]
+        return (zlib.decompress(value) if self.compress else value).decode("utf-8")
+
+    def set(self, key: str, value: str):
+        data = value.encode("utf-8")
+        if self.compress:
+            data = zlib.compress(data)
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        (total,) = self.conn.execute("SELECT total(size) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used ASC"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self.conn.execute("SELECT count(*), total(size) FROM entries").fetchone()
+        return {
+            "entries": entries,
+            "bytes": int(size),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
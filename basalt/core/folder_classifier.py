@@ -0,0 +1,74 @@
+"""Local folder routing for new cards (TF-IDF nearest centroid).
+
+Each folder's centroid is the summed term counts of the cards filed in it,
+kept up to date in the `folder_terms` table as cards are added, edited, moved
+and deleted (see database.py), together with its squared norm. A new card
+goes to the folder whose centroid is closest in cosine terms to the card's
+IDF-weighted term vector:
+
+    similarity(f) = sum_t  q_t * idf_t * n_tf  /  (|c_f| * |q_idf|)
+
+where idf_t = log(1 + folders / folders containing t). If no folder reaches
+MIN_SIMILARITY the card stays in the root folder.
+
+Scoring touches only the postings of the card's own terms, so it costs one
+indexed query and some arithmetic per card.
+"""
+import math
+from collections import Counter
+
+from basalt.core.similarity import normalise
+
+MIN_SIMILARITY = 0.05
+MIN_WORD = 3
+
+STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "what", "which", "when", "where", "who",
+    "whom", "whose", "why", "how", "that", "this", "these", "those", "with", "from",
+    "into", "does", "did", "has", "have", "had", "there", "their", "they", "them",
+    "about", "between", "would", "could", "should", "can", "its", "his", "her", "not",
+    "but", "also", "than", "then", "some", "any", "all", "each", "one", "two", "called",
+    "name", "used", "use", "main", "known", "example",
+}
+
+
+def card_terms(question: str, answer: str) -> Counter:
+    """Content words of a card, with counts."""
+    return Counter(
+        w for w in normalise(f"{question} {answer}")
+        if len(w) >= MIN_WORD and w not in STOPWORDS and not w.isdigit()
+    )
+
+
+def best_folder(terms: Counter, postings, norms: dict, exclude=()) -> tuple[int | None, float]:
+    """
+    Pick the folder for a card with `terms`.
+
+    postings: (term, folder_id, count) rows for the card's terms.
+    norms:    folder_id -> squared norm of the folder's term counts, for every non-empty folder.
+    Returns (folder_id, cosine similarity), or (None, best similarity) if no folder reaches MIN_SIMILARITY.
+    """
+    if not terms or not norms:
+        return None, 0.0
+
+    document_frequency = Counter()
+    for term, folder_id, n in postings:
+        if n > 0:
+            document_frequency[term] += 1
+    weights = {t: q * math.log(1 + len(norms) / (document_frequency[t] or 1)) for t, q in terms.items()}
+    query_norm = math.sqrt(sum(w * w for w in weights.values()))
+
+    dots = Counter()
+    for term, folder_id, n in postings:
+        if folder_id not in exclude and norms.get(folder_id):
+            dots[folder_id] += weights[term] * n
+
+    best, best_similarity = None, 0.0
+    for folder_id, dot in sorted(dots.items()):
+        similarity = dot / (math.sqrt(norms[folder_id]) * query_norm)
+        if similarity > best_similarity:
+            best, best_similarity = folder_id, similarity
+
+    if best_similarity < MIN_SIMILARITY:
+        return None, best_similarity
+    return best, best_similarity
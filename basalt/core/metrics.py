@@ -0,0 +1,128 @@
+"""In-process metrics for the Basalt daemon.
+
+Counters, gauges and bucketed histograms keyed by name plus optional labels.
+`snapshot()` is JSON-serialisable (what the daemon sends back over its socket
+for `basalt stats`) and `to_prometheus()` renders the Prometheus text format.
+"""
+import threading, time, bisect
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+def _fmt_key(key):
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram; the last bucket is +Inf."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (None if empty)."""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        cumulative, buckets = 0, {}
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += n
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    # ---------- recording ----------
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_gauge(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall-clock seconds spent inside the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # ---------- reporting ----------
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": {_fmt_key(k): v for k, v in self._counters.items()},
+                "gauges": {_fmt_key(k): v for k, v in self._gauges.items()},
+                "histograms": {_fmt_key(k): h.snapshot() for k, h in self._histograms.items()},
+            }
+
+    def to_prometheus(self, prefix="basalt_"):
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                typed = set()
+                for (name, labels), value in sorted(store.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {prefix}{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{prefix}{_fmt_key((name, labels))} {value}")
+
+            typed = set()
+            for (name, labels), hist in sorted(self._histograms.items(), key=lambda kv: kv[0]):
+                if name not in typed:
+                    lines.append(f"# TYPE {prefix}{name} histogram")
+                    typed.add(name)
+                for le, n in hist.snapshot()["buckets"].items():
+                    lines.append(f"{prefix}{_fmt_key((name + '_bucket', labels + (('le', le),)))} {n}")
+                lines.append(f"{prefix}{_fmt_key((name + '_sum', labels))} {hist.sum}")
+                lines.append(f"{prefix}{_fmt_key((name + '_count', labels))} {hist.count}")
+        return "\n".join(lines) + "\n"
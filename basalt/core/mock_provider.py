@@ -0,0 +1,277 @@
+"""Local stand-in for the LLM provider APIs, for offline load and latency testing.
+
+Speaks the request/response shapes call_model and stream_model use:
+
+    POST /v1/chat/completions                       OpenAI-compatible (openai, mistral, deepseek, mock)
+    POST /v1/messages                               Anthropic
+    POST /v1beta/models/<model>:generateContent     Gemini
+    POST /v1beta/models/<model>:streamGenerateContent?alt=sse
+
+Every answer is a JSON array of flashcards made from the sentences of the
+captured text (tagged with "source" for coalesced multi-document requests).
+Latency is drawn from a configurable distribution and 429/500 errors can be
+injected at given rates. Point Basalt at it with `provider: "mock"` (or any
+provider plus `api_base: "http://127.0.0.1:<port>"`).
+
+    python -m basalt.core.mock_provider --port 8765 --latency-ms 300 --distribution lognormal --rate-429 0.05
+"""
+import argparse, json, logging, math, random, re, socket, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class LatencyModel:
+    """Samples a delay in seconds with the given mean (ms) and distribution."""
+
+    def __init__(self, mean_ms: float = 0, distribution: str = "fixed", sigma: float = 0.5):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'")
+        self.mean = mean_ms / 1000
+        self.distribution = distribution
+        self.sigma = sigma
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return random.uniform(0, 2 * self.mean)
+        if self.distribution == "exponential":
+            return random.expovariate(1 / self.mean)
+        if self.distribution == "lognormal":
+            # mu chosen so the distribution's mean equals self.mean
+            mu = math.log(self.mean) - self.sigma ** 2 / 2
+            return random.lognormvariate(mu, self.sigma)
+        return self.mean
+
+
+def fake_cards(text: str, cards_per_document: int = 3) -> str:
+    """A JSON array of flashcards built from the first sentences of each document in `text`."""
+    if text.startswith("Text: "):
+        text = text[len("Text: "):]
+
+    parts = re.split(r"=== DOCUMENT (\d+) ===\n", text)
+    if len(parts) > 1:
+        documents = [(int(parts[i]), parts[i + 1]) for i in range(1, len(parts) - 1, 2)]
+    else:
+        documents = [(None, text)]
+
+    cards = []
+    for source, document in documents:
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", document.strip()) if s]
+        for sentence in sentences[:cards_per_document]:
+            topic = " ".join(sentence.split()[:4])
+            card = {"question": f"What is said about \"{topic}\"?", "answer": sentence}
+            if source is not None:
+                card["source"] = source
+            cards.append(card)
+    return json.dumps(cards)
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockProviderServer"
+
+    def setup(self):
+        super().setup()
+        # responses are written in several pieces; don't let Nagle hold them back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, fmt, *args):
+        logger.debug("mock provider: " + fmt, *args)
+
+    # ---------- plumbing ----------
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _event(self, payload, event=None):
+        data = (f"event: {event}\n" if event else "") + f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n"
+        data = data.encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _pieces(self, text):
+        size = self.server.chunk_chars
+        for i in range(0, len(text), size):
+            if i:
+                time.sleep(self.server.chunk_delay)
+            yield text[i:i + size]
+
+    # ---------- routing ----------
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        path = self.path.split("?", 1)[0]
+        self.server.count_request()
+
+        if path == "/v1/chat/completions":
+            api = "openai"
+            user_text = body["messages"][-1]["content"]
+        elif path == "/v1/messages":
+            api = "anthropic"
+            user_text = body["messages"][-1]["content"]
+        elif path.startswith("/v1beta/models/"):
+            api = "google"
+            user_text = body["contents"][-1]["parts"][0]["text"]
+        else:
+            return self._send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+        time.sleep(self.server.latency.sample())
+
+        roll = random.random()
+        if roll < self.server.rate_429:
+            return self._send_json(429, {"error": {"type": "rate_limit_error", "message": "mock rate limit"}},
+                                   {"Retry-After": "1"})
+        if roll < self.server.rate_429 + self.server.rate_500:
+            return self._send_json(500, {"error": {"type": "api_error", "message": "mock server error"}})
+
+        text = fake_cards(user_text, self.server.cards_per_document)
+        usage = (_tokens(json.dumps(body)), _tokens(text))
+        streaming = body.get("stream") or path.endswith(":streamGenerateContent")
+
+        getattr(self, f"_{api}_{'stream' if streaming else 'reply'}")(body, text, usage)
+
+    # ---------- OpenAI-compatible ----------
+    def _openai_reply(self, body, text, usage):
+        self._send_json(200, {
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": usage[0], "completion_tokens": usage[1], "total_tokens": sum(usage)},
+        })
+
+    def _openai_stream(self, body, text, usage):
+        self._start_stream()
+        self._event({"choices": [{"index": 0, "delta": {"role": "assistant"}}]})
+        for piece in self._pieces(text):
+            self._event({"choices": [{"index": 0, "delta": {"content": piece}}]})
+        usage = {"prompt_tokens": usage[0], "completion_tokens": usage[1]}
+        if body.get("stream_options", {}).get("include_usage"):
+            self._event({"choices": [], "usage": usage})
+        else:
+            # Mistral and DeepSeek don't take stream_options; they put usage on the final chunk
+            self._event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+        self._event("[DONE]")
+        self._end_stream()
+
+    # ---------- Anthropic ----------
+    def _anthropic_reply(self, body, text, usage):
+        self._send_json(200, {
+            "type": "message", "role": "assistant", "model": body.get("model"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": usage[0], "output_tokens": usage[1]},
+        })
+
+    def _anthropic_stream(self, body, text, usage):
+        self._start_stream()
+        self._event({"type": "message_start", "message": {"usage": {"input_tokens": usage[0], "output_tokens": 1}}},
+                    "message_start")
+        self._event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                    "content_block_start")
+        for piece in self._pieces(text):
+            self._event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+                        "content_block_delta")
+        self._event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        self._event({"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": usage[1]}},
+                    "message_delta")
+        self._event({"type": "message_stop"}, "message_stop")
+        self._end_stream()
+
+    # ---------- Gemini ----------
+    def _google_reply(self, body, text, usage):
+        self._send_json(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": usage[0], "candidatesTokenCount": usage[1]},
+        })
+
+    def _google_stream(self, body, text, usage):
+        self._start_stream()
+        for piece in self._pieces(text):
+            self._event({"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}],
+                         "usageMetadata": {"promptTokenCount": usage[0]}})
+        self._event({"candidates": [{"content": {"role": "model", "parts": [{"text": ""}]}, "finishReason": "STOP"}],
+                     "usageMetadata": {"promptTokenCount": usage[0], "candidatesTokenCount": usage[1]}})
+        self._end_stream()
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=8765, latency_ms=0, distribution="fixed", sigma=0.5,
+                 rate_429=0.0, rate_500=0.0, chunk_chars=16, chunk_delay_ms=10, cards_per_document=3):
+        super().__init__((host, port), _Handler)
+        self.latency = LatencyModel(latency_ms, distribution, sigma)
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay_ms / 1000
+        self.cards_per_document = cards_per_document
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._count_lock:
+            self.requests += 1
+
+    def start(self) -> str:
+        """Serve on a background thread; returns the base url to use as `api_base`."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local mock LLM provider for Basalt.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="mean response latency")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal shape")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="characters per streamed event")
+    parser.add_argument("--chunk-delay-ms", type=float, default=10, help="delay between streamed events")
+    parser.add_argument("--cards", type=int, default=3, help="cards per document")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    server = MockProviderServer(args.host, args.port, args.latency_ms, args.distribution, args.sigma,
+                                args.rate_429, args.rate_500, args.chunk_chars, args.chunk_delay_ms, args.cards)
+    logger.info("mock provider listening on %s", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Opt-in hot-path instrumentation for the database layer and core commands.
+
+Enabled by setting BASALT_PROFILE=1 in the environment before basalt is
+imported. When disabled, `profiled` returns the function unchanged and
+`thread_safe` takes its plain path, so there is no per-call overhead.
+
+Recorded (in `profiler`, a Metrics instance):
+    calls_total{fn}          call count
+    errors_total{fn}         calls that raised
+    call_seconds{fn}         latency histogram, lock wait included
+    lock_wait_seconds{fn}    time spent waiting to acquire db_lock
+    lock_hold_seconds{fn}    time spent holding db_lock
+    rows_total{fn}           rows written (conn.total_changes) or returned
+"""
+import os, sys, time, functools
+
+from basalt.core.metrics import Metrics, COUNT_BUCKETS
+
+ENABLED = os.environ.get("BASALT_PROFILE", "").lower() not in ("", "0", "false", "no")
+
+profiler = Metrics()
+
+LOCK_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+ROW_BUCKETS = COUNT_BUCKETS + (1000, 10000)
+
+
+def record_lock(fn_name: str, wait: float, hold: float):
+    profiler.observe("lock_wait_seconds", wait, buckets=LOCK_BUCKETS, fn=fn_name)
+    profiler.observe("lock_hold_seconds", hold, buckets=LOCK_BUCKETS, fn=fn_name)
+
+
+def _rows_returned(result):
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    return 0
+
+
+def profiled(fn):
+    """Count, time and measure rows touched by `fn` when profiling is enabled.
+
+    For methods of objects holding a SQLite connection in `.conn`, rows
+    written are taken from the change in `conn.total_changes`; otherwise
+    rows returned are estimated from the result.
+    """
+    if not ENABLED:
+        return fn
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        conn = getattr(args[0], "conn", None) if args else None
+        try:
+            changes = conn.total_changes if conn is not None else None
+        except Exception:  # closed connection
+            changes = None
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            profiler.inc("errors_total", fn=name)
+            raise
+        finally:
+            profiler.inc("calls_total", fn=name)
+            profiler.observe("call_seconds", time.perf_counter() - start, fn=name)
+
+        written = 0
+        if changes is not None:
+            try:
+                written = conn.total_changes - changes
+            except Exception:
+                pass
+        rows = written or _rows_returned(result)
+        profiler.inc("rows_total", rows, fn=name)
+        return result
+    return wrapper
+
+
+def profile_methods(cls):
+    """Class decorator: apply `profiled` to every public method of `cls`."""
+    if not ENABLED:
+        return cls
+    for attr, value in list(vars(cls).items()):
+        if callable(value) and not attr.startswith("_"):
+            setattr(cls, attr, profiled(value))
+    return cls
+
+
+def report(snapshot: dict | None = None) -> str:
+    """Human-readable table of a profiler snapshot (default: this process)."""
+    snapshot = snapshot or profiler.snapshot()
+    counters, hists = snapshot["counters"], snapshot["histograms"]
+
+    def label(key):
+        return key.split('fn="', 1)[1].rstrip('"}')
+
+    rows = []
+    for key, hist in hists.items():
+        if not key.startswith("call_seconds{"):
+            continue
+        fn = label(key)
+        wait = hists.get(f'lock_wait_seconds{{fn="{fn}"}}')
+        hold = hists.get(f'lock_hold_seconds{{fn="{fn}"}}')
+        rows.append((
+            hist["sum"], fn, hist["count"], hist["sum"] / hist["count"] * 1000, hist["p95"],
+            wait["sum"] * 1000 if wait else None, hold["sum"] * 1000 if hold else None,
+            counters.get(f'rows_total{{fn="{fn}"}}', 0), counters.get(f'errors_total{{fn="{fn}"}}', 0),
+        ))
+    if not rows:
+        return "profile: no calls recorded\n"
+
+    fmt_ms = lambda v: "-" if v is None else f"{v:.2f}"
+    lines = [f"{'function':<44} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'p95 s≤':>7} "
+             f"{'wait ms':>9} {'hold ms':>9} {'rows':>8} {'errors':>6}"]
+    for total, fn, calls, mean, p95, wait, hold, n_rows, errors in sorted(rows, reverse=True):
+        lines.append(f"{fn:<44} {calls:>7} {total * 1000:>10.2f} {mean:>9.3f} {p95:>7} "
+                     f"{fmt_ms(wait):>9} {fmt_ms(hold):>9} {n_rows:>8} {errors:>6}")
+    return "\n".join(lines) + "\n"
+
+
+def print_report():
+    """atexit hook for short-lived processes (the CLI)."""
+    if profiler.snapshot()["histograms"]:
+        sys.stderr.write("\n" + report())
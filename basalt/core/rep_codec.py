@@ -0,0 +1,73 @@
+"""Compact binary encoding of flashcards.rep_data.
+
+A rep_data that is just {"history": [[score, timestamp], ...]} is stored as a BLOB:
+
+    header   <Iq    review count n, base epoch (earliest review)
+    scores   n × uint8
+    offsets  n × uint32 (little-endian), seconds after the base epoch
+
+about 5 bytes per review instead of ~28 as JSON, and decoding is a couple
+of C-level unpacks rather than a JSON parse. Timestamps decode as epoch
+seconds (like flashcards.next_due); 'YYYY-MM-DD HH:MM:SS' strings from older
+histories are accepted on encode. Anything that doesn't fit the layout
+(extra keys, odd entries) stays JSON text, and `row_to_dict` decodes either.
+
+On by default; set BASALT_COMPACT_REP_DATA=0 to keep writing JSON text
+(BLOBs already stored still decode).
+"""
+import array, json, os, struct, sys
+
+from basalt.core.datetime_utils import sql_timestamps_to_epochs
+
+ENABLED = os.environ.get("BASALT_COMPACT_REP_DATA", "1").lower() not in ("", "0", "false", "no")
+
+_HEADER = struct.Struct("<Iq")
+_MAX_OFFSET = 2**32 - 1
+
+
+def encode(rep_data: dict) -> bytes | str:
+    """rep_data → BLOB if it fits the compact layout (and ENABLED), else JSON text."""
+    if not ENABLED:
+        return json.dumps(rep_data)
+    history = rep_data.get("history") if isinstance(rep_data, dict) else None
+    if not isinstance(history, list) or rep_data.keys() != {"history"}:
+        return json.dumps(rep_data)
+
+    scores, times = bytearray(), []
+    for entry in history:
+        if not isinstance(entry, (list, tuple)) or len(entry) != 2:
+            return json.dumps(rep_data)
+        score, ts = entry
+        if type(score) is not int or not 0 <= score <= 255:
+            return json.dumps(rep_data)
+        if type(ts) is not int and not isinstance(ts, str):
+            return json.dumps(rep_data)
+        scores.append(score)
+        times.append(ts)
+
+    strings = [i for i, ts in enumerate(times) if isinstance(ts, str)]
+    if strings:
+        try:
+            for i, epoch in zip(strings, sql_timestamps_to_epochs([times[i] for i in strings])):
+                times[i] = epoch
+        except ValueError:
+            return json.dumps(rep_data)
+
+    base = min(times, default=0)
+    if times and max(times) - base > _MAX_OFFSET:
+        return json.dumps(rep_data)
+    offsets = array.array("I", (t - base for t in times))
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return _HEADER.pack(len(times), base) + bytes(scores) + offsets.tobytes()
+
+
+def decode(blob: bytes) -> dict:
+    """BLOB from `encode` → {"history": [[score, epoch seconds], ...]}."""
+    n, base = _HEADER.unpack_from(blob)
+    start = _HEADER.size
+    offsets = array.array("I")
+    offsets.frombytes(blob[start + n:start + 5 * n])
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return {"history": [[score, base + offset] for score, offset in zip(blob[start:start + n], offsets)]}
@@ -0,0 +1,72 @@
+"""Run core commands inside the daemon, where the database and configs are already warm.
+
+Each `basalt` invocation is a fresh process that would otherwise open SQLite
+and run init_schema for one command. `call` sends the command over the daemon
+socket instead:
+
+    request  {"kind": "rpc", "command": name, "args": [...], "kwargs": {...}}
+    reply    {"ok": True, "result": ...} | {"ok": False, "error": str, "type": exception name}
+
+and runs it in-process when no daemon is listening, so callers get the same
+result (or exception) either way. Only the commands in COMMANDS can be called.
+"""
+from multiprocessing.connection import Client
+
+from basalt.core import core_commands
+from basalt.core.config import socket_path
+
+COMMANDS = {
+    "set": core_commands.set,
+    "review": core_commands.review_flashcard,
+    "list_cards": core_commands.list_cards,
+    "get_card": core_commands.get_card,
+    "folder_tree": core_commands.folder_tree,
+    "make_card": core_commands.make_card,
+    "make_folder": core_commands.make_folder,
+    "next_due_card": core_commands.next_due_card,
+    "delete_flashcard": core_commands.delete_flashcard,
+    "edit_flashcard": core_commands.edit_flashcard,
+    "move_flashcard": core_commands.move_flashcard,
+}
+
+# exceptions re-raised as themselves on the client; anything else becomes RuntimeError
+_ERRORS = {exc.__name__: exc for exc in (ValueError, NotImplementedError)}
+
+
+def execute(request: dict) -> dict:
+    """Run one request (daemon side) and build its reply; never raises."""
+    command = request.get("command")
+    try:
+        if command not in COMMANDS:
+            raise ValueError(f"Unknown command: {command}")
+        result = COMMANDS[command](*request.get("args", ()), **request.get("kwargs", {}))
+    except SystemExit as e: # must not take the daemon (or the client's connection) down with it
+        return {"ok": False, "error": f"{command} exited with status {e.code}", "type": "RuntimeError"}
+    except Exception as e:
+        return {"ok": False, "error": str(e), "type": type(e).__name__}
+    return {"ok": True, "result": result}
+
+
+def call(command: str, *args, **kwargs):
+    """
+    Run `command` in the daemon if it is up, else in this process. Only a
+    failure to connect falls back to running locally: once the request is
+    sent the daemon may have run it, so a dropped connection is an error
+    rather than a reason to run it again.
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown command: {command}")
+    try:
+        client = Client(str(socket_path()), authkey=b"basalt")
+    except (FileNotFoundError, ConnectionRefusedError):
+        return COMMANDS[command](*args, **kwargs)
+    with client:
+        try:
+            client.send({"kind": "rpc", "command": command, "args": args, "kwargs": kwargs})
+            reply = client.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"lost the connection to the daemon during '{command}'; "
+                               f"it may or may not have run ({e.__class__.__name__})")
+    if not reply["ok"]:
+        raise _ERRORS.get(reply["type"], RuntimeError)(reply["error"])
+    return reply["result"]
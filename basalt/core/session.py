@@ -0,0 +1,106 @@
+"""Process-wide warm state for core_commands, the CLI, the hotkey listener and the menu bar.
+
+Opening FlashcardDB connects, runs init_schema and reads config.json, and
+commands used to do that two or three times per operation. A Session keeps,
+for the life of the process:
+
+  - one open FlashcardDB per thread (sqlite3 connections are per-thread), and
+    with it sqlite3's cache of prepared statements;
+  - the parsed config, re-read only when config.json's mtime/size change.
+
+The database is reopened if data_dir changes, after `reset()`, and when the
+file at the path is no longer the one that was opened (another process ran
+`basalt reset db`: writes through the old connection would go to the unlinked
+file and be lost).
+"""
+import contextlib, os, threading
+
+from basalt.core import config
+from basalt.core.database import FlashcardDB
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _identity(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class Session:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._configs = None
+        self._config_stamp = None
+        self._generation = 0
+
+    def configs(self) -> dict:
+        """The current configs (shared; don't mutate)."""
+        stamp = _stamp(config.config_file_path)
+        with self._lock:
+            if self._configs is None or stamp != self._config_stamp:
+                self._configs = config.get_configs()
+                self._config_stamp = _stamp(config.config_file_path)  # get_configs may have written it
+            return self._configs
+
+    def db_path(self) -> str:
+        return os.path.join(self.configs()["data_dir"], "flashcard_data.db")
+
+    @property
+    def db(self) -> FlashcardDB:
+        """This thread's open FlashcardDB."""
+        path = self.db_path()
+        held = getattr(self._local, "db", None)
+        if held is not None:
+            generation, held_path, identity, db = held
+            if generation == self._generation and held_path == path and identity == _identity(path):
+                return db
+            db.close()
+        db = FlashcardDB(path)
+        self._local.db = (self._generation, path, _identity(path), db)
+        return db
+
+    @contextlib.contextmanager
+    def database(self):
+        """
+        The warm FlashcardDB for a block of work. The connection outlives the
+        block, so an exception rolls back whatever the block left uncommitted.
+        """
+        db = self.db
+        try:
+            yield db
+        except BaseException:
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            raise
+
+    def reset(self):
+        """Forget cached configs and connections (e.g. before the database file is removed)."""
+        with self._lock:
+            self._configs = None
+            self._generation += 1
+        held = getattr(self._local, "db", None)
+        if held is not None:
+            held[-1].close()
+            self._local.db = None
+
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = Session()
+    return _session
@@ -0,0 +1,74 @@
+"""MinHash signatures and LSH banding for near-duplicate card detection.
+
+A card is reduced to the set of words and word bigrams of its normalised
+question and answer. Its signature holds, for each of NUM_HASHES independent hash
+functions, the minimum hash over that set; the fraction of equal positions
+in two signatures estimates the Jaccard similarity of the two sets.
+
+For sub-linear lookup the signature is cut into BANDS bands of ROWS values
+and each band is hashed to a bucket key: two cards share at least one bucket
+with probability 1 - (1 - s**ROWS)**BANDS (about 0.99 at s = 0.7, 0.64 at
+s = 0.5), so only the few cards sharing a bucket need comparing.
+"""
+import hashlib, re, struct, unicodedata
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+
+_SIGNATURE = struct.Struct(f"<{NUM_HASHES}I")
+_WORD = re.compile(r"\w+")
+
+
+def normalise(text: str) -> list[str]:
+    """Lower-cased, accent-stripped words."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _WORD.findall(text.lower())
+
+
+def shingles(question: str, answer: str) -> set[bytes]:
+    """
+    Words and word bigrams of question and answer, kept apart so a question
+    word never matches an answer word. The unigrams keep short cards that
+    differ in one word similar (bigrams alone would lose two of a handful).
+    """
+    result = set()
+    for prefix, text in (("q", question), ("a", answer)):
+        words = normalise(text)
+        result.update(f"{prefix}:{w}".encode() for w in words)
+        result.update(f"{prefix}:{a} {b}".encode() for a, b in zip(words, words[1:]))
+    return result
+
+
+def signature(question: str, answer: str) -> tuple[int, ...]:
+    """MinHash signature of a card; one shake_128 digest per shingle supplies all NUM_HASHES hash values."""
+    hashed = [_SIGNATURE.unpack(hashlib.shake_128(s).digest(_SIGNATURE.size))
+              for s in shingles(question, answer)]
+    if not hashed:
+        return (0xFFFFFFFF,) * NUM_HASHES
+    return tuple(map(min, zip(*hashed)))
+
+
+def pack(sig: tuple[int, ...]) -> bytes:
+    return _SIGNATURE.pack(*sig)
+
+
+def unpack(blob: bytes) -> tuple[int, ...]:
+    return _SIGNATURE.unpack(blob)
+
+
+def band_keys(sig: tuple[int, ...]) -> list[tuple[int, int]]:
+    """(band, bucket) pairs; bucket is a stable signed 64-bit hash of the band's values."""
+    packed = _SIGNATURE.pack(*sig)
+    keys = []
+    for band in range(BANDS):
+        chunk = packed[band * ROWS * 4:(band + 1) * ROWS * 4]
+        bucket = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True)
+        keys.append((band, bucket))
+    return keys
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
@@ -1,7 +1,7 @@
 from typing import List, Tuple
 
 def get_interval_sm2(
-    history: List[Tuple[int, str]],
+    history: List[Tuple[int, int]],
     sm2_settings: dict,
 ) -> float:
     """
@@ -9,9 +9,9 @@ def get_interval_sm2(
 
     Parameters
     ----------
-    history : List[Tuple[int, str]]
-        A chronological list of tuples (score, timestamp_str).  Only `score`
-        (int 0‑5) is used.
+    history : List[Tuple[int, int]]
+        A chronological list of tuples (score, timestamp) -- epoch seconds, or
+        'YYYY-MM-DD HH:MM:SS' in older histories.  Only `score` (int 0‑5) is used.
     sm2_settings : dict
         Dictionary matching the keys described in README:
             unit_time (hours in one interval “day”)
@@ -0,0 +1,240 @@
+"""SQL statement tracing and slow-query log for FlashcardDB.
+
+Opt-in through the environment (or FlashcardDB(..., trace=True)):
+
+    BASALT_SQL_TRACE=1        log every statement with its duration (logger "basalt.sql", DEBUG)
+    BASALT_SLOW_QUERY_MS=50   statements slower than this are logged at WARNING (default 50)
+    BASALT_SQL_EXPLAIN=1      also log EXPLAIN QUERY PLAN for slow statements
+
+Timing comes from a Cursor subclass: a statement's duration is the time spent
+in execute() plus in fetching its rows, so a lazily-iterated SELECT is charged
+for its whole scan. SQLite's trace callback supplies the statement as actually
+run (parameters expanded, trigger bodies included), which is what gets logged.
+
+Per-statement aggregates are kept so N+1 patterns stand out: the same SELECT
+run thousands of times shows up at the top of `report()`.
+"""
+import os, sys, time, threading, logging, sqlite3
+
+logger = logging.getLogger("basalt.sql")
+
+ENABLED = os.environ.get("BASALT_SQL_TRACE", "").lower() not in ("", "0", "false", "no")
+if ENABLED:
+    logger.setLevel(logging.DEBUG)
+SLOW_QUERY_MS = float(os.environ.get("BASALT_SLOW_QUERY_MS", 50))
+EXPLAIN = os.environ.get("BASALT_SQL_EXPLAIN", "").lower() not in ("", "0", "false", "no")
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {}  # normalized sql -> [count, total seconds, max seconds, rows]
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def _record(sql: str, seconds: float, rows: int):
+    key = _normalize(sql)
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = [0, 0.0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        entry[3] += rows
+
+
+def stats() -> list[dict]:
+    """Aggregated statement stats, most total time first."""
+    with _stats_lock:
+        items = list(_stats.items())
+    return sorted(
+        ({"sql": sql, "count": c, "total_ms": t * 1000, "max_ms": m * 1000, "rows": r}
+         for sql, (c, t, m, r) in items),
+        key=lambda s: s["total_ms"], reverse=True,
+    )
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+
+def report(limit: int = 20) -> str:
+    rows = stats()[:limit]
+    if not rows:
+        return "sql trace: no statements recorded\n"
+    lines = [f"{'count':>7} {'total ms':>10} {'max ms':>9} {'rows':>8}  statement"]
+    for s in rows:
+        sql = s["sql"] if len(s["sql"]) <= 100 else s["sql"][:97] + "..."
+        lines.append(f"{s['count']:>7} {s['total_ms']:>10.2f} {s['max_ms']:>9.2f} {s['rows']:>8}  {sql}")
+    return "\n".join(lines) + "\n"
+
+
+def print_report():
+    """atexit hook for short-lived processes (the CLI)."""
+    if _stats:
+        sys.stderr.write("\n" + report())
+
+
+def _on_trace(statement: str):
+    # the cursor that is currently executing picks this up when it finishes;
+    # later callbacks in the same execute() are trigger bodies, logged at DEBUG
+    if getattr(_local, "explaining", False):
+        return
+    if getattr(_local, "last_statement", None) is None:
+        _local.last_statement = statement
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug("  %s", statement)
+
+
+class TracedCursor(sqlite3.Cursor):
+
+    _pending = None  # (sql, params, seconds so far, rows so far, expanded sql)
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, params, seconds, rows, expanded = pending
+        self.connection._log_statement(sql, params, seconds, rows, expanded)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        _local.last_statement = None
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            expanded = getattr(_local, "last_statement", None)
+            self._pending = (sql, parameters, elapsed, 0, expanded)
+        if self.description is None:  # no result rows: done already
+            self._pending = (sql, parameters, elapsed, max(self.rowcount, 0), expanded)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._pending = (sql, None, time.perf_counter() - start, max(self.rowcount, 0), None)
+        self._finish()
+        return self
+
+    def executescript(self, sql_script):
+        self._finish()
+        start = time.perf_counter()
+        super().executescript(sql_script)
+        self._pending = (sql_script, None, time.perf_counter() - start, 0, None)
+        self._finish()
+        return self
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        if self._pending is not None:
+            sql, params, seconds, rows, expanded = self._pending
+            got = len(result) if isinstance(result, list) else int(result is not None)
+            self._pending = (sql, params, seconds + time.perf_counter() - start, rows + got, expanded)
+        return result
+
+    def fetchone(self):
+        row = self._timed_fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed_fetch(super().fetchmany, self.arraysize if size is None else size)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(super().fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending is not None:
+            sql, params, seconds, rows, expanded = self._pending
+            self._pending = (sql, params, seconds + time.perf_counter() - start, rows + 1, expanded)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # a cursor abandoned half-way through its rows still gets logged
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3.Connection whose cursors (including conn.execute) are timed."""
+
+    slow_query_ms = SLOW_QUERY_MS
+    explain = EXPLAIN
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_on_trace)
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection's own execute* run on an internal, untraced cursor
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def _log_statement(self, sql, params, seconds, rows, expanded):
+        _record(sql, seconds, rows)
+        ms = seconds * 1000
+        text = _normalize(expanded or sql)
+        if ms < self.slow_query_ms:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%.3f ms, %d rows: %s", ms, rows, text)
+            return
+
+        logger.warning("slow query (%.1f ms, %d rows): %s", ms, rows, text)
+        if self.explain and params is not None:
+            plan = self.explain_query_plan(sql, params)
+            if plan:
+                logger.warning("query plan:\n%s", plan)
+
+    def explain_query_plan(self, sql: str, params=()) -> str | None:
+        """EXPLAIN QUERY PLAN of a single statement as an indented tree (None if not explainable)."""
+        if sql.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+            return None
+        _local.explaining = True
+        try:
+            # a plain cursor, so explaining is not itself traced
+            rows = sqlite3.Cursor(self).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except sqlite3.Error:
+            return None
+        finally:
+            _local.explaining = False
+
+        depth = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, 0) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return "\n".join(lines)
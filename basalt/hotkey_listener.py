@@ -1,30 +1,202 @@
-from basalt.core.config import get_configs
-from basalt.core.core_commands import capture, set, parse_argv
+from basalt.core.session import get_session
+from basalt.core.core_commands import capture, parse_argv, send_metrics
+from basalt.core.config_watcher import ConfigWatcher
+from basalt.core import rpc
 
-from pynput.keyboard import GlobalHotKeys
-import threading, fire
+from fire.parser import DefaultParseValue
+import threading, queue, functools, inspect, logging, time, collections
+
+logger = logging.getLogger(__name__)
+
+HOTKEY_WORKERS = 2
+DEBOUNCE_SECONDS = 0.25 #presses of one hotkey closer than this to its last accepted press are dropped
+MAX_IN_FLIGHT = 2 #queued + running commands per hotkey; presses beyond this are dropped
+
+DISPATCH_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.1)
+MAX_UNSENT_METRICS = 10_000
+
+#hotkey latency and drops, forwarded to the daemon's metrics (`basalt stats`):
+#   hotkey_enqueue_seconds{hotkey}   keypress -> command queued for a worker
+#   hotkey_command_seconds{hotkey}   keypress -> command finished (e.g. capture job sent to the daemon)
+#   hotkey_dropped_total{hotkey,reason}, hotkey_errors_total{hotkey}
+#recorded here and sent by the workers after each command; kept (up to a limit) while the daemon is down
+_unsent_metrics = collections.deque(maxlen=MAX_UNSENT_METRICS)
+
+def _inc(name, **labels):
+    _unsent_metrics.append(("inc", name, 1, labels, None))
+
+def _observe(name, value, buckets=None, **labels):
+    _unsent_metrics.append(("observe", name, value, labels, buckets))
+
+def flush_metrics() -> bool:
+    """Send the recorded hotkey metrics to the daemon; False (and kept for next time) if it isn't running."""
+    records = []
+    while True:
+        try:
+            records.append(_unsent_metrics.popleft())
+        except IndexError:
+            break
+    if not records:
+        return True
+    try:
+        send_metrics(records)
+    except (FileNotFoundError, ConnectionRefusedError, EOFError, OSError):
+        _unsent_metrics.extendleft(reversed(records))
+        return False
+    return True
+
+def set(target: str, identifier: str, edit_path_or_new_value, new_value=None):
+    """core_commands.set, run by the daemon when it is up."""
+    rpc.call("set", target, identifier, edit_path_or_new_value, new_value)
 
 CORE_COMMANDS_INTERFACE = {
-    "capture" : capture, 
+    "capture" : capture,
     "set" : set # type: ignore (oops)
 }
 
 #small CLI-style interface to make calling things via hotkey_listener easier
+def compile_command(arg_str: str):
+    """
+    Parse a hotkey command like "capture clip -f" once, into a no-argument callable.
+    Arguments are read the way the CLI (fire) reads them: positionals, `--flag value`,
+    `--flag=value`, and a bare flag as True. Raises ValueError if it can't be called.
+    """
+    argv = parse_argv(arg_str.split())
+    if not argv or argv[0] not in CORE_COMMANDS_INTERFACE:
+        raise ValueError(f"Unknown hotkey command: '{arg_str}'")
+    fn = CORE_COMMANDS_INTERFACE[argv[0]]
+
+    args, kwargs = [], {}
+    rest = argv[1:]
+    i = 0
+    while i < len(rest):
+        token = rest[i]
+        if token.startswith("--"):
+            name, eq, value = token[2:].partition("=")
+            name = name.replace("-", "_")
+            if eq:
+                kwargs[name] = DefaultParseValue(value)
+            elif i + 1 < len(rest) and not rest[i + 1].startswith("--"):
+                kwargs[name] = DefaultParseValue(rest[i + 1])
+                i += 1
+            else:
+                kwargs[name] = True
+        else:
+            args.append(DefaultParseValue(token))
+        i += 1
+
+    try:
+        inspect.signature(fn).bind(*args, **kwargs)
+    except TypeError as e:
+        raise ValueError(f"Invalid hotkey command '{arg_str}': {e}")
+    return functools.partial(fn, *args, **kwargs)
+
 def run_command(arg_str: str):
-    args = parse_argv(arg_str.split())
-    fire.Fire(CORE_COMMANDS_INTERFACE, command=args)
+    compile_command(arg_str)()
+
+class HotkeyDispatcher:
+    """
+    Runs hotkey commands on a few worker threads, so the pynput callback
+    returns at once and further presses aren't blocked.
+    """
+
+    def __init__(self, workers: int = HOTKEY_WORKERS, debounce: float = DEBOUNCE_SECONDS,
+                 max_in_flight: int = MAX_IN_FLIGHT):
+        self.debounce = debounce
+        self.max_in_flight = max_in_flight
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._last_press = {}
+        self._in_flight = {}
+        self._workers = [threading.Thread(target=self._work, name=f"hotkey-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def press(self, keys: str, command) -> bool:
+        """Queue `command` for hotkey `keys` (call from the key listener); False if the press was dropped."""
+        pressed = time.perf_counter()
+        with self._lock:
+            if pressed - self._last_press.get(keys, float("-inf")) < self.debounce:
+                dropped = "debounce"
+            elif self._in_flight.get(keys, 0) >= self.max_in_flight:
+                dropped = "in_flight"
+            else:
+                dropped = None
+                self._last_press[keys] = pressed
+                self._in_flight[keys] = self._in_flight.get(keys, 0) + 1
+        if dropped:
+            _inc("hotkey_dropped_total", hotkey=keys, reason=dropped)
+            logger.debug("hotkey %s dropped (%s)", keys, dropped)
+            return False
+
+        self._queue.put((keys, command, pressed))
+        _observe("hotkey_enqueue_seconds", time.perf_counter() - pressed, buckets=DISPATCH_BUCKETS, hotkey=keys)
+        return True
+
+    def _work(self):
+        while True:
+            keys, command, pressed = self._queue.get()
+            if command is None:
+                return
+            try:
+                command()
+            except Exception:
+                _inc("hotkey_errors_total", hotkey=keys)
+                logger.exception("hotkey %s failed", keys)
+            finally:
+                with self._lock:
+                    self._in_flight[keys] -= 1
+                _observe("hotkey_command_seconds", time.perf_counter() - pressed, hotkey=keys)
+            flush_metrics()
+
+    def stop(self):
+        """Let queued commands finish, then end the workers."""
+        for _ in self._workers:
+            self._queue.put((None, None, None))
+
+def build_hotkeys(hotkey_map: dict, dispatcher: HotkeyDispatcher) -> dict:
+    """GlobalHotKeys callbacks for `hotkey_map`; commands that don't parse are logged and skipped."""
+    hotkeys = {}
+    for keys, arg_str in hotkey_map.items():
+        try:
+            command = compile_command(arg_str)
+        except ValueError as e:
+            logger.error("skipping hotkey %s: %s", keys, e)
+            continue
+        hotkeys[keys] = lambda keys=keys, command=command: dispatcher.press(keys, command)
+    return hotkeys
 
 def run_hotkey_listener(quit_event: threading.Event, reload_event:threading.Event):
+    """
+    Listen for the configured hotkeys until `quit_event` is set. The listener
+    sleeps on `reload_event`, so set it after `quit_event` to stop it promptly.
+    `reload_event` is also set (by a ConfigWatcher) when the hotkeys section
+    of config.json changes, and the hotkeys are then rebuilt.
+    """
+    from pynput.keyboard import GlobalHotKeys # only needed (and only installable on desktops) to listen
+
+    dispatcher = HotkeyDispatcher()
+    bound = {"hotkeys": None}
 
-    while not quit_event.is_set():
-        hotkey_map = get_configs()["hotkeys"]
+    def _config_changed():
+        try:
+            hotkey_map = get_session().configs()["hotkeys"]
+        except Exception as e: #e.g. config.json saved mid-edit; keep the current hotkeys
+            logger.error("could not read hotkeys from config: %s", e)
+            return
+        if hotkey_map != bound["hotkeys"]:
+            reload_event.set()
 
-        hotkeys = { keys : lambda 
-                   cmd=hotkey_map[keys] : run_command(cmd) 
-                   for keys in hotkey_map }
+    watcher = ConfigWatcher(_config_changed).start()
+    try:
+        while not quit_event.is_set():
+            bound["hotkeys"] = get_session().configs()["hotkeys"]
+            hotkeys = build_hotkeys(bound["hotkeys"], dispatcher)
 
-        with GlobalHotKeys(hotkeys) as hk_listener:
-            while not reload_event.wait(0.1):
-                if quit_event.is_set():
-                    return
-            reload_event.clear()
\ No newline at end of file
+            with GlobalHotKeys(hotkeys) as hk_listener:
+                reload_event.wait()
+                reload_event.clear()
+    finally:
+        watcher.stop()
+        dispatcher.stop()
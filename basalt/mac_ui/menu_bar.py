@@ -3,25 +3,94 @@ import rumps
 from typing import Any
 import datetime
 from basalt.core.spaced_repetition import get_interval_sm2
-from basalt.core.datetime_utils import now_dt, dt_to_sql_timestamp
+from basalt.core.datetime_utils import now_dt, now_epoch, dt_to_epoch
 import json
 rumps.debug_mode(False)
 
-from basalt.core.database import FlashcardDB
-from basalt.core.config import db_path, get_configs
+from basalt.core.session import get_session
+from basalt.mac_ui import menu_model
 
 BASE_TITLE = "🪨"
 REFRESH_RATE = 1 #seconds
 ROOT_FOLDER_DISPLAY = "Folders"
 
 
+class FolderMenu:
+    """
+    Applies menu_model diffs to the rumps Folders menu, so a refresh only
+    touches the items that changed. rumps indexes items by their key in the
+    parent (the title, or a generated one for separators), so the key every
+    node went in under is remembered by node path.
+    """
+
+    def __init__(self, item: rumps.MenuItem, on_edit, on_review):
+        self.item = item
+        self.model = {"key": None, "title": item.title, "children": []}
+        self._keys: dict[tuple, Any] = {}
+        self._on_edit = on_edit
+        self._on_review = on_review
+
+    def show(self, tree: dict[str, Any]) -> None:
+        new = menu_model.build_menu(tree)
+        ops = menu_model.diff(self.model, new)
+        # retitled items come out before anything goes in, so no title (= rumps key)
+        # is ever held by two items of one menu, even when siblings swap titles
+        for op in ops:
+            if op["op"] == "update":
+                self._remove(self._item_at(op["path"]), op["path"] + (op["key"],))
+        for op in ops:
+            parent = self._item_at(op["path"])
+            if op["op"] == "remove":
+                self._remove(parent, op["path"] + (op["key"],))
+            else:
+                self._insert(parent, op["path"], op["node"], op["after"])
+        self.model = new
+
+    def _item_at(self, path: tuple) -> rumps.MenuItem:
+        item = self.item
+        for depth in range(1, len(path) + 1):
+            item = item[self._keys[path[:depth]]]
+        return item
+
+    def _insert(self, parent: rumps.MenuItem, parent_path: tuple, node: dict, after) -> None:
+        path = parent_path + (node["key"],)
+        item = self._build(path, node)
+        existing = set(parent.keys())
+        if after is not None:
+            parent.insert_after(self._keys[parent_path + (after,)], item)
+        elif existing:
+            parent.insert_before(next(iter(parent.keys())), item)
+        else:
+            parent.add(item)
+        (self._keys[path],) = set(parent.keys()) - existing
+
+    def _remove(self, parent: rumps.MenuItem, path: tuple) -> None:
+        del parent[self._keys[path]]
+        for stale in [p for p in self._keys if p[:len(path)] == path]:
+            del self._keys[stale]
+
+    def _build(self, path: tuple, node: dict):
+        kind = node["key"][0]
+        if kind == "separator":
+            return rumps.separator
+        item = rumps.MenuItem(node["title"])
+        if kind == "card":
+            card_id = node["key"][1]
+            item.add(rumps.MenuItem("Edit", callback=lambda sender, cid=card_id: self._on_edit(cid)))
+            item.add(rumps.MenuItem("Review", callback=lambda sender, cid=card_id: self._on_review(cid)))
+        after = None
+        for child in node["children"]:
+            self._insert(item, path, child, after)
+            after = child["key"]
+        return item
+
+
 class BasaltApp(rumps.App):
     def __init__(self):
-        self.db = FlashcardDB(db_path())
-        tree = self._node_to_rumps(self.db.get_folder_tree())
+        self.db = get_session().db
 
         # Build Capture submenu items from user‑defined hotkeys
-        hotkeys = get_configs()["hotkeys"]
+        hotkeys = get_session().configs()["hotkeys"]
         capture_items: list[Any] = []
         for combo, cmd in hotkeys.items():
             capture_items.append(
@@ -33,7 +102,8 @@ class BasaltApp(rumps.App):
         if not capture_items:
             capture_items = ["No capture commands"]
 
-        self.tree = {ROOT_FOLDER_DISPLAY : tree[next(iter(tree))]}
+        folders_item = rumps.MenuItem(ROOT_FOLDER_DISPLAY)
+        self.folder_menu = FolderMenu(folders_item, self.on_card_edit, self.on_card_review)
 
         super().__init__(
             "Basalt", 
@@ -41,11 +111,13 @@ class BasaltApp(rumps.App):
             menu=[
                 rumps.MenuItem("Review",  key="r"),
                 {"Capture": capture_items},
-                self.tree,
+                folders_item,
                 rumps.MenuItem("Settings"),
                 None,
             ])
 
+        self._change_token = None   # FlashcardDB.changes_since token
+        self._next_due = None       # when the due count next grows without a db change
         self.refresh()
         rumps.Timer(self.refresh, REFRESH_RATE).start()
 
@@ -58,7 +130,7 @@ class BasaltApp(rumps.App):
         rep_data = card.get("rep_data") or {"history": []}
         history = rep_data.setdefault("history", [])
         now = now_dt()
-        history.append((score, dt_to_sql_timestamp(now)))
+        history.append((score, dt_to_epoch(now)))
         self.db.update_flashcard_fields(card["id"], {"rep_data": rep_data})
 
         # 2. Compute the next interval/due date.
@@ -73,7 +145,7 @@ class BasaltApp(rumps.App):
         next_due = now + datetime.timedelta(hours=interval_hrs)
         self.db.update_flashcard_fields(
             card["id"],
-            {"next_due": dt_to_sql_timestamp(next_due)},
+            {"next_due": dt_to_epoch(next_due)},
         )
 
     def _review_single(self, card: dict[str, Any]) -> None:
@@ -105,50 +177,19 @@ class BasaltApp(rumps.App):
 
         self._apply_review(card, idx_to_grade.get(button_index, 1))
 
-    def _node_to_rumps(self, node: dict[str, Any]) -> dict[str, Any]:
-        """
-        Recursively build a rumps-compatible menu tree.
-        """
-        items: list[Any] = []
-
-        for child in node["children"]:
-            items.append(self._node_to_rumps(child))
-        
-        if items:
-            items.append(None)
-
-        for card in node["cards"]:
-            edit_item   = rumps.MenuItem(
-                "Edit",
-                callback=lambda sender, cid=card["id"]: self.on_card_edit(cid)
-            )
-            review_item = rumps.MenuItem(
-                "Review",
-                callback=lambda sender, cid=card["id"]: self.on_card_review(cid)
-            )
-            if len(card["question"]) < 10:
-                card_menu_display = card["question"]
-            else:
-                card_menu_display = card["question"][0:10] + "..."
-
-            items.append({card_menu_display: [edit_item, review_item]})
-
-        if not items:
-            items = ["No cards"]
-
-        return {node["name"]: items}
-
     def refresh(self, *_):
+        """Redraw what changed since the last refresh; most ticks change nothing and read nothing."""
+        self._change_token, changed = self.db.changes_since(self._change_token)
 
-        new_tree = self._node_to_rumps(self.db.get_folder_tree())
-        contents = new_tree[next(iter(new_tree))]
-
-        folders_menu: rumps.MenuItem = self.menu[ROOT_FOLDER_DISPLAY]
-        folders_menu.clear()
-        folders_menu.update(contents)
+        if changed & {"folders", "flashcards"}:
+            self.folder_menu.show(self.db.get_folder_tree())
 
-        n = len(self.db.get_due_cards())
-        self.title = f"{BASE_TITLE} {n}" if n else BASE_TITLE
+        # cards also fall due just by time passing
+        now = now_epoch()
+        if "flashcards" in changed or (self._next_due is not None and now >= self._next_due):
+            n = self.db.get_due_count(now)
+            self._next_due = self.db.get_next_due(now)
+            self.title = f"{BASE_TITLE} {n}" if n else BASE_TITLE
 
     # Card‑level actions
 
@@ -203,4 +244,5 @@ if __name__ == "__main__":
         app.run()
 
     finally:
-        quit_evt.set()
\ No newline at end of file
+        quit_evt.set()
+        reload_evt.set()  # wakes the listener so it sees quit_evt
\ No newline at end of file
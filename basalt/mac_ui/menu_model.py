@@ -0,0 +1,101 @@
+"""Platform-neutral view model of the Folders menu, and a diff between two of them.
+
+`build_menu(tree)` turns a FlashcardDB folder tree into menu nodes:
+
+    {"key": ("folder", id) | ("card", id) | ("separator",) | ("empty",),
+     "title": str,
+     "children": [node, ...]}         # folders only
+
+A node's key identifies it among its siblings across refreshes; titles are
+made unique within a parent, since menu toolkits (rumps) index items by title.
+
+`diff(old, new)` returns the operations that turn menu `old` into `new`:
+
+    {"op": "remove", "path": path, "key": key}
+    {"op": "insert", "path": path, "key": key, "node": node, "after": key | None}
+    {"op": "update", "path": path, "key": key, "node": node, "after": key | None}
+
+`path` is the tuple of keys from the root down to the parent, and `after` is
+the preceding sibling in the new menu (None: first). Applied in order, each
+operation's `path` and `after` already exist. "update" replaces a node whose
+title changed, subtree included; unchanged subtrees produce no operations.
+Nothing here imports a UI toolkit.
+"""
+from bisect import bisect_left
+
+CARD_TITLE_LENGTH = 10
+SEPARATOR = ("separator",)
+EMPTY = ("empty",)
+
+
+def card_title(question: str) -> str:
+    if len(question) < CARD_TITLE_LENGTH:
+        return question
+    return question[:CARD_TITLE_LENGTH] + "..."
+
+
+def build_menu(tree: dict) -> dict:
+    """View model for a folder node from `get_folder_tree`: subfolders, a separator, then cards."""
+    children = [build_menu(child) for child in tree["children"]]
+    if children:
+        children.append({"key": SEPARATOR, "title": "", "children": []})
+    for card in tree["cards"]:
+        children.append({"key": ("card", card["id"]), "title": card_title(card["question"]), "children": []})
+    if not children:
+        children.append({"key": EMPTY, "title": "No cards", "children": []})
+
+    seen = {}
+    for child in children:
+        if child["key"] == SEPARATOR:
+            continue
+        title = child["title"]
+        seen[title] = seen.get(title, 0) + 1
+        if seen[title] > 1:
+            child["title"] = f"{title} ({seen[title]})"
+    return {"key": ("folder", tree["id"]), "title": tree["name"], "children": children}
+
+
+def _stable_keys(old_keys: list, new_keys: list) -> set:
+    """
+    Keys present in both lists that can stay where they are: the longest run
+    of them in the same relative order. Any other common key has moved.
+    """
+    position = {key: i for i, key in enumerate(old_keys)}
+    common = [key for key in new_keys if key in position]
+    # longest increasing subsequence of old positions, in new order
+    tails, tail_index, previous = [], [], [None] * len(common)
+    for i, key in enumerate(common):
+        j = bisect_left(tails, position[key])
+        if j == len(tails):
+            tails.append(position[key])
+            tail_index.append(i)
+        else:
+            tails[j] = position[key]
+            tail_index[j] = i
+        previous[i] = tail_index[j - 1] if j else None
+    stable = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        stable.add(common[i])
+        i = previous[i]
+    return stable
+
+
+def diff(old: dict, new: dict, path: tuple = ()) -> list[dict]:
+    """Operations turning the children of `old` into those of `new` (see module docstring)."""
+    old_children = {child["key"]: child for child in old["children"]}
+    stable = _stable_keys([c["key"] for c in old["children"]], [c["key"] for c in new["children"]])
+
+    ops = [{"op": "remove", "path": path, "key": key} for key in old_children if key not in stable]
+    after = None
+    for child in new["children"]:
+        key = child["key"]
+        before = old_children.get(key) if key in stable else None
+        if before is None:
+            ops.append({"op": "insert", "path": path, "key": key, "node": child, "after": after})
+        elif before["title"] != child["title"]:
+            ops.append({"op": "update", "path": path, "key": key, "node": child, "after": after})
+        elif before["children"] != child["children"]:
+            ops.extend(diff(before, child, path + (key,)))
+        after = key
+    return ops
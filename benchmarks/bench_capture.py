@@ -0,0 +1,206 @@
+"""End-to-end capture throughput benchmark.
+
+Drives the real path capture() -> daemon socket -> make_flashcard ->
+store_batch against the local mock provider and a synthetic database, for
+every combination of daemon worker count and payload size, and reports
+captures/sec, end-to-end latency percentiles (capture() call until the card
+is in the database) and the daemon's per-stage timings.
+
+Everything runs under a throwaway HOME, so your real configs, database and
+daemon are untouched. Results are written as JSON for comparison across
+commits.
+
+    python -m benchmarks.bench_capture --workers 1 4 10 --sizes 200 2000 20000 --captures 100 --latency-ms 200
+"""
+import argparse, json, os, signal, sqlite3, statistics, subprocess, sys, tempfile, time, datetime
+
+
+def _percentiles(samples):
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": samples[-1],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _isolate(home):
+    """Point appdirs (and therefore every basalt path) at a scratch directory."""
+    os.environ["HOME"] = home
+    os.environ["XDG_CONFIG_HOME"] = os.path.join(home, "config")
+    os.environ["XDG_DATA_HOME"] = os.path.join(home, "data")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(home, "cache")
+
+
+def _start_daemon(workers, log_path):
+    from basalt.core.config import socket_path
+    from multiprocessing.connection import Client
+
+    log = open(log_path, "a")
+    proc = subprocess.Popen(
+        [sys.executable, "-c", f"from basalt.core.daemon import start_daemon; start_daemon(max_workers={workers})"],
+        stdout=log, stderr=log, env=os.environ.copy(),
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            with Client(socket_path(), authkey=b"basalt") as c:
+                c.send({"kind": "stats"})
+                c.recv()
+            return proc
+        except (FileNotFoundError, ConnectionRefusedError, EOFError):
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"daemon did not start; see {log_path}")
+
+
+def _stop_daemon(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def _payload(tag, size):
+    head = f"Capture {tag} marker. "
+    filler = "Basalt is an extrusive igneous rock formed from rapidly cooling lava. "
+    return head + (filler * (size // len(filler) + 1))[: max(0, size - len(head))]
+
+
+def run_once(db_path, workers, size, captures, rate, timeout, log_path):
+    from basalt.core.core_commands import capture, daemon_stats
+
+    proc = _start_daemon(workers, log_path)
+    try:
+        conn = sqlite3.connect(db_path, timeout=5)
+        (last_id,) = conn.execute("SELECT coalesce(max(id), 0) FROM flashcards").fetchone()
+
+        run_tag = f"w{workers}s{size}"
+        sent, enqueue = {}, []
+        start = time.perf_counter()
+        for i in range(captures):
+            if rate:
+                time.sleep(max(0.0, start + i / rate - time.perf_counter()))
+            marker = f"Capture {run_tag}-{i} marker."
+            t0 = time.perf_counter()
+            capture(_payload(f"{run_tag}-{i}", size))
+            sent[marker] = t0
+            enqueue.append(time.perf_counter() - t0)
+
+        done = {}
+        deadline = time.perf_counter() + timeout
+        while len(done) < len(sent) and time.perf_counter() < deadline:
+            rows = conn.execute("SELECT id, answer FROM flashcards WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+            now = time.perf_counter()
+            for card_id, answer in rows:
+                last_id = card_id
+                if answer in sent and answer not in done:
+                    done[answer] = now
+            time.sleep(0.002)
+        end = max(done.values(), default=time.perf_counter())
+        conn.close()
+
+        stats = daemon_stats()
+    finally:
+        _stop_daemon(proc)
+
+    latencies = [done[m] - sent[m] for m in done]
+    stages = {
+        name.split('"')[1]: {k: hist[k] for k in ("count", "p50", "p95", "p99")}
+                            | {"mean": hist["sum"] / hist["count"] if hist["count"] else None}
+        for name, hist in stats["histograms"].items() if name.startswith("stage_seconds")
+    }
+    return {
+        "workers": workers,
+        "payload_chars": size,
+        "captures": captures,
+        "completed": len(done),
+        "captures_per_sec": len(done) / (end - start) if done else 0.0,
+        "latency_s": _percentiles(latencies),
+        "enqueue_s": _percentiles(enqueue),
+        "stages_s": stages,
+        "provider_errors": sum(v for k, v in stats["counters"].items() if k.startswith("provider_errors_total")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end capture throughput benchmark.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 10], help="daemon max_workers values")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 20000], help="payload sizes in chars")
+    parser.add_argument("--captures", type=int, default=50, help="captures per run")
+    parser.add_argument("--rate", type=float, default=0, help="captures/sec to send (0 = as fast as possible)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="mock provider mean latency")
+    parser.add_argument("--distribution", default="lognormal", help="mock provider latency distribution")
+    parser.add_argument("--seed-cards", type=int, default=5000, help="cards in the synthetic database")
+    parser.add_argument("--seed-depth", type=int, default=3, help="folder depth of the synthetic database")
+    parser.add_argument("--seed-fanout", type=int, default=4, help="folder fan-out of the synthetic database")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for a run to finish")
+    parser.add_argument("--out", default=None, help="results file (default benchmarks/results/capture-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="basalt-bench-")
+    _isolate(home)
+
+    # basalt resolves its paths at import time, so import only after _isolate
+    from basalt.core.config import default_configs, set_configs, db_path
+    from basalt.core.mock_provider import MockProviderServer
+    from benchmarks.synth import generate
+
+    mock = MockProviderServer(port=0, latency_ms=args.latency_ms, distribution=args.distribution)
+    configs = default_configs()
+    configs.update({
+        "provider": "mock",
+        "api_base": mock.start(),
+        "response_cache": False,
+        "coalesce_window_ms": 0,
+        "stream": False,
+    })
+    os.makedirs(configs["data_dir"], exist_ok=True)
+    set_configs(configs)
+    generate(db_path(), args.seed_cards, args.seed_depth, args.seed_fanout)
+
+    log_path = os.path.join(home, "daemon.log")
+    runs = []
+    for workers in args.workers:
+        for size in args.sizes:
+            result = run_once(db_path(), workers, size, args.captures, args.rate, args.timeout, log_path)
+            runs.append(result)
+            lat = result["latency_s"]
+            print(f"workers={workers:<3} size={size:<6} {result['captures_per_sec']:7.2f} captures/s   "
+                  f"p50 {lat.get('p50', 0) * 1000:8.1f} ms   p95 {lat.get('p95', 0) * 1000:8.1f} ms   "
+                  f"p99 {lat.get('p99', 0) * 1000:8.1f} ms   ({result['completed']}/{result['captures']})")
+    mock.shutdown()
+
+    results = {
+        "benchmark": "capture",
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "params": vars(args),
+        "runs": runs,
+    }
+    out = args.out or os.path.join(
+        os.path.dirname(__file__), "results",
+        f"capture-{results['commit']}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
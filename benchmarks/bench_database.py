@@ -0,0 +1,142 @@
+"""Micro-benchmarks for basalt.core.database on synthetic collections.
+
+For each collection size, generates a database with benchmarks.synth and
+times the hot operations (per-iteration setup excluded), reporting ops/sec,
+mean latency and peak traced memory of a single call. Runs under a throwaway
+HOME so core_commands (review_flashcard) resolves to the synthetic database.
+
+    python -m benchmarks.bench_database --cards 1000 10000 100000 --repeat 20
+"""
+import argparse, datetime, itertools, json, os, statistics, subprocess, tempfile, time, tracemalloc
+
+
+def _isolate(home):
+    os.environ["HOME"] = home
+    os.environ["XDG_CONFIG_HOME"] = os.path.join(home, "config")
+    os.environ["XDG_DATA_HOME"] = os.path.join(home, "data")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(home, "cache")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def measure(fn, setup=None, repeat=10):
+    """Time `fn(setup())` `repeat` times; then trace the peak memory of one more call."""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": len(samples) / sum(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": sorted(samples)[len(samples) // 2] * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def bench_collection(cards, args):
+    from basalt.core.config import default_configs, set_configs, db_path
+    from basalt.core.core_commands import review_flashcard
+    from basalt.core.database import FlashcardDB, ROOT_FOLDER_DEFAULTS, row_to_dict
+    from benchmarks.synth import generate
+
+    configs = default_configs()
+    configs["data_dir"] = tempfile.mkdtemp(dir=os.environ["HOME"])
+    set_configs(configs)
+    path = db_path()
+    summary = generate(path, cards, args.depth, args.fanout, args.max_history)
+    print(f"\n{cards} cards, {summary['folders']} folders "
+          f"({summary['bytes'] / 1e6:.1f} MB, generated in {summary['seconds']:.1f}s)")
+
+    db = FlashcardDB(path)
+    root = ROOT_FOLDER_DEFAULTS["id"]
+    (deepest,) = db.conn.execute("SELECT max(id) FROM folders").fetchone()
+    card_ids = [r[0] for r in db.conn.execute("SELECT id FROM flashcards ORDER BY random() LIMIT 1000")]
+    rows = db.conn.execute("SELECT * FROM flashcards LIMIT 1000").fetchall()
+    # a different card each time, or one card's interval grows past datetime's range
+    review_ids = itertools.cycle(card_ids)
+    new_batch = [{"question": f"Benchmark question {i}?", "answer": "Benchmark answer."} for i in range(10)]
+
+    def make_subtree(_=None):
+        # a 3-level subtree with a few cards in each folder, to be deleted
+        tag = time.perf_counter_ns()
+        parent = root
+        top = None
+        for level in range(3):
+            folder_id = db.create_folder(f"doomed-{tag}-{level}")
+            db.update_folder_fields(folder_id, {"parent_id": parent})
+            db.store_batch([dict(c, folder_id=folder_id) for c in new_batch], "")
+            top = top or folder_id
+            parent = folder_id
+        return top
+
+    ops = {
+        "get_folder_tree": (lambda _: db.get_folder_tree(root), None),
+        "get_due_cards": (lambda _: db.get_due_cards(), None),
+        "search_cards": (lambda _: db.search_cards("mitochondria enzyme"), None),
+        "store_batch": (lambda _: db.store_batch(new_batch, "benchmark source"), None),
+        "get_folder_settings": (lambda _: db.get_folder_settings(deepest), None),
+        "review_flashcard": (lambda cid: review_flashcard(cid, 4), lambda: next(review_ids)),
+        "delete_folder_recursive": (lambda fid: db.delete_folder(fid, recursive=True), make_subtree),
+        "row_to_dict_x1000": (lambda _: [row_to_dict(r) for r in rows], None),
+    }
+
+    results = {}
+    for name, (fn, setup) in ops.items():
+        if args.only and name not in args.only:
+            continue
+        repeat = max(1, args.repeat // 10) if name == "get_folder_tree" and cards >= 100_000 else args.repeat
+        r = results[name] = measure(fn, setup, repeat)
+        print(f"  {name:<26} {r['ops_per_sec']:10.1f} ops/s   mean {r['mean_ms']:9.3f} ms   "
+              f"peak {r['peak_kb']:10.1f} KB")
+    db.close()
+    return {"cards": cards, "collection": summary, "ops": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FlashcardDB micro-benchmarks on synthetic collections.")
+    parser.add_argument("--cards", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--max-history", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="run only these operations")
+    parser.add_argument("--out", default=None, help="results file (default benchmarks/results/database-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    _isolate(tempfile.mkdtemp(prefix="basalt-bench-"))
+    runs = [bench_collection(cards, args) for cards in args.cards]
+
+    results = {
+        "benchmark": "database",
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "params": vars(args),
+        "runs": runs,
+    }
+    out = args.out or os.path.join(
+        os.path.dirname(__file__), "results",
+        f"database-{results['commit']}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Per-request overhead of bare requests.post vs the pooled provider sessions.
+
+Starts a stub HTTPS server on localhost (self-signed certificate generated with
+the `openssl` CLI) that answers every POST with a tiny OpenAI-style completion,
+then times N sequential requests each way.
+
+    python -m benchmarks.bench_http_sessions [--n 200]
+"""
+import argparse, json, os, socket, ssl, statistics, subprocess, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from basalt.core.api_calls import configure_sessions, get_session
+
+RESPONSE = json.dumps({"choices": [{"message": {"content": "[]"}}]}).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *_):
+        pass
+
+
+def _self_signed_cert(directory):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def _time(post, url, cert, n):
+    body = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        post(url, json=body, verify=cert, timeout=(5, 30)).raise_for_status()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=200, help="requests per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _self_signed_cert(tmp)
+        server = ThreadingHTTPServer(("localhost", 0), _Handler)
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(cert, key)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"https://localhost:{server.server_address[1]}/v1/chat/completions"
+
+        configure_sessions(1)
+        results = {
+            "requests.post": _time(requests.post, url, cert, args.n),
+            "pooled session": _time(get_session("bench").post, url, cert, args.n),
+        }
+        server.shutdown()
+
+    for name, r in results.items():
+        print(f"{name:<16} mean {r['mean_ms']:7.2f} ms   p50 {r['p50_ms']:7.2f} ms   p95 {r['p95_ms']:7.2f} ms")
+    saved = results["requests.post"]["mean_ms"] - results["pooled session"]["mean_ms"]
+    print(f"saved per request: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
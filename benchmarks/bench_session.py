@@ -0,0 +1,80 @@
+"""Per-command latency of core_commands with a cold vs a warm Session.
+
+"cold" resets the session before every call, so each command pays what it
+did before sessions existed: connect, init_schema and reading config.json.
+"warm" reuses the process-wide session, as the CLI, hotkey listener and
+menu bar now do.
+
+    python -m benchmarks.bench_session --cards 10000 --repeat 200
+"""
+import argparse, datetime, itertools, json, os, tempfile
+
+from benchmarks.bench_database import _isolate, _git_commit, measure
+
+
+def bench(args):
+    from basalt.core.config import default_configs, set_configs
+    from basalt.core import core_commands
+    from basalt.core.session import get_session
+    from benchmarks.synth import generate
+
+    configs = default_configs()
+    configs["data_dir"] = tempfile.mkdtemp(dir=os.environ["HOME"])
+    set_configs(configs)
+    session = get_session()
+    summary = generate(session.db_path(), args.cards, args.depth, args.fanout, args.max_history)
+    print(f"{args.cards} cards, {summary['folders']} folders")
+
+    db = session.db
+    card_ids = itertools.cycle([r[0] for r in db.conn.execute("SELECT id FROM flashcards ORDER BY random() LIMIT 1000")])
+    card_id = next(card_ids)
+    folder_id, folder_name = db.conn.execute("SELECT id, name FROM folders WHERE id != 0 LIMIT 1").fetchone()
+
+    commands = {
+        "set_flashcard": lambda _: core_commands.set_flashcard(card_id, "answer", "benchmark answer"),
+        "set_folder": lambda _: core_commands.set_folder(folder_id, "name", folder_name),
+        "set (by name)": lambda _: core_commands.set("folder", folder_name, "name", folder_name),
+        # a different card each time, or one card's interval grows past datetime's range
+        "review_flashcard": lambda _: core_commands.review_flashcard(next(card_ids), 4),
+    }
+
+    results = {}
+    for name, fn in commands.items():
+        cold = measure(fn, session.reset, args.repeat)
+        warm = measure(fn, None, args.repeat)
+        results[name] = {"cold": cold, "warm": warm}
+        print(f"  {name:<18} cold {cold['mean_ms']:8.3f} ms   warm {warm['mean_ms']:8.3f} ms   "
+              f"x{cold['mean_ms'] / warm['mean_ms']:.1f}")
+    return {"cards": args.cards, "collection": summary, "commands": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="core_commands latency, cold vs warm session.")
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--max-history", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--out", default=None, help="results file (default benchmarks/results/session-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    _isolate(tempfile.mkdtemp(prefix="basalt-bench-"))
+    results = {
+        "benchmark": "session",
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "params": vars(args),
+        "run": bench(args),
+    }
+    out = args.out or os.path.join(
+        os.path.dirname(__file__), "results",
+        f"session-{results['commit']}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Synthetic collection generator.
+
+Builds a Basalt database of configurable size: a folder hierarchy of given
+depth and fan-out, cards spread over it, and review histories of varying
+length. Rows are bulk-inserted into the schema created by FlashcardDB, in the same
+column formats create_flashcard writes, so the result looks exactly like a
+real collection to the rest of the code.
+
+    python -m benchmarks.synth out.db --cards 100000 --depth 4 --fanout 6 --max-history 50
+"""
+import argparse, datetime, json, os, random, time
+
+from basalt.core import rep_codec
+from basalt.core.database import FlashcardDB, ROOT_FOLDER_DEFAULTS, make_default_rep_data, index_missing_signatures, rebuild_folder_terms, store_source
+from basalt.core.datetime_utils import dt_to_epoch
+
+WORDS = (
+    "cell membrane protein enzyme photosynthesis mitochondria nucleus gene allele "
+    "theorem integral derivative matrix vector eigenvalue group ring field "
+    "empire treaty revolution dynasty parliament constitution war trade "
+    "verb noun tense clause idiom vowel syllable grammar "
+    "basalt granite magma tectonic erosion sediment mineral crystal"
+).split()
+
+
+# passing reviews in a row, at most: each one multiplies the SM-2 interval by ~3, so
+# a few more reviews on top of a longer streak would schedule past datetime's range
+MAX_STREAK = 6
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def build_folders(db, depth, fanout):
+    """Create a complete tree of the given depth/fan-out below the root; returns all folder ids."""
+    ids = [ROOT_FOLDER_DEFAULTS["id"]]
+    level = [ROOT_FOLDER_DEFAULTS["id"]]
+    counter = 0
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(fanout):
+                counter += 1
+                folder_id = db.create_folder(f"folder-{counter}")
+                db.update_folder_fields(folder_id, {"parent_id": parent})
+                next_level.append(folder_id)
+        ids.extend(next_level)
+        level = next_level
+    return ids
+
+
+def generate(db_path, cards=10_000, depth=3, fanout=5, max_history=20, due_fraction=0.2,
+             cards_per_batch=10, seed=0):
+    """Fill a new synthetic database at `db_path` (which should not exist yet); returns a summary dict."""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = time.perf_counter()
+
+    with FlashcardDB(db_path) as db:
+        folder_ids = build_folders(db, depth, fanout)
+        conn = db.conn
+
+        n_batches = (cards + cards_per_batch - 1) // cards_per_batch
+        first_batch = conn.execute("SELECT coalesce(max(id), 0) + 1 FROM batches").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO batches (id, source_id) VALUES (?, ?)",
+            [(first_batch + b, store_source(conn, _sentence(rng, 200))) for b in range(n_batches)],
+        )
+
+        def rows():
+            for i in range(cards):
+                history = []
+                t = now - datetime.timedelta(days=rng.randint(30, 720))
+                streak = 0
+                for _ in range(rng.randint(0, max_history)):
+                    t += datetime.timedelta(hours=rng.randint(1, 24 * 30))
+                    score = rng.choice((1, 3, 4, 4, 5))
+                    streak = streak + 1 if score >= 3 else 0
+                    if streak > MAX_STREAK:
+                        score, streak = 1, 0
+                    history.append((score, dt_to_epoch(t)))
+                rep_data = make_default_rep_data()
+                rep_data["history"] = history
+                due = now + datetime.timedelta(
+                    hours=-rng.randint(1, 24 * 30) if rng.random() < due_fraction else rng.randint(1, 24 * 90))
+                yield (
+                    rng.choice(folder_ids),
+                    first_batch + i // cards_per_batch,
+                    _sentence(rng, rng.randint(5, 15)) + "?",
+                    _sentence(rng, rng.randint(3, 30)) + ".",
+                    json.dumps({"hint": _sentence(rng, 3)} if rng.random() < 0.3 else {}),
+                    rep_codec.encode(rep_data),
+                    dt_to_epoch(due),
+                )
+
+        conn.executemany(
+            "INSERT INTO flashcards (folder_id, batch_id, question, answer, other_data, rep_data, next_due) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows(),
+        )
+        # what create_flashcard would have indexed card by card
+        index_missing_signatures(conn)
+        rebuild_folder_terms(conn)
+        conn.commit()
+
+    return {
+        "path": db_path,
+        "cards": cards,
+        "folders": len(folder_ids),
+        "batches": n_batches,
+        "seconds": time.perf_counter() - start,
+        "bytes": os.path.getsize(os.path.expanduser(db_path)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Basalt database.")
+    parser.add_argument("path")
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=3, help="folder tree depth below the root")
+    parser.add_argument("--fanout", type=int, default=5, help="children per folder")
+    parser.add_argument("--max-history", type=int, default=20, help="max reviews per card")
+    parser.add_argument("--due-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    summary = generate(args.path, args.cards, args.depth, args.fanout, args.max_history,
+                       args.due_fraction, seed=args.seed)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
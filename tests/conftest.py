@@ -0,0 +1,11 @@
+import os, tempfile
+
+# basalt.core.config resolves its directories when imported, so point them at
+# a scratch home before any test module imports basalt
+_home = tempfile.mkdtemp(prefix="basalt-tests-")
+os.environ.update(
+    HOME=_home,
+    XDG_CONFIG_HOME=os.path.join(_home, "config"),
+    XDG_DATA_HOME=os.path.join(_home, "data"),
+    XDG_CACHE_HOME=os.path.join(_home, "cache"),
+)
@@ -0,0 +1,88 @@
+import json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from basalt.core import api_calls
+from basalt.core.api_calls import call_model, configure_sessions, get_session, stream_model
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions():
+    configure_sessions(10)
+    yield
+    configure_sessions(10)
+
+
+class _OneReplyPerConnection(BaseHTTPRequestHandler):
+    """Answers the first request on a connection and drops the connection on the next, unanswered."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.posts += 1
+        self.served = getattr(self, "served", 0) + 1
+        if self.served > 1:
+            self.close_connection = True
+            return
+        data = json.dumps({"choices": [{"message": {"content": "hi"}}],
+                           "usage": {"prompt_tokens": 1, "completion_tokens": 1}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def closing_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OneReplyPerConnection)
+    server.daemon_threads = True
+    server.posts = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_one_session_per_provider():
+    assert get_session("openai") is get_session("openai")
+    assert get_session("openai") is not get_session("google")
+
+
+def test_configure_sessions_sets_the_pool_size():
+    configure_sessions(3)
+    session = get_session("openai")
+    adapter = session.get_adapter("https://api.openai.com")
+    assert adapter._pool_maxsize == 3
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 3
+    assert adapter.max_retries.read == 0
+
+    configure_sessions(5)
+    assert get_session("openai") is not session
+    assert get_session("openai").get_adapter("http://x")._pool_maxsize == 5
+
+
+def test_a_closed_keep_alive_connection_is_resent_once(closing_server):
+    configs = {"provider": "mock", "model": "m", "api_key": "",
+               "api_base": f"http://127.0.0.1:{closing_server.server_address[1]}"}
+    assert call_model("", "x", configs) == "hi"
+    assert call_model("", "x", configs) == "hi"
+    assert closing_server.posts == 3
+
+
+def test_other_connection_errors_are_not_resent(monkeypatch):
+    calls = []
+
+    def refuse(self, url, **kwargs):
+        calls.append(url)
+        raise api_calls.requests.exceptions.ConnectionError(ConnectionRefusedError("refused"))
+
+    monkeypatch.setattr(api_calls.requests.Session, "post", refuse)
+    configs = {"provider": "mock", "model": "m", "api_key": "", "api_base": "http://127.0.0.1:9"}
+    with pytest.raises(RuntimeError, match="request failed"):
+        list(stream_model("", "x", configs))
+    assert len(calls) == 1
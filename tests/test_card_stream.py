@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from basalt.core.card_stream import CardStreamParser
+
+CARDS = [{"question": "What is ATP?", "answer": "the cell's energy currency"},
+         {"question": 'Quote "this" [and] {that}', "answer": "ok", "tags": ["a", {"b": 1}]}]
+
+
+def _feed(text, chunk=1):
+    parser = CardStreamParser()
+    cards = []
+    for i in range(0, len(text), chunk):
+        cards.extend(parser.feed(text[i:i + chunk]))
+    return parser, cards
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 1000])
+@pytest.mark.parametrize("preamble", ["", "```json\n", "Here are [some] cards:\n", "See [1], [2] and [ x ]: ", "[\n "])
+def test_cards_after_any_preamble(preamble, chunk):
+    parser, cards = _feed(preamble + json.dumps(CARDS, indent=1) + "\n```", chunk)
+    assert cards == CARDS
+    assert not parser.truncated
+
+
+def test_empty_array():
+    parser, cards = _feed("Nothing to learn here: []")
+    assert cards == [] and not parser.truncated
+
+
+def test_truncated_response_keeps_complete_cards():
+    text = json.dumps(CARDS)
+    parser, cards = _feed(text[:text.index("Quote") + 3])
+    assert cards == CARDS[:1]
+    assert parser.truncated
+
+
+def test_malformed_card_is_skipped():
+    parser, cards = _feed('[{"question": "q", oops}, {"question": "q2", "answer": "a2"}]')
+    assert cards == [{"question": "q2", "answer": "a2"}]
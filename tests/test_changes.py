@@ -0,0 +1,45 @@
+import pytest
+
+from basalt.core.database import CHANGE_TRACKED_TABLES, FlashcardDB
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cards.db")
+
+
+def test_first_call_reports_everything_then_nothing_while_idle(path):
+    with FlashcardDB(path) as db:
+        token, changed = db.changes_since()
+        assert changed == set(CHANGE_TRACKED_TABLES)
+        assert db.changes_since(token) == (token, set())
+        db.get_all_cards()
+        assert db.changes_since(token) == (token, set())
+
+
+def test_own_writes_are_reported_by_table(path):
+    with FlashcardDB(path) as db:
+        token, _ = db.changes_since()
+        batch = db.create_batch("text")
+        token, changed = db.changes_since(token)
+        assert changed == {"batches"}
+
+        db.create_flashcard({"question": "q", "answer": "a"}, batch)
+        token, changed = db.changes_since(token)
+        assert changed == {"flashcards"}
+
+        db.create_folder("bio")
+        assert db.changes_since(token)[1] == {"folders"}
+
+
+def test_commits_from_other_connections_are_seen(path):
+    with FlashcardDB(path) as reader, FlashcardDB(path) as writer:
+        token, _ = reader.changes_since()
+        folder = writer.create_folder("bio")
+        token, changed = reader.changes_since(token)
+        assert changed == {"folders"}
+
+        writer.update_folder_fields(folder, {"name": "biology"})
+        token, changed = reader.changes_since(token)
+        assert changed == {"folders"}
+        assert reader.changes_since(token) == (token, set())
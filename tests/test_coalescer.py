@@ -0,0 +1,86 @@
+import json, threading
+
+import pytest
+
+from basalt.core import daemon
+from basalt.core.coalescer import MAX_DOCUMENTS, CaptureCoalescer
+from basalt.core.config import default_configs
+from basalt.core.database import FlashcardDB
+
+CONFIGS = {"coalesce_window_ms": 60_000, "coalesce_max_chars": 100}
+
+
+class Flushes:
+    def __init__(self):
+        self.calls = []
+        self.flushed = threading.Event()
+
+    def __call__(self, contents, user_inputs, configs):
+        self.calls.append((contents, user_inputs))
+        self.flushed.set()
+
+
+def test_accepts_small_captures_when_enabled():
+    assert CaptureCoalescer.accepts("x" * 99, CONFIGS)
+    assert not CaptureCoalescer.accepts("x" * 100, CONFIGS)
+    assert not CaptureCoalescer.accepts("x", {**CONFIGS, "coalesce_window_ms": 0})
+
+
+def test_group_flushes_when_the_window_elapses():
+    flushes = Flushes()
+    coalescer = CaptureCoalescer(flushes)
+    configs = {**CONFIGS, "coalesce_window_ms": 20}
+    coalescer.add("a", {}, configs)
+    coalescer.add("b", {}, configs)
+    assert flushes.flushed.wait(5)
+    assert flushes.calls == [(["a", "b"], {})]
+
+
+def test_group_flushes_at_once_when_full():
+    flushes = Flushes()
+    coalescer = CaptureCoalescer(flushes)
+    coalescer.add("x" * 60, {}, CONFIGS)
+    coalescer.add("y" * 40, {}, CONFIGS)
+    assert flushes.calls == [(["x" * 60, "y" * 40], {})]
+
+    for i in range(MAX_DOCUMENTS):
+        coalescer.add(str(i), {}, CONFIGS)
+    assert flushes.calls[1] == ([str(i) for i in range(MAX_DOCUMENTS)], {})
+
+
+def test_groups_are_kept_apart_by_prompt_settings():
+    flushes = Flushes()
+    coalescer = CaptureCoalescer(flushes)
+    coalescer.add("a", {}, CONFIGS)
+    coalescer.add("b", {"c": True}, CONFIGS)
+    coalescer.add("c", {}, {**CONFIGS, "model": "other"})
+    coalescer.add("d", {}, CONFIGS)
+    coalescer.flush_all()
+    assert sorted(flushes.calls, key=str) == sorted([(["a", "d"], {}), (["b"], {"c": True}), (["c"], {})], key=str)
+
+
+def test_flush_errors_are_logged_not_raised(caplog):
+    def flush(*args):
+        raise RuntimeError("boom")
+    coalescer = CaptureCoalescer(flush)
+    coalescer.add("x" * 100, {}, CONFIGS)
+    assert "could not dispatch" in caplog.text
+
+
+def test_coalesced_cards_are_split_by_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "db_path", lambda: str(tmp_path / "cards.db"))
+    monkeypatch.setattr(daemon, "_call_model", lambda *args, **kwargs: json.dumps([
+        {"question": "q1", "answer": "a1", "source": 1},
+        {"question": "q2", "answer": "a2", "source": 3},
+        {"question": "q3", "answer": "a3", "source": 9},
+        {"question": "q4", "answer": "a4"},
+    ]))
+    configs = {**default_configs(), "provider": "mock", "model": "m", "response_cache": False}
+    daemon.make_flashcards_coalesced(["one", "two", "three"], {}, configs)
+
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        batches = db.get_all_batches()
+        assert [db.get_batch(b["id"])["source_text"] for b in batches] == ["one", "two", "three"]
+        by_batch = {b["id"]: [c["question"] for c in db.get_cards_in_batch(b["id"])] for b in batches}
+        assert list(by_batch.values()) == [["q1"], [], ["q2"]]
+        assert all("source" not in c["other_data"] for c in db.get_all_cards())
@@ -0,0 +1,47 @@
+import pytest
+
+from basalt.core import config
+from basalt.core.core_commands import assert_valid_config_edit, set as core_set
+
+
+@pytest.mark.parametrize("key, value", [
+    ("dedupe", "flag"), ("dedupe", "drop"), ("dedupe", None),
+    ("provider", "mock"), ("provider", "OpenAI"), ("provider", None),
+    ("api_base", "http://127.0.0.1:8765"), ("api_base", None),
+    ("model", "gpt-4o-mini"), ("api_key", "sk-test"),
+    ("stream", True), ("dedupe_threshold", 80),
+    ("folder_routing", "llm"), ("folder_routing", "local"),
+])
+def test_valid_config_edits(key, value):
+    assert_valid_config_edit(key, value)
+
+
+@pytest.mark.parametrize("key, value", [
+    ("dedupe", "skip"), ("dedupe", True),
+    ("provider", "not-a-provider"),
+    ("api_base", 8765), ("model", 4),
+    ("stream", "yes"), ("dedupe_threshold", "80"),
+    ("folder_routing", "locl"), ("folder_routing", None),
+    ("no_such_key", 1),
+])
+def test_invalid_config_edits(key, value):
+    with pytest.raises(ValueError):
+        assert_valid_config_edit(key, value)
+
+
+def test_set_config_takes_value_as_third_argument():
+    core_set("config", "dedupe", "flag")
+    assert config.get_configs()["dedupe"] == "flag"
+    core_set("config", "provider", "mock")
+    assert config.get_configs()["provider"] == "mock"
+    core_set("config", "dedupe", None)
+    assert config.get_configs()["dedupe"] is None
+
+
+def test_assert_valid_configs_checks_choices(tmp_path):
+    configs = config.default_configs()
+    configs["data_dir"] = str(tmp_path)
+    config.assert_valid_configs(configs)
+    configs["folder_routing"] = "locl"
+    with pytest.raises(AssertionError):
+        config.assert_valid_configs(configs)
@@ -0,0 +1,70 @@
+import os, sys, threading, time
+
+import pytest
+
+from basalt.core import config_watcher
+from basalt.core.config_watcher import ConfigWatcher
+
+
+class Changes:
+    def __init__(self):
+        self.count = 0
+        self.changed = threading.Event()
+
+    def __call__(self):
+        self.count += 1
+        self.changed.set()
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+@pytest.fixture(params=["inotify", "poll"])
+def watched(request, tmp_path, monkeypatch):
+    if request.param == "poll":
+        monkeypatch.setattr(config_watcher, "_inotify_watch", lambda directory: None)
+    elif not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux-only")
+    path = str(tmp_path / "basalt" / "config.json")
+    changes = Changes()
+    watcher = ConfigWatcher(changes, path=path, poll_interval=0.01)
+    assert watcher.mode == request.param
+    watcher.start()
+    yield path, changes
+    watcher.stop()
+
+
+def test_writes_to_the_config_are_reported(watched):
+    path, changes = watched
+    _write(path, "{}")
+    assert changes.changed.wait(5)
+
+
+def test_replacing_the_config_is_reported(watched):
+    path, changes = watched
+    _write(path + ".tmp", '{"a": 1}')
+    os.replace(path + ".tmp", path)
+    assert changes.changed.wait(5)
+
+
+def test_other_files_are_ignored(watched):
+    path, changes = watched
+    _write(os.path.join(os.path.dirname(path), "other.json"), "{}")
+    assert not changes.changed.wait(0.2)
+
+
+def test_stop_returns_promptly_and_handler_errors_are_logged(tmp_path, caplog):
+    def on_change():
+        raise ValueError("bad config")
+    path = str(tmp_path / "config.json")
+    watcher = ConfigWatcher(on_change, path=path, poll_interval=0.01).start()
+    _write(path, "{")
+    for _ in range(500):
+        if "config change handler failed" in caplog.text:
+            break
+        time.sleep(0.01)
+    watcher.stop()
+    assert not watcher._thread.is_alive()
+    assert "config change handler failed" in caplog.text
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from basalt.core import daemon
+from basalt.core.config import default_configs
+from basalt.core.database import FlashcardDB
+from basalt.core.disk_cache import DiskCache
+
+
+@pytest.fixture
+def configs(tmp_path, monkeypatch):
+    path = str(tmp_path / "cards.db")
+    monkeypatch.setattr(daemon, "db_path", lambda: path)
+    monkeypatch.setattr(daemon, "_response_cache", DiskCache(str(tmp_path / "cache" / "responses.db"), max_bytes=0))
+    return {**default_configs(), "provider": "mock", "model": "m"}
+
+
+def _model(monkeypatch, response):
+    calls = []
+    def _call_model(prompt, content, configs, **kwargs):
+        calls.append(content)
+        return response
+    monkeypatch.setattr(daemon, "_call_model", _call_model)
+    return calls
+
+
+def _card_count():
+    with FlashcardDB(daemon.db_path()) as db:
+        return len(db.get_all_cards())
+
+
+def test_coalesced_captures_are_cached_one_by_one(configs, monkeypatch):
+    _model(monkeypatch, json.dumps([
+        {"question": "q1", "answer": "a1", "source": 1},
+        {"question": "q2", "answer": "a2", "source": 2},
+        {"question": "q3", "answer": "a3", "source": 2},
+    ]))
+    daemon.make_flashcards_coalesced(["first text", "second text"], {}, configs)
+
+    cached = daemon.cached_response("second text", {}, configs)
+    assert [card["question"] for card in json.loads(cached)] == ["q2", "q3"]
+    assert "source" not in json.loads(cached)[0]
+
+    calls = _model(monkeypatch, "[]")
+    daemon.make_flashcard("second text", {}, configs, text_resp=cached)
+    daemon.make_flashcard("first text", {}, configs)
+    assert calls == []
+    assert _card_count() == 6
+
+
+def test_fresh_capture_skips_the_cache(configs, monkeypatch):
+    calls = _model(monkeypatch, '[{"question": "q", "answer": "a"}]')
+    daemon.make_flashcard("text", {}, configs)
+    daemon.make_flashcard("text", {}, configs)
+    daemon.make_flashcard("text", {}, configs, fresh=True)
+    assert calls == ["text", "text"]
+
+
+def test_no_cached_response_when_disabled(configs, monkeypatch):
+    _model(monkeypatch, '[{"question": "q", "answer": "a"}]')
+    configs["response_cache"] = False
+    daemon.make_flashcard("text", {}, configs)
+    assert daemon.cached_response("text", {}, configs) is None
+
+
+def test_truncated_response_keeps_complete_cards_and_is_not_cached(configs, monkeypatch):
+    calls = _model(monkeypatch, '```json\n[{"question": "q1", "answer": "a1"}, {"question": "q2", "ans')
+    daemon.make_flashcard("text", {}, configs)
+    assert _card_count() == 1
+    assert daemon.cached_response("text", {}, configs) is None
+    daemon.make_flashcard("text", {}, configs)
+    assert calls == ["text", "text"]
+
+
+def test_coalesced_max_tokens_scales_with_documents(configs, monkeypatch):
+    seen = []
+    def _call_model(prompt, content, configs, **kwargs):
+        seen.append(kwargs["max_tokens"])
+        return "[]"
+    monkeypatch.setattr(daemon, "_call_model", _call_model)
+    daemon.make_flashcards_coalesced(["a", "b", "c"], {}, configs)
+    daemon.make_flashcards_coalesced([str(i) for i in range(10)], {}, configs)
+    assert seen == [3 * 2048, daemon.COALESCED_MAX_TOKENS]
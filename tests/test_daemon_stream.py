@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from basalt.core import daemon
+from basalt.core.database import FlashcardDB
+
+CONFIGS = {"provider": "mock", "model": "m", "api_key": None}
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "cards.db")
+    monkeypatch.setattr(daemon, "db_path", lambda: path)
+    return path
+
+
+def _stream(monkeypatch, *pieces, error=None):
+    def stream_model(prompt, content, configs, usage=None):
+        yield from pieces
+        if error is not None:
+            raise error
+    monkeypatch.setattr(daemon, "stream_model", stream_model)
+
+
+def _model_call_seconds():
+    hist = daemon.metrics.snapshot()["histograms"].get('stage_seconds{stage="model_call"}')
+    return (hist["count"], hist["sum"]) if hist else (0, 0.0)
+
+
+def _batches(path):
+    with FlashcardDB(path) as db:
+        return db.conn.execute("SELECT COUNT(*) FROM batches").fetchone()[0], len(db.get_all_cards())
+
+
+def test_cards_are_stored_as_they_complete(db_file, monkeypatch):
+    _stream(monkeypatch, 'Cards: [{"question": "q1", "answer": "a1"},', ' {"question": "q2", "answer": "a2"}]')
+    daemon._stream_flashcards("prompt", "content", CONFIGS)
+    assert _batches(db_file) == (1, 2)
+
+
+def test_failure_before_any_card_leaves_no_batch(db_file, monkeypatch):
+    _stream(monkeypatch, error=ValueError("api_key is required"))
+    with pytest.raises(ValueError):
+        daemon._stream_flashcards("prompt", "content", CONFIGS)
+    assert _batches(db_file) == (0, 0)
+
+
+def test_broken_stream_keeps_complete_cards(db_file, monkeypatch):
+    _stream(monkeypatch, '[{"question": "q1", "answer": "a1"}, {"quest', error=RuntimeError("connection reset"))
+    daemon._stream_flashcards("prompt", "content", CONFIGS)
+    assert _batches(db_file) == (1, 1)
+
+
+def test_model_call_time_excludes_storing_cards(db_file, monkeypatch):
+    _stream(monkeypatch, '[{"question": "q1", "answer": "a1"}, {"question": "q2", "answer": "a2"}]')
+    create = FlashcardDB.create_flashcard
+    def slow_create(self, card, batch_id):
+        time.sleep(0.05)
+        return create(self, card, batch_id)
+    monkeypatch.setattr(FlashcardDB, "create_flashcard", slow_create)
+
+    count, total = _model_call_seconds()
+    daemon._stream_flashcards("prompt", "content", CONFIGS)
+    new_count, new_total = _model_call_seconds()
+    assert new_count == count + 1
+    assert new_total - total < 0.05
+
+
+def test_reply_without_an_array_fails_and_leaves_no_batch(db_file, monkeypatch):
+    _stream(monkeypatch, "Sorry, I can't help with that.")
+    with pytest.raises(ValueError, match="square brackets"):
+        daemon._stream_flashcards("prompt", "content", CONFIGS)
+    assert _batches(db_file) == (0, 0)
+
+
+def test_other_failures_after_a_card_delete_the_batch(db_file, monkeypatch):
+    _stream(monkeypatch, '[{"question": "q1", "answer": "a1"}, {"question": "q2", "answer": "a2"}]')
+    create = FlashcardDB.create_flashcard
+    def create_once(self, card, batch_id):
+        if card["question"] == "q2":
+            raise RuntimeError("database is locked")
+        return create(self, card, batch_id)
+    monkeypatch.setattr(FlashcardDB, "create_flashcard", create_once)
+    with pytest.raises(RuntimeError, match="locked"):
+        daemon._stream_flashcards("prompt", "content", CONFIGS)
+    assert _batches(db_file) == (0, 0)
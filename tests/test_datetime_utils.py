@@ -0,0 +1,46 @@
+import calendar, datetime, random
+
+from basalt.core.datetime_utils import (dt_to_epoch, epoch_to_sql_timestamp, sql_timestamp_to_epoch,
+                                        dt_to_sql_timestamp, epochs_to_sql_timestamps, sql_timestamps_to_epochs)
+from basalt.cli import _readable_card, _readable_cards
+
+
+def test_sql_timestamp_epoch_round_trip():
+    rng = random.Random(0)
+    for _ in range(1000):
+        epoch = rng.randrange(-2**31, 2**33)
+        ts = epoch_to_sql_timestamp(epoch)
+        assert sql_timestamp_to_epoch(ts) == epoch
+        assert calendar.timegm(datetime.datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").timetuple()) == epoch
+
+
+def test_epoch_matches_datetime():
+    dt = datetime.datetime(2024, 2, 29, 23, 59, 59, tzinfo=datetime.timezone.utc)
+    assert sql_timestamp_to_epoch(dt_to_sql_timestamp(dt)) == dt_to_epoch(dt) == 1709251199
+
+
+def test_cli_prints_epochs_as_timestamps():
+    card = {"id": 1, "next_due": 1704067200, "created_at": 1704067200, "other_data": None,
+            "rep_data": {"history": [[4, 1704067200], [5, "2024-01-02 00:00:00"]]}}
+    readable = _readable_card(card)
+    assert readable["next_due"] == readable["created_at"] == "2024-01-01 00:00:00"
+    assert readable["rep_data"]["history"] == [[4, "2024-01-01 00:00:00"], [5, "2024-01-02 00:00:00"]]
+    assert card["next_due"] == 1704067200  # the original is left alone
+    assert _readable_card({"id": 2, "next_due": None, "rep_data": None})["next_due"] is None
+
+
+def test_bulk_conversions_match_the_scalar_ones():
+    rng = random.Random(1)
+    epochs = [rng.randrange(-2**31, 2**33) for _ in range(500)]
+    epochs += [1704067200 + rng.randrange(86400) for _ in range(500)] + [None]
+    timestamps = epochs_to_sql_timestamps(epochs)
+    assert timestamps == [None if e is None else epoch_to_sql_timestamp(e) for e in epochs]
+    assert sql_timestamps_to_epochs(timestamps) == epochs
+
+
+def test_cli_converts_a_result_set_at_once():
+    cards = [{"id": i, "next_due": 1704067200 + i, "rep_data": {"history": [[3, 1704067200 + i], "odd"]}}
+             for i in range(3)]
+    assert [card["rep_data"]["history"] for card in _readable_cards(cards)] == [
+        [[3, f"2024-01-01 00:00:0{i}"], "odd"] for i in range(3)
+    ]
@@ -0,0 +1,63 @@
+import pytest
+
+from basalt.core import similarity
+from basalt.core.database import FlashcardDB
+
+CARD = {"question": "What is the powerhouse of the cell?", "answer": "The mitochondrion"}
+REWORDED = {"question": "What is the powerhouse of the cell?", "answer": "The mitochondria"}
+OTHER = {"question": "Who wrote Hamlet?", "answer": "William Shakespeare"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        yield db
+
+
+def _estimate(a, b):
+    return similarity.similarity(similarity.signature(**a), similarity.signature(**b))
+
+
+def test_signatures_estimate_similarity():
+    assert _estimate(CARD, CARD) == 1.0
+    assert _estimate(CARD, {k: v.upper() for k, v in CARD.items()}) == 1.0
+    assert _estimate({"question": "café", "answer": ""}, {"question": "cafe", "answer": ""}) == 1.0
+    assert _estimate(CARD, REWORDED) >= 0.7
+    assert _estimate(CARD, OTHER) < 0.2
+    # question words never match answer words
+    assert _estimate({"question": "cell", "answer": ""}, {"question": "", "answer": "cell"}) == 0.0
+
+
+def test_flag_marks_duplicates_including_within_a_batch(db):
+    db.store_batch([CARD], "first")
+    db.store_batch([REWORDED, OTHER, OTHER], "second", dedupe="flag")
+    cards = {card["id"]: card for card in db.get_all_cards()}
+    assert [card["other_data"].get("duplicate_of") for card in cards.values()] == [None, 1, None, 3]
+
+
+def test_drop_skips_duplicates(db):
+    db.store_batch([CARD], "first")
+    db.store_batch([REWORDED, OTHER], "second", dedupe="drop")
+    assert [card["question"] for card in db.get_all_cards()] == [CARD["question"], OTHER["question"]]
+
+
+def test_no_mode_keeps_everything_and_unknown_modes_raise(db):
+    db.store_batch([CARD, CARD], "text")
+    assert len(db.get_all_cards()) == 2
+    with pytest.raises(ValueError):
+        db.dedupe_card(CARD, "skip")
+
+
+def test_edits_are_reindexed(db):
+    batch = db.create_batch("text")
+    card_id = db.create_flashcard(CARD, batch)
+    db.update_flashcard_fields(card_id, OTHER)
+    assert db.find_similar_cards(**CARD) == []
+    assert [match[0] for match in db.find_similar_cards(**OTHER)] == [card_id]
+    db.delete_flashcard(card_id)
+    assert db.find_similar_cards(**OTHER) == []
+
+
+def test_duplicate_clusters(db):
+    db.store_batch([CARD, OTHER, REWORDED, OTHER, CARD], "text")
+    assert db.find_duplicate_clusters() == [[1, 3, 5], [2, 4]]
@@ -0,0 +1,64 @@
+import pytest
+
+from basalt.core import disk_cache
+from basalt.core.disk_cache import DiskCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    return now
+
+
+def _cache(tmp_path, **kwargs):
+    return DiskCache(str(tmp_path / "cache" / "entries.db"), **{"max_bytes": 1000, **kwargs})
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip_and_stats(tmp_path, compress):
+    cache = _cache(tmp_path, compress=compress)
+    assert cache.get("k") is None
+    cache.set("k", "välue " * 20)
+    assert cache.get("k") == "välue " * 20
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert (stats["bytes"] < 120) == compress
+
+    cache.clear()
+    assert cache.get("k") is None
+
+
+def test_entries_outlive_the_process(tmp_path):
+    _cache(tmp_path).set("k", "v")
+    assert _cache(tmp_path).get("k") == "v"
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+    cache = _cache(tmp_path, max_bytes=30)
+    for key in "abc":
+        cache.set(key, key * 10)
+        clock[0] += 1
+    cache.get("a")
+    clock[0] += 1
+    cache.set("d", "d" * 10)
+    assert [cache.get(key) is not None for key in "abcd"] == [True, False, True, True]
+    assert cache.stats()["bytes"] <= 30
+
+
+def test_values_larger_than_the_cache_are_not_stored(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10)
+    cache.set("small", "x")
+    cache.set("big", "x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("small") == "x"
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = _cache(tmp_path, ttl=60)
+    cache.set("k", "v")
+    clock[0] += 60
+    assert cache.get("k") == "v"
+    clock[0] += 1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,50 @@
+import pytest
+
+from basalt.core import config, core_commands
+from basalt.core.config import default_configs, set_configs
+from basalt.core.database import FlashcardDB
+from basalt.core.session import get_session
+
+NOW = 1_700_000_000
+
+
+def _card(db, question, next_due, folder_id=0):
+    card_id = db.create_flashcard({"question": question, "answer": "a", "folder_id": folder_id}, db.create_batch("text"))
+    db.update_flashcard_fields(card_id, {"next_due": next_due})
+    return card_id
+
+
+def test_most_overdue_card(tmp_path):
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        assert db.get_most_overdue_card(NOW) is None
+        _card(db, "later", NOW + 60)
+        assert db.get_most_overdue_card(NOW) is None
+        _card(db, "due", NOW)
+        oldest = _card(db, "oldest", NOW - 60)
+        _card(db, "tied", NOW - 60)
+        assert db.get_most_overdue_card(NOW)["id"] == oldest
+        assert db.get_due_count(NOW) == 3
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "config_dir", str(tmp_path / "config"))
+    monkeypatch.setattr(config, "config_file_path", str(tmp_path / "config" / "config.json"))
+    set_configs({**default_configs(), "data_dir": str(tmp_path / "data")})
+    session = get_session()
+    session.reset()
+    yield session
+    session.reset()
+
+
+def test_next_due_card_reads_one_card_and_a_count(session, monkeypatch):
+    monkeypatch.setattr(FlashcardDB, "get_due_cards", lambda self: pytest.fail("loads every due card"))
+    assert core_commands.next_due_card() is None
+
+    with session.database() as db:
+        bio = db.create_folder("bio")
+        _card(db, "first", NOW - 60, bio)
+        _card(db, "second", NOW)
+        _card(db, "not yet", 2 * NOW)
+    due = core_commands.next_due_card()
+    assert (due["card"]["question"], due["folder"], due["remaining"]) == ("first", "bio", 1)
@@ -0,0 +1,74 @@
+import pytest
+
+from basalt.core import daemon, folder_classifier
+from basalt.core.config import default_configs
+from basalt.core.database import FlashcardDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        yield db
+
+
+@pytest.fixture
+def folders(db):
+    """bio and history, a few cards each."""
+    bio, history = db.create_folder("bio"), db.create_folder("history")
+    batch = db.create_batch("text")
+    for question, answer, folder_id in [
+        ("What does the mitochondrion produce?", "ATP through cellular respiration", bio),
+        ("Where is chlorophyll found?", "In chloroplasts of plant cells", bio),
+        ("What carries genetic information?", "DNA in the cell nucleus", bio),
+        ("When did the Roman empire fall?", "The western empire fell in 476", history),
+        ("Who was the first Roman emperor?", "Augustus", history),
+    ]:
+        db.create_flashcard({"question": question, "answer": answer, "folder_id": folder_id}, batch)
+    return {"bio": bio, "history": history}
+
+
+def _term_tables(db):
+    return (db.conn.execute("SELECT * FROM folder_terms ORDER BY term, folder_id").fetchall(),
+            db.conn.execute("SELECT * FROM folder_term_totals WHERE cards > 0 ORDER BY folder_id").fetchall())
+
+
+def test_card_terms_keep_content_words():
+    assert folder_classifier.card_terms("What is the cell's nucleus?", "It holds DNA, 46 chromosomes") == {
+        "cell": 1, "nucleus": 1, "holds": 1, "dna": 1, "chromosomes": 1,
+    }
+
+
+def test_cards_go_to_the_closest_folder(db, folders):
+    assert db.classify_folder("What organelle makes ATP?", "The mitochondrion")[0] == folders["bio"]
+    assert db.classify_folder("Which emperor followed Augustus?", "Tiberius")[0] == folders["history"]
+
+
+def test_unrelated_cards_stay_in_the_root(db, folders):
+    assert db.classify_folder("What is a monad?", "A monoid in the category of endofunctors") == (0, 0.0)
+    assert db.classify_folder("", "") == (0, 0.0)
+
+
+def test_counts_follow_edits_moves_and_deletes(db, folders):
+    cards = db.get_all_cards()
+    db.update_flashcard_fields(cards[0]["id"], {"answer": "Energy for the cell"})
+    db.update_flashcard_fields(cards[1]["id"], {"folder_id": folders["history"]})
+    db.delete_flashcard(cards[3]["id"])
+    db.delete_batch(db.store_batch([{"question": "Roman roads", "answer": "Via Appia"}], "more"))
+
+    incremental = _term_tables(db)
+    db.rebuild_folder_terms()
+    assert _term_tables(db) == incremental
+
+
+def test_daemon_routes_locally_without_a_folder_digest(tmp_path, monkeypatch, folders, db):
+    monkeypatch.setattr(daemon, "db_path", lambda: str(tmp_path / "cards.db"))
+    configs = {**default_configs(), "provider": "mock", "model": "m", "response_cache": False, "folder_routing": "local"}
+    prompts = []
+    def _call_model(prompt, content, configs, **kwargs):
+        prompts.append(prompt)
+        return '[{"question": "What organelle makes ATP?", "answer": "The mitochondrion", "folder_id": 0}]'
+    monkeypatch.setattr(daemon, "_call_model", _call_model)
+
+    daemon.make_flashcard("text", {"f": True}, configs)
+    assert "folder_id" not in prompts[0]
+    assert db.get_all_cards()[-1]["folder_id"] == folders["bio"]
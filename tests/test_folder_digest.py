@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from basalt.core import daemon
+from basalt.core.config import default_configs
+from basalt.core.database import FlashcardDB
+
+CONFIGS = {**default_configs(), "provider": "mock", "model": "m", "response_cache": False}
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    path = str(tmp_path / "cards.db")
+    monkeypatch.setattr(daemon, "db_path", lambda: path)
+    monkeypatch.setattr(daemon, "_folder_digest_cache", {"signature": None, "digest": None})
+    with FlashcardDB(path) as db:
+        db.create_folder("biology")
+    return path
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """How often the digest is built from the database."""
+    calls = []
+    build = FlashcardDB.get_folder_digest
+    monkeypatch.setattr(FlashcardDB, "get_folder_digest", lambda self, *a: calls.append(1) or build(self, *a))
+    return calls
+
+
+def _sent_prompts(monkeypatch):
+    prompts = []
+
+    def call(prompt, content, configs):
+        prompts.append(prompt)
+        return json.dumps([{"question": "q", "answer": "a"}])
+
+    monkeypatch.setattr(daemon, "_call_model", call)
+    return prompts
+
+
+def test_digest_is_only_sent_when_folder_ids_are_asked_for(path, builds, monkeypatch):
+    prompts = _sent_prompts(monkeypatch)
+    daemon.make_flashcard("text", {}, CONFIGS)
+    daemon.make_flashcard("text", {"f": True}, CONFIGS)
+    daemon.make_flashcard("text", {"f": True}, {**CONFIGS, "folder_routing": "local"})
+
+    assert ["/biology" in prompt for prompt in prompts] == [False, True, False]
+    assert ["folder_id" in prompt for prompt in prompts] == [False, True, False]
+    assert builds == [1]
+
+
+def test_digest_is_rebuilt_only_when_folders_change(path, builds):
+    prompt, _ = daemon._capture_prompt({"f": True}, CONFIGS)
+    assert daemon._capture_prompt({"f": True}, CONFIGS)[0] == prompt
+    assert builds == [1]
+
+    with FlashcardDB(path) as db:
+        chem = db.create_folder("chemistry")
+    assert "/chemistry" in daemon._capture_prompt({"f": True}, CONFIGS)[0]
+    assert builds == [1, 1]
+
+    with FlashcardDB(path) as db:
+        db.update_folder_fields(chem, {"name": "organic"})
+    prompt = daemon._capture_prompt({"f": True}, CONFIGS)[0]
+    assert "/organic" in prompt and "/chemistry" not in prompt
+    assert builds == [1, 1, 1]
@@ -0,0 +1,69 @@
+import pytest
+
+from basalt.core.database import FlashcardDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        yield db
+
+
+@pytest.fixture
+def tree(db):
+    """bio > cells > organelles, and chem; each holds one card."""
+    ids = {name: db.create_folder(name) for name in ("bio", "cells", "organelles", "chem")}
+    db.move_folder(ids["cells"], ids["bio"])
+    db.move_folder(ids["organelles"], ids["cells"])
+    batch = db.create_batch("text")
+    for name, folder_id in ids.items():
+        db.create_flashcard({"question": f"about {name}", "answer": "a", "folder_id": folder_id}, batch)
+    return ids
+
+
+def _folder_names(db):
+    return sorted(folder["name"] for folder in db.get_all_folders())
+
+
+def test_subtree_ids(db, tree):
+    assert sorted(db.get_subtree_ids(tree["bio"])) == sorted([tree["bio"], tree["cells"], tree["organelles"]])
+    assert db.get_subtree_ids(999) == []
+
+
+def test_recursive_delete_removes_the_subtree_and_its_cards(db, tree):
+    expected = {"folders": 3, "cards": 3}
+    assert db.delete_folder(tree["bio"], recursive=True, dry_run=True) == expected
+    assert len(db.get_all_folders()) == 5
+
+    assert db.delete_folder(tree["bio"], recursive=True) == expected
+    assert _folder_names(db) == ["/", "chem"]
+    assert [card["question"] for card in db.get_all_cards()] == ["about chem"]
+    assert [card["question"] for card in db.search_cards("about")] == ["about chem"]
+
+
+def test_delete_of_a_missing_folder_raises(db):
+    with pytest.raises(ValueError):
+        db.delete_folder(999, recursive=True)
+
+
+def test_failed_delete_rolls_back(db, tree):
+    with pytest.raises(Exception, match="root folder"):
+        db.delete_folder(0, recursive=True)
+    assert len(db.get_all_folders()) == 5
+    assert len(db.get_all_cards()) == 4
+
+
+def test_move_takes_the_subtree_along(db, tree):
+    assert db.move_folder(tree["cells"], tree["chem"]) == 2
+    assert db.get_folder(tree["cells"])["parent_id"] == tree["chem"]
+    assert db.get_folder(tree["organelles"])["parent_id"] == tree["cells"]
+    assert sorted(db.get_subtree_ids(tree["chem"])) == sorted([tree["chem"], tree["cells"], tree["organelles"]])
+
+
+def test_move_refuses_cycles_and_unknown_folders(db, tree):
+    with pytest.raises(ValueError, match="cycle"):
+        db.move_folder(tree["bio"], tree["organelles"])
+    with pytest.raises(ValueError):
+        db.move_folder(tree["bio"], 999)
+    with pytest.raises(ValueError):
+        db.move_folder(999, tree["bio"])
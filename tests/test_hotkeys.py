@@ -0,0 +1,95 @@
+import threading, time
+from multiprocessing.connection import Listener
+
+import pytest
+
+from basalt import hotkey_listener
+from basalt.core import core_commands, daemon
+from basalt.hotkey_listener import HotkeyDispatcher, compile_command
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = []
+
+    def capture(input=None, file_path_or_url=None, fresh=False, **user_inputs):
+        calls.append((input, file_path_or_url, fresh, user_inputs))
+
+    monkeypatch.setitem(hotkey_listener.CORE_COMMANDS_INTERFACE, "capture", capture)
+    return calls
+
+
+@pytest.fixture
+def socket_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "d.sock")
+    monkeypatch.setattr(core_commands, "socket_path", lambda: path)
+    hotkey_listener._unsent_metrics.clear()
+    return path
+
+
+@pytest.mark.parametrize("command, args, kwargs", [
+    ("capture clip -f", ("clip",), {"f": True}),
+    ("capture -n 5 clip", ("clip",), {"n": 5}),
+    ("capture file notes.txt --n=3", ("file", "notes.txt"), {"n": 3}),
+    ("capture -not", (), {"n": True, "o": True, "t": True}),
+    ("set card 1 answer hi", ("card", 1, "answer", "hi"), {}),
+])
+def test_compile_command(recorded, command, args, kwargs):
+    compiled = compile_command(command)
+    assert compiled.args == args and compiled.keywords == kwargs
+
+
+@pytest.mark.parametrize("command", ["", "bogus", "set card", "capture a b c d"])
+def test_compile_command_rejects_what_cannot_be_called(recorded, command):
+    with pytest.raises(ValueError):
+        compile_command(command)
+
+
+def test_dispatcher_runs_commands_off_the_calling_thread(recorded, socket_file):
+    dispatcher = HotkeyDispatcher(debounce=0)
+    callers = []
+    assert dispatcher.press("<cmd>+b", lambda: callers.append(threading.current_thread()))
+    dispatcher.stop()
+    for worker in dispatcher._workers:
+        worker.join(1)
+    assert callers and callers[0] is not threading.current_thread()
+
+
+def test_dispatcher_debounces_and_limits_in_flight(socket_file):
+    release = threading.Event()
+    dispatcher = HotkeyDispatcher(workers=1, debounce=0.05, max_in_flight=2)
+    assert dispatcher.press("k", release.wait)
+    assert not dispatcher.press("k", release.wait)          # debounced
+    time.sleep(0.06)
+    assert dispatcher.press("k", release.wait)              # queued behind the first
+    time.sleep(0.06)
+    assert not dispatcher.press("k", release.wait)          # two in flight already
+    assert dispatcher.press("other", lambda: None)          # limits are per hotkey
+    release.set()
+    dispatcher.stop()
+    for worker in dispatcher._workers:
+        worker.join(1)
+    reasons = [r[3]["reason"] for r in hotkey_listener._unsent_metrics if r[1] == "hotkey_dropped_total"]
+    assert reasons == ["debounce", "in_flight"]
+
+
+def test_metrics_are_kept_until_the_daemon_takes_them(socket_file):
+    hotkey_listener._observe("hotkey_enqueue_seconds", 0.0001, buckets=hotkey_listener.DISPATCH_BUCKETS, hotkey="k")
+    hotkey_listener._inc("hotkey_errors_total", hotkey="k")
+    assert not hotkey_listener.flush_metrics()              # no daemon: kept
+    assert len(hotkey_listener._unsent_metrics) == 2
+
+    listener = Listener(socket_file, authkey=b"basalt")
+    def serve():
+        with listener.accept() as conn:
+            daemon.apply_client_metrics(conn.recv()["records"])
+        listener.close()
+    thread = threading.Thread(target=serve)
+    thread.start()
+    assert hotkey_listener.flush_metrics()
+    thread.join()
+
+    snapshot = daemon.metrics.snapshot()
+    assert snapshot["histograms"]['hotkey_enqueue_seconds{hotkey="k"}']["count"] == 1
+    assert snapshot["counters"]['hotkey_errors_total{hotkey="k"}'] == 1
+    assert not hotkey_listener._unsent_metrics
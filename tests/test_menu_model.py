@@ -0,0 +1,99 @@
+import copy, random
+
+import pytest
+
+from basalt.mac_ui.menu_model import build_menu, diff
+
+QUESTIONS = ["What is x?", "Why?", "Define entropy", "Define enthalpy", "Who", "When did it happen?"]
+NAMES = ["math", "bio", "chem", "notes"]
+
+
+def _folders(tree):
+    yield tree
+    for child in tree["children"]:
+        yield from _folders(child)
+
+
+def _random_tree(rng, ids, depth=0):
+    tree = {"id": next(ids), "name": rng.choice(NAMES), "children": [], "cards": []}
+    for _ in range(rng.randint(0, 3) if depth < 3 else 0):
+        tree["children"].append(_random_tree(rng, ids, depth + 1))
+    tree["cards"] = [{"id": next(ids), "question": rng.choice(QUESTIONS)} for _ in range(rng.randint(0, 4))]
+    return tree
+
+
+def _mutate(rng, tree, ids):
+    """A copy of `tree` after a few random renames, deletions, additions and moves."""
+    tree = copy.deepcopy(tree)
+    for _ in range(rng.randint(1, 6)):
+        folders = list(_folders(tree))
+        folder = rng.choice(folders)
+        change = rng.choice(["rename", "retitle", "drop_card", "add_card", "add_folder",
+                             "drop_folder", "shuffle", "move_card"])
+        if change == "rename" and folder is not tree:
+            folder["name"] = rng.choice(NAMES)
+        elif change == "retitle" and folder["cards"]:
+            rng.choice(folder["cards"])["question"] = rng.choice(QUESTIONS)
+        elif change == "drop_card" and folder["cards"]:
+            folder["cards"].pop(rng.randrange(len(folder["cards"])))
+        elif change == "add_card":
+            folder["cards"].insert(rng.randint(0, len(folder["cards"])),
+                                   {"id": next(ids), "question": rng.choice(QUESTIONS)})
+        elif change == "add_folder":
+            folder["children"].append(_random_tree(rng, ids, depth=2))
+        elif change == "drop_folder" and folder["children"]:
+            folder["children"].pop(rng.randrange(len(folder["children"])))
+        elif change == "shuffle":
+            rng.shuffle(folder["cards"])
+            rng.shuffle(folder["children"])
+        elif change == "move_card" and folder["cards"]:
+            rng.choice(folders)["cards"].append(folder["cards"].pop())
+    return tree
+
+
+def _apply(menu, ops):
+    menu = copy.deepcopy(menu)
+    for op in ops:
+        parent = menu
+        for key in op["path"]:
+            parent = next(child for child in parent["children"] if child["key"] == key)
+        keys = [child["key"] for child in parent["children"]]
+        if op["op"] in ("remove", "update"):
+            assert op["key"] in keys
+            parent["children"].pop(keys.index(op["key"]))
+        if op["op"] in ("insert", "update"):
+            keys = [child["key"] for child in parent["children"]]
+            assert op["key"] not in keys
+            index = 0 if op["after"] is None else keys.index(op["after"]) + 1
+            parent["children"].insert(index, copy.deepcopy(op["node"]))
+    return menu
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_diff_turns_old_menu_into_new(seed):
+    rng = random.Random(seed)
+    ids = iter(range(1, 10**6))
+    old_tree = _random_tree(rng, ids)
+    new_tree = _mutate(rng, old_tree, ids)
+    old, new = build_menu(old_tree), build_menu(new_tree)
+    ops = diff(old, new)
+    assert _apply(old, ops) == new
+    assert diff(new, new) == []
+
+
+def test_unchanged_subtrees_produce_no_operations():
+    tree = {"id": 0, "name": "/", "cards": [], "children": [
+        {"id": 1, "name": "a", "children": [], "cards": [{"id": 10, "question": "q"}]},
+        {"id": 2, "name": "b", "children": [], "cards": [{"id": 20, "question": "q"}]},
+    ]}
+    changed = copy.deepcopy(tree)
+    changed["children"][1]["cards"].append({"id": 21, "question": "r"})
+    ops = diff(build_menu(tree), build_menu(changed))
+    assert [(op["op"], op["path"], op["key"]) for op in ops] == [("insert", (("folder", 2),), ("card", 21))]
+
+
+def test_duplicate_titles_are_numbered():
+    tree = {"id": 0, "name": "/", "children": [], "cards": [
+        {"id": 1, "question": "same"}, {"id": 2, "question": "same"}, {"id": 3, "question": "A long question"},
+    ]}
+    assert [child["title"] for child in build_menu(tree)["children"]] == ["same", "same (2)", "A long que..."]
@@ -0,0 +1,119 @@
+import threading
+from multiprocessing.connection import Listener
+
+import pytest
+
+from basalt.core import core_commands, daemon, profiling
+from basalt.core.disk_cache import DiskCache
+from basalt.core.metrics import Histogram, Metrics
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = Metrics()
+    monkeypatch.setattr(daemon, "metrics", fresh)
+    monkeypatch.setattr(profiling, "ENABLED", False)
+    return fresh
+
+
+def test_counters_and_gauges_add_up_per_label_set():
+    m = Metrics()
+    m.inc("jobs_total", status="ok")
+    m.inc("jobs_total", 2, status="ok")
+    m.inc("jobs_total", status="failed")
+    m.add_gauge("jobs_queued", 3)
+    m.add_gauge("jobs_queued", -1)
+    snapshot = m.snapshot()
+    assert snapshot["counters"] == {'jobs_total{status="ok"}': 3, 'jobs_total{status="failed"}': 1}
+    assert snapshot["gauges"] == {"jobs_queued": 2}
+
+
+def test_histogram_buckets_are_cumulative_with_inclusive_upper_bounds():
+    hist = Histogram((1, 2))
+    for value in (0.5, 1, 1.5, 3):
+        hist.observe(value)
+    snapshot = hist.snapshot()
+    assert snapshot["buckets"] == {"1": 2, "2": 3, "+Inf": 4}
+    assert (snapshot["count"], snapshot["sum"]) == (4, 6.0)
+
+
+def test_quantiles_report_the_upper_bound_of_their_bucket():
+    hist = Histogram((0.1, 1, 10))
+    assert hist.quantile(0.95) is None
+    for _ in range(95):
+        hist.observe(0.05)
+    for _ in range(5):
+        hist.observe(5)
+    assert (hist.quantile(0.5), hist.quantile(0.95), hist.quantile(0.99)) == (0.1, 0.1, 10)
+    hist.observe(50)
+    assert hist.quantile(0.99) == 10
+    assert hist.quantile(1) == float("inf")
+
+
+def test_prometheus_exposition():
+    m = Metrics()
+    m.inc("provider_requests_total", provider="openai")
+    m.add_gauge("jobs_in_flight", 1)
+    m.observe("stage_seconds", 0.3, buckets=(0.25, 0.5), stage="parse")
+    assert m.to_prometheus() == (
+        "# TYPE basalt_provider_requests_total counter\n"
+        'basalt_provider_requests_total{provider="openai"} 1\n'
+        "# TYPE basalt_jobs_in_flight gauge\n"
+        "basalt_jobs_in_flight 1\n"
+        "# TYPE basalt_stage_seconds histogram\n"
+        'basalt_stage_seconds_bucket{stage="parse",le="0.25"} 0\n'
+        'basalt_stage_seconds_bucket{stage="parse",le="0.5"} 1\n'
+        'basalt_stage_seconds_bucket{stage="parse",le="+Inf"} 1\n'
+        'basalt_stage_seconds_sum{stage="parse"} 0.3\n'
+        'basalt_stage_seconds_count{stage="parse"} 1\n'
+    )
+
+
+def test_timer_observes_even_when_the_block_raises():
+    m = Metrics()
+    with pytest.raises(ValueError):
+        with m.timer("job_seconds"):
+            raise ValueError
+    assert m.snapshot()["histograms"]["job_seconds"]["count"] == 1
+
+
+def test_client_metrics_are_applied_and_bad_records_rejected(metrics):
+    daemon.apply_client_metrics([
+        ("inc", "hotkey_presses_total", 1, {"action": "capture"}, None),
+        ("observe", "hotkey_seconds", 3, {}, [1, 5]),
+    ])
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {'hotkey_presses_total{action="capture"}': 1}
+    assert snapshot["histograms"]["hotkey_seconds"]["buckets"] == {"1": 0, "5": 1, "+Inf": 1}
+    with pytest.raises(ValueError):
+        daemon.apply_client_metrics([("set", "x", 1, {}, None)])
+
+
+def test_stats_rpc_round_trip(metrics, tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "cache" / "responses.db"), max_bytes=0)
+    monkeypatch.setattr(daemon, "_response_cache", cache)
+    monkeypatch.setattr(daemon, "_transcript_cache", None)
+    path = str(tmp_path / "d.sock")
+    monkeypatch.setattr(core_commands, "socket_path", lambda: path)
+    metrics.inc("jobs_total", status="ok")
+
+    listener = Listener(path, authkey=b"basalt")
+
+    def serve():
+        for _ in range(2):
+            with listener.accept() as conn:
+                request = conn.recv()
+                assert request["kind"] == "stats"
+                conn.send(daemon.stats_reply(request["format"]))
+        listener.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    snapshot = core_commands.daemon_stats()
+    text = core_commands.daemon_stats("prometheus")
+    thread.join()
+
+    assert snapshot["counters"] == {'jobs_total{status="ok"}': 1}
+    assert snapshot["caches"] == {"responses": cache.stats()}
+    assert "profile" not in snapshot
+    assert 'basalt_jobs_total{status="ok"} 1\n' in text
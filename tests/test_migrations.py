@@ -0,0 +1,100 @@
+import json, sqlite3
+
+import pytest
+
+from basalt.core import database, rep_codec
+from basalt.core.database import FlashcardDB
+
+
+def _old_database(path, version, monkeypatch):
+    """A database at schema `version`, holding a folder and two cards written the way that version did."""
+    with monkeypatch.context() as m:
+        m.setattr(database, "SCHEMA_VERSION", version)
+        conn = sqlite3.connect(path)
+        database.init_schema(conn)
+    assert database.get_schema_version(conn) == version
+
+    due = "2024-01-02 03:04:05" if version < 5 else 1704164645
+    history = {"history": [[4, "2024-01-01 00:00:00"]]}
+    history = json.dumps(history) if version < 6 else rep_codec.encode(history)
+    conn.execute("INSERT INTO folders (id, name, parent_id, folder_settings) VALUES (1, 'photosynthesis', 0, '{}')")
+    source = "Chlorophyll absorbs light in the thylakoid membranes."
+    if version < 7:
+        conn.execute("INSERT INTO batches (id, source_text) VALUES (1, ?)", (source,))
+    else:
+        conn.execute("INSERT INTO batches (id, source_id) VALUES (1, ?)", (database.store_source(conn, source),))
+    conn.executemany(
+        "INSERT INTO flashcards (id, folder_id, batch_id, question, answer, other_data, rep_data, next_due) "
+        "VALUES (?, ?, 1, ?, ?, '{}', ?, ?)",
+        [(1, 1, "Where is chlorophyll found?", "In the thylakoid membranes of chloroplasts", history, due),
+         (2, 0, "What does chlorophyll absorb?", "Mostly red and blue light", '{"history": []}', due)],
+    )
+    # what that version's writers did besides the INSERTs
+    if version >= 2:
+        database.index_missing_signatures(conn)
+    if version >= 3:
+        database.rebuild_folder_terms(conn)
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize("version", range(database.SCHEMA_VERSION))
+def test_old_databases_upgrade_to_the_current_schema(tmp_path, monkeypatch, version):
+    path = str(tmp_path / "cards.db")
+    _old_database(path, version, monkeypatch)
+
+    with FlashcardDB(path) as db:
+        assert database.get_schema_version(db.conn) == database.SCHEMA_VERSION
+
+        card = db.get_card(1)
+        assert card["next_due"] == 1704164645
+        assert card["rep_data"] == {"history": [[4, 1704067200]]}
+        assert db.conn.execute("SELECT typeof(rep_data) FROM flashcards WHERE id = 1").fetchone()[0] == "blob"
+
+        assert db.get_batch(1)["source_text"] == "Chlorophyll absorbs light in the thylakoid membranes."
+        assert [c["id"] for c in db.search_cards("thylakoid", sources=False)] == [1]
+        assert {c["id"] for c in db.search_cards("thylakoid")} == {1, 2}
+
+        assert db.find_similar_cards("Where is chlorophyll found?", "In the thylakoid membranes of chloroplasts")[0][0] == 1
+        assert db.classify_folder("chlorophyll in the thylakoid", "membranes")[0] == 1
+
+        token, _ = db.changes_since()
+        db.delete_flashcard(2)
+        assert db.changes_since(token)[1] == {"flashcards"}
+
+
+def test_opening_a_current_database_again_is_a_no_op(tmp_path):
+    path = str(tmp_path / "cards.db")
+    with FlashcardDB(path) as db:
+        db.create_batch("text")
+    with FlashcardDB(path) as db:
+        assert database.get_schema_version(db.conn) == database.SCHEMA_VERSION
+        assert len(db.get_all_batches()) == 1
+
+
+def test_newer_schema_is_refused(tmp_path):
+    path = str(tmp_path / "cards.db")
+    with FlashcardDB(path) as db:
+        db.conn.execute(f"PRAGMA user_version = {database.SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError, match="newer"):
+        FlashcardDB(path)
+
+
+def test_migrations_another_process_applied_are_skipped(tmp_path, monkeypatch):
+    path = str(tmp_path / "cards.db")
+    _old_database(path, 0, monkeypatch)
+    slow = sqlite3.connect(path)
+    with FlashcardDB(path):
+        pass  # the other process upgrades first
+
+    ran = []
+    monkeypatch.setattr(database, "MIGRATIONS", [
+        lambda conn, i=i: ran.append(i) for i in range(database.SCHEMA_VERSION)])
+    stale = [0]  # the version the slow process read before the upgrade
+    get_schema_version = database.get_schema_version
+    monkeypatch.setattr(database, "get_schema_version", lambda conn: stale.pop() if stale else get_schema_version(conn))
+
+    database.migrate(slow)
+    assert ran == []
+    assert get_schema_version(slow) == database.SCHEMA_VERSION
+    slow.close()
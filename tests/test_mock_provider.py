@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from basalt.core.api_calls import call_model, stream_model
+from basalt.core.mock_provider import MockProviderServer
+
+TEXT = "Cells divide by mitosis. Mitochondria make ATP. Ribosomes build proteins. Nuclei hold DNA."
+
+
+@pytest.fixture(scope="module")
+def api_base():
+    server = MockProviderServer(port=0, chunk_delay_ms=0)
+    yield server.start()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("provider", ["openai", "mistral", "deepseek", "anthropic", "google", "mock"])
+def test_call_and_stream_agree_for_every_format(api_base, provider):
+    configs = {"provider": provider, "model": "m", "api_key": "k", "api_base": api_base}
+    called, streamed = {}, {}
+    text = call_model("prompt", TEXT, configs, usage=called)
+    assert "".join(stream_model("prompt", TEXT, configs, usage=streamed)) == text
+
+    cards = json.loads(text)
+    assert [c["answer"] for c in cards] == ["Cells divide by mitosis.", "Mitochondria make ATP.", "Ribosomes build proteins."]
+    for usage in (called, streamed):
+        assert usage["prompt_tokens"] > 0
+        assert usage["completion_tokens"] == max(1, len(text) // 4)
+
+
+def test_coalesced_documents_are_tagged_with_their_source(api_base):
+    configs = {"provider": "mock", "model": "m", "api_key": "", "api_base": api_base}
+    text = call_model("", "=== DOCUMENT 1 ===\nOne. Two.\n=== DOCUMENT 2 ===\nThree.", configs)
+    assert [(c["source"], c["answer"]) for c in json.loads(text)] == [(1, "One."), (1, "Two."), (2, "Three.")]
+
+
+def test_injected_errors_surface_as_request_failures():
+    server = MockProviderServer(port=0, rate_500=1.0)
+    configs = {"provider": "mock", "model": "m", "api_key": "", "api_base": server.start()}
+    try:
+        with pytest.raises(RuntimeError, match="500"):
+            call_model("", TEXT, configs)
+        with pytest.raises(RuntimeError, match="500"):
+            list(stream_model("", TEXT, configs))
+        assert server.requests == 2
+    finally:
+        server.shutdown()
+        server.server_close()
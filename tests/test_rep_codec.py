@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from basalt.core import rep_codec
+from basalt.core.database import FlashcardDB
+
+
+@pytest.mark.parametrize("history", [
+    [],
+    [[4, 1700000000]],
+    [[0, 1700000000], [5, 1700086400], [3, 1700000000 + 2**32 - 1]],
+])
+def test_history_round_trips_as_blob(history):
+    blob = rep_codec.encode({"history": history})
+    assert isinstance(blob, bytes)
+    assert len(blob) == 12 + 5 * len(history)
+    assert rep_codec.decode(blob) == {"history": history}
+
+
+def test_sql_timestamps_are_encoded_as_epochs():
+    blob = rep_codec.encode({"history": [[3, "2023-11-14 22:13:20"]]})
+    assert rep_codec.decode(blob) == {"history": [[3, 1700000000]]}
+
+
+@pytest.mark.parametrize("rep_data", [
+    {"history": [[3, 1700000000.5]]},              # float timestamp
+    {"history": [[3, 1700000000]], "ease": 2.5},   # extra key
+    {"history": [[300, 1700000000]]},              # grade out of range
+    {"history": [[3, 1700000000, "note"]]},        # odd entry
+    {"history": [[3, "yesterday"]]},               # unparseable timestamp
+    {"history": [[3, 0], [3, 2**32]]},             # offset out of range
+    {"history": "none"},
+])
+def test_anything_else_stays_json(rep_data):
+    encoded = rep_codec.encode(rep_data)
+    assert isinstance(encoded, str)
+    assert json.loads(encoded) == rep_data
+
+
+def test_cards_read_back_from_either_encoding(tmp_path):
+    mixed = {"history": [[3, 1700000000.5]], "ease": 2.5}
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        batch_id = db.create_batch("content")
+        blob_id = db.create_flashcard({"question": "q1", "answer": "a1"}, batch_id)
+        json_id = db.create_flashcard({"question": "q2", "answer": "a2"}, batch_id)
+        db.update_flashcard_fields(blob_id, {"rep_data": {"history": [[4, 1700000000]]}})
+        db.update_flashcard_fields(json_id, {"rep_data": mixed})
+
+        stored = dict(db.conn.execute("SELECT id, typeof(rep_data) FROM flashcards").fetchall())
+        assert stored == {blob_id: "blob", json_id: "text"}
+        assert db.get_card(blob_id)["rep_data"] == {"history": [[4, 1700000000]]}
+        assert db.get_card(json_id)["rep_data"] == mixed
+
+
+def test_disabled_encoding_keeps_writing_json(tmp_path, monkeypatch):
+    history = {"history": [[4, 1700000000]]}
+    blob = rep_codec.encode(history)
+    monkeypatch.setattr(rep_codec, "ENABLED", False)
+    assert json.loads(rep_codec.encode(history)) == history
+
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        card_id = db.create_flashcard({"question": "q", "answer": "a"}, db.create_batch("content"))
+        db.update_flashcard_fields(card_id, {"rep_data": history})
+        assert db.conn.execute("SELECT typeof(rep_data) FROM flashcards").fetchone()[0] == "text"
+        assert db.get_card(card_id)["rep_data"] == history
+
+        db.conn.execute("UPDATE flashcards SET rep_data = ?", (blob,))
+        assert db.get_card(card_id)["rep_data"] == history
@@ -0,0 +1,85 @@
+import threading
+from multiprocessing.connection import Listener
+
+import pytest
+
+from basalt.core import rpc
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    """An rpc command that records how often it ran."""
+    runs = []
+
+    def make(name):
+        runs.append(name)
+        return len(runs)
+
+    monkeypatch.setitem(rpc.COMMANDS, "make", make)
+    return runs
+
+
+@pytest.fixture
+def socket_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "d.sock")
+    monkeypatch.setattr(rpc, "socket_path", lambda: path)
+    return path
+
+
+def _serve_once(path, handler):
+    """A one-connection stand-in for the daemon; `handler(conn, request)` answers (or doesn't)."""
+    listener = Listener(path, authkey=b"basalt")
+
+    def run():
+        with listener.accept() as conn:
+            handler(conn, conn.recv())
+        listener.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_execute_replies_with_result_or_error(counted):
+    assert rpc.execute({"command": "make", "args": ["a"]}) == {"ok": True, "result": 1}
+    reply = rpc.execute({"command": "rm -rf", "args": []})
+    assert reply["ok"] is False and reply["type"] == "ValueError"
+
+
+def test_execute_turns_system_exit_into_an_error_reply(monkeypatch):
+    def exits():
+        raise SystemExit(1)
+
+    monkeypatch.setitem(rpc.COMMANDS, "exits", exits)
+    reply = rpc.execute({"command": "exits"})
+    assert reply["ok"] is False and "status 1" in reply["error"]
+
+
+def test_call_runs_locally_without_a_daemon(counted, socket_file):
+    assert rpc.call("make", "a") == 1
+    assert counted == ["a"]
+
+
+def test_call_runs_in_the_daemon_when_it_is_up(counted, socket_file):
+    thread = _serve_once(socket_file, lambda conn, request: conn.send(rpc.execute(request)))
+    assert rpc.call("make", "a") == 1
+    thread.join()
+    assert counted == ["a"]  # once, in the "daemon"
+
+
+def test_call_reraises_daemon_errors(socket_file):
+    thread = _serve_once(socket_file, lambda conn, request: conn.send(rpc.execute(request)))
+    with pytest.raises(ValueError):
+        rpc.call("get_card", "not-an-int")
+    thread.join()
+
+
+def test_call_does_not_rerun_after_a_dropped_connection(counted, socket_file):
+    def run_then_drop(conn, request):
+        rpc.execute(request)  # the work is done, but no reply is sent
+
+    thread = _serve_once(socket_file, run_then_drop)
+    with pytest.raises(RuntimeError, match="may or may not have run"):
+        rpc.call("make", "a")
+    thread.join()
+    assert counted == ["a"]
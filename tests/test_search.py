@@ -0,0 +1,58 @@
+import pytest
+
+from basalt.core.database import FlashcardDB, fts_query
+
+
+@pytest.fixture
+def db(tmp_path):
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        yield db
+
+
+def _ids(cards):
+    return [card["id"] for card in cards]
+
+
+def test_fts_query_takes_words_literally():
+    assert fts_query('mitochondria "power" OR house*') == '"mitochondria" """power""" "OR" "house"*'
+    with pytest.raises(ValueError):
+        fts_query("  * ")
+
+
+def test_question_matches_rank_above_answer_and_source_matches(db):
+    batch = db.create_batch("Notes on the Krebs cycle")
+    in_answer = db.create_flashcard({"question": "Where does it happen?", "answer": "In the Krebs cycle"}, batch)
+    in_question = db.create_flashcard({"question": "What is the Krebs cycle?", "answer": "A pathway"}, batch)
+    other_batch = db.create_batch("unrelated text")
+    db.create_flashcard({"question": "Unrelated", "answer": "nothing"}, other_batch)
+    only_source = db.create_flashcard({"question": "What makes ATP?", "answer": "Respiration"}, batch)
+
+    assert _ids(db.search_cards("krebs")) == [in_question, in_answer, only_source]
+    assert _ids(db.search_cards("krebs", sources=False)) == [in_question, in_answer]
+    assert _ids(db.search_cards("kreb*", sources=False)) == [in_question, in_answer]
+    assert _ids(db.search_cards("krebs", limit=1, offset=1)) == [in_answer]
+
+
+def test_folder_filter_covers_the_subtree(db):
+    parent, child, other = db.create_folder("bio"), db.create_folder("cells"), db.create_folder("chem")
+    db.update_folder_fields(child, {"parent_id": parent})
+    batch = db.create_batch("text")
+    in_child = db.create_flashcard({"question": "ribosome", "answer": "a", "folder_id": child}, batch)
+    db.create_flashcard({"question": "ribosome", "answer": "b", "folder_id": other}, batch)
+
+    assert _ids(db.search_cards("ribosome", folder_id=parent)) == [in_child]
+    assert len(db.search_cards("ribosome")) == 2
+
+
+def test_index_follows_edits_and_deletes(db):
+    batch = db.create_batch("text")
+    card = db.create_flashcard({"question": "osmosis", "answer": "a"}, batch)
+    db.update_flashcard_fields(card, {"question": "diffusion"})
+    assert db.search_cards("osmosis") == []
+    assert _ids(db.search_cards("diffusion")) == [card]
+
+    db.delete_flashcard(card)
+    assert db.search_cards("diffusion") == []
+
+    db.delete_batch(batch)
+    assert db.search_cards("text") == []
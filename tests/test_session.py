@@ -0,0 +1,81 @@
+import os, threading
+
+import pytest
+
+from basalt.core import config
+from basalt.core.config import default_configs, set_configs
+from basalt.core.session import Session
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "config_dir", str(tmp_path / "config"))
+    monkeypatch.setattr(config, "config_file_path", str(tmp_path / "config" / "config.json"))
+    set_configs({**default_configs(), "data_dir": str(tmp_path / "data")})
+    session = Session()
+    yield session
+    session.reset()
+
+
+def _in_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_each_thread_keeps_its_own_connection(session):
+    db = session.db
+    assert session.db is db
+    other = _in_thread(lambda: session.db)
+    assert other is not db
+    assert session.db is db
+
+
+def test_reset_reopens_the_database(session):
+    db = session.db
+    session.reset()
+    assert session.db is not db
+
+
+def test_changing_data_dir_reopens_the_database(session, tmp_path):
+    db = session.db
+    set_configs({**session.configs(), "data_dir": str(tmp_path / "elsewhere")})
+    os.utime(config.config_file_path, ns=(1, 1))  # a new mtime even on coarse clocks
+    assert session.db is not db
+    assert session.db_path() == str(tmp_path / "elsewhere" / "flashcard_data.db")
+
+
+def test_a_removed_database_file_is_reopened(session):
+    with session.database() as db:
+        db.create_batch("lost?")
+    os.remove(session.db_path())
+    with session.database() as db:
+        assert db.get_all_batches() == []
+        db.create_batch("kept")
+    assert os.path.exists(session.db_path())
+    session.reset()
+    assert len(session.db.get_all_batches()) == 1
+
+
+def test_configs_are_reread_only_when_the_file_changes(session, monkeypatch):
+    reads = []
+    get_configs = config.get_configs
+    monkeypatch.setattr(config, "get_configs", lambda: reads.append(1) or get_configs())
+    first = session.configs()
+    assert session.configs() is first
+    assert reads == [1]
+
+    set_configs({**first, "model": "m"})
+    os.utime(config.config_file_path, ns=(1, 1))
+    assert session.configs()["model"] == "m"
+    assert reads == [1, 1]
+
+
+def test_an_exception_rolls_back_the_block(session):
+    with pytest.raises(ZeroDivisionError):
+        with session.database() as db:
+            db.conn.execute("INSERT INTO folders (name) VALUES ('uncommitted')")
+            1 / 0
+    assert [f["name"] for f in session.db.get_all_folders()] == ["/"]
@@ -0,0 +1,51 @@
+import pytest
+
+from basalt.core.database import FlashcardDB
+
+ARTICLE = "The mitochondrion is the powerhouse of the cell. " * 50
+
+
+@pytest.fixture
+def db(tmp_path):
+    with FlashcardDB(str(tmp_path / "cards.db")) as db:
+        yield db
+
+
+def _sources(db):
+    return db.conn.execute("SELECT id, codec FROM sources ORDER BY id").fetchall()
+
+
+def test_identical_sources_are_stored_once_and_compressed(db):
+    first, second = db.create_batch(ARTICLE), db.create_batch(ARTICLE)
+    assert db.get_batch(first)["source_id"] == db.get_batch(second)["source_id"]
+    assert [codec for _, codec in _sources(db)] == ["zlib"]
+    assert db.get_batch(second)["source_text"] == ARTICLE
+
+    stats = db.storage_stats()
+    assert (stats["batches"], stats["sources"]) == (2, 1)
+    assert stats["text_bytes"] == 2 * stats["unique_bytes"] == 2 * len(ARTICLE)
+    assert stats["stored_bytes"] < len(ARTICLE) / 10
+
+
+def test_short_sources_are_stored_raw(db):
+    batch = db.create_batch("ok ✓")
+    assert [codec for _, codec in _sources(db)] == ["raw"]
+    assert db.get_batch(batch)["source_text"] == "ok ✓"
+
+
+def test_a_source_is_dropped_with_its_last_batch(db):
+    first, second = db.create_batch(ARTICLE), db.create_batch(ARTICLE)
+    db.store_batch([{"question": "q", "answer": "a"}], ARTICLE)
+    db.delete_batch(first)
+    assert len(_sources(db)) == 1
+    assert len(db.search_cards("powerhouse")) == 1
+
+    db.delete_batch(second)
+    db.delete_batch(db.get_all_batches()[0]["id"])
+    assert _sources(db) == []
+    assert db.search_cards("powerhouse") == []
+
+    db.create_batch(ARTICLE)
+    db.rebuild_search_index()
+    matches = db.conn.execute("SELECT rowid FROM sources_fts WHERE sources_fts MATCH 'powerhouse'").fetchall()
+    assert [row[0] for row in matches] == [_sources(db)[0][0]]
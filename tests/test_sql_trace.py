@@ -0,0 +1,40 @@
+import sqlite3
+
+from basalt.core import sql_trace
+from basalt.core.database import FlashcardDB
+
+
+def _recorded():
+    return {s["sql"]: s for s in sql_trace.stats()}
+
+
+def test_connection_execute_is_traced(tmp_path):
+    sql_trace.reset()
+    conn = sqlite3.connect(tmp_path / "t.db", factory=sql_trace.TracedConnection)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+    conn.executescript("INSERT INTO t VALUES (4); INSERT INTO t VALUES (5);")
+    assert conn.execute("SELECT x FROM t ORDER BY x").fetchall() == [(1,), (2,), (3,), (4,), (5,)]
+
+    recorded = _recorded()
+    assert "CREATE TABLE t (x INTEGER)" in recorded
+    assert recorded["INSERT INTO t VALUES (?)"]["rows"] == 3
+    assert "INSERT INTO t VALUES (4); INSERT INTO t VALUES (5);" in recorded
+    assert recorded["SELECT x FROM t ORDER BY x"]["rows"] == 5
+    conn.close()
+
+
+def test_flashcard_db_queries_are_traced(tmp_path):
+    with FlashcardDB(str(tmp_path / "f.db"), trace=True) as db:
+        sql_trace.reset()
+        db.get_due_count()
+    assert any("FROM flashcards WHERE next_due <=" in sql for sql in _recorded())
+
+
+def test_slow_statements_are_logged(tmp_path, caplog):
+    conn = sqlite3.connect(tmp_path / "t.db", factory=sql_trace.TracedConnection)
+    conn.slow_query_ms = 0
+    with caplog.at_level("WARNING", logger="basalt.sql"):
+        conn.execute("SELECT 1").fetchone()
+        del conn
+    assert any("slow query" in r.message and "SELECT 1" in r.message for r in caplog.records)
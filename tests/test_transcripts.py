@@ -0,0 +1,50 @@
+import pytest
+
+from basalt.core import api_calls
+from basalt.core.api_calls import get_youtube_transcript, youtube_video_id
+from basalt.core.disk_cache import DiskCache
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "https://youtube.com/shorts/dQw4w9WgXcQ",
+])
+def test_video_ids(url):
+    assert youtube_video_id(url) == "dQw4w9WgXcQ"
+
+
+def test_not_a_video():
+    assert youtube_video_id("https://example.com/watch?v=dQw4w9WgXcQ") is None
+    with pytest.raises(ValueError):
+        get_youtube_transcript("https://example.com")
+
+
+def test_transcripts_are_fetched_once_per_video(tmp_path, monkeypatch):
+    fetched = []
+    class FakeApi:
+        @staticmethod
+        def get_transcript(video_id):
+            fetched.append(video_id)
+            return [{"text": "never gonna"}, {"text": "give you up"}]
+    monkeypatch.setattr(api_calls, "YouTubeTranscriptApi", FakeApi)
+    cache = DiskCache(str(tmp_path / "transcripts.db"), max_bytes=10_000, compress=True)
+
+    for url in ("https://youtu.be/dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"):
+        assert get_youtube_transcript(url, cache=cache) == "never gonna\ngive you up"
+    assert fetched == ["dQw4w9WgXcQ"]
+
+
+def test_fetch_errors_are_not_cached(tmp_path, monkeypatch):
+    class FailingApi:
+        @staticmethod
+        def get_transcript(video_id):
+            raise ConnectionError("offline")
+    monkeypatch.setattr(api_calls, "YouTubeTranscriptApi", FailingApi)
+    cache = DiskCache(str(tmp_path / "transcripts.db"), max_bytes=10_000)
+
+    with pytest.raises(RuntimeError, match="offline"):
+        get_youtube_transcript("https://youtu.be/dQw4w9WgXcQ", cache=cache)
+    assert cache.stats()["entries"] == 0